@@ -5,10 +5,13 @@ import subprocess
 import shlex
 import sys
 from pathlib import Path
-from typing import List
+from typing import Callable, List, Optional
 import concurrent.futures
 
 from models import MediaFile, ConversionSettings
+import ffmpeg_progress
+import metrics
+import tracing
 
 # --- Platform-specific subprocess creation flags ---
 if sys.platform == "win32":
@@ -16,12 +19,21 @@ if sys.platform == "win32":
 else:
     CREATE_NO_WINDOW = 0
 
-def run_basic_conversion(media: MediaFile, settings: ConversionSettings):
+@tracing.traced("run_basic_conversion")
+def run_basic_conversion(media: MediaFile, settings: ConversionSettings,
+                         item_status_emitter: Optional[Callable] = None,
+                         item_progress_emitter: Optional[Callable] = None,
+                         item_stats_emitter: Optional[Callable] = None,
+                         stop_check: Callable[[], bool] = lambda: False):
     """
-    Performs a basic remux of an MKV file to MP4, copying video/audio and discarding subtitles.
+    Performs a basic remux of an MKV file to MP4, copying the video and the audio tracks the
+    plan keeps, and discarding subtitles.
     This is very fast as it does not re-encode video or audio.
     """
+    file_path_str = str(media.source_path)
     media.status = "Remuxing"
+    if item_status_emitter:
+        item_status_emitter(file_path_str, media.status)
     
     # Regenerate filename from template in case metadata was changed
     media.output_filename = media.generate_filename_from_template(settings.filename_template)
@@ -35,13 +47,18 @@ def run_basic_conversion(media: MediaFile, settings: ConversionSettings):
         if media.source_path.exists():
             media.original_size_gb = media.source_path.stat().st_size / (1024**3)
 
-        command = [
-            "ffmpeg", "-y",
-            "-i", str(media.source_path),
+        plan = media.build_plan(settings)
+        command = ["ffmpeg", "-y", "-i", str(media.source_path)]
+        if plan.video:
+            command.extend(["-map", "0:v:0"])
+        for stream in plan.audio:
+            if stream.action != "drop":
+                command.extend(["-map", f"0:a:{stream.source_index}"])
+        command.extend([
             "-c:v", "copy",
             "-c:a", "copy",
             "-sn", # Strips all subtitles
-        ]
+        ])
         
         # NEW: Add metadata flags
         if media.title:
@@ -60,9 +77,15 @@ def run_basic_conversion(media: MediaFile, settings: ConversionSettings):
             media.status = "Dry Run (Basic)"
             return
 
-        subprocess.run(command, check=True, capture_output=True, text=True, encoding='utf-8', creationflags=CREATE_NO_WINDOW)
-        
-        temp_output_path.rename(final_output_path)
+        def on_stats(stats: ffmpeg_progress.ProgressStats):
+            if item_progress_emitter:
+                item_progress_emitter(file_path_str, stats.percent)
+            if item_stats_emitter:
+                item_stats_emitter(file_path_str, stats)
+        with metrics.record_job("remux", media=media, encoder="copy") as job:
+            job.add_stats(ffmpeg_progress.run_ffmpeg(command, media.duration_seconds, on_stats, stop_check))
+            temp_output_path.rename(final_output_path)
+            job.output_bytes = final_output_path.stat().st_size
         
         media.status = "Converted (Basic)"
         print(f"  -> Success: Remuxed '{media.filename}'")
@@ -70,23 +93,31 @@ def run_basic_conversion(media: MediaFile, settings: ConversionSettings):
         if final_output_path.exists():
             media.converted_size_gb = final_output_path.stat().st_size / (1024**3)
         
-        setattr(media, 'audio_conversion_details', "Copied (Remux)")
+        setattr(media, 'audio_conversion_details', f"{plan.describe_audio()} (Remux)")
         media.burned_subtitle = None
         for track in media.subtitle_tracks:
             track.action = "ignore"
 
     except Exception as e:
         media.status = "Error (Basic)"
-        error_output = getattr(e, 'stderr', str(e))
+        error_output = getattr(e, 'stderr', None) or str(e)
         media.error_message = f"Basic remux failed: {error_output.strip()[-250:]}"
         print(f"  -> [ERROR] {media.error_message}")
     finally:
+        if item_status_emitter:
+            item_status_emitter(file_path_str, media.status)
         if temp_output_path.exists():
             temp_output_path.unlink()
 
-def run_batch_basic_conversion(media_files: List[MediaFile], settings: ConversionSettings):
+def run_batch_basic_conversion(media_files: List[MediaFile], settings: ConversionSettings,
+                               item_status_emitter: Optional[Callable] = None,
+                               item_progress_emitter: Optional[Callable] = None,
+                               item_stats_emitter: Optional[Callable] = None,
+                               stop_check: Callable[[], bool] = lambda: False):
     """
     Performs a basic remux for a list of media files.
     """
     for media in media_files:
-        run_basic_conversion(media, settings)
\ No newline at end of file
+        if stop_check():
+            break
+        run_basic_conversion(media, settings, item_status_emitter, item_progress_emitter, item_stats_emitter, stop_check)
\ No newline at end of file
@@ -0,0 +1,342 @@
+# benchmark.py
+# This module benchmarks the conversion paths on synthetic clips. Fixtures are generated
+# locally with ffmpeg's testsrc2/sine sources as MKVs with mixed audio codecs and text
+# subtitle tracks, then run through run_basic_conversion and convert_media_file with
+# software encoders. Results (fps, wall time, process overhead, output size) are written as
+# JSON so a later run can be compared against them.
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from models import MediaFile, SubtitleTrack, AudioTrack, ConversionSettings
+from basic_convert import run_basic_conversion
+from convert import convert_media_file
+import metrics
+import tracing
+
+BENCHMARK_DIR = Path(os.getenv("APPDATA", Path.home())) / "MediaConverter" / "benchmark"
+DEFAULT_SECONDS = 20
+DEFAULT_SIZE = "1280x720"
+DEFAULT_RATE = 24
+TEXT_SUBTITLE_CODECS = ("subrip", "ass", "ssa", "webvtt", "mov_text", "text")
+SUBTITLE_LINES = [
+    "We should leave before the storm reaches the valley.",
+    "I never said the map was accurate.",
+    "Keep your voice down, they can hear everything.",
+    "The last train leaves at midnight.",
+    "You kept the letter all these years?",
+    "Nobody goes into the old mill after dark.",
+]
+
+# --- Fixtures ---
+
+@dataclass(frozen=True)
+class FixtureSpec:
+    """A synthetic clip. Audio tracks are (codec, channels); subtitle tracks are (language, forced)."""
+    name: str
+    audio: Tuple[Tuple[str, int], ...]
+    subtitles: Tuple[Tuple[str, bool], ...] = ()
+
+FIXTURES = {
+    "ac3_surround": FixtureSpec("ac3_surround", audio=(("ac3", 6), ("aac", 2)), subtitles=(("eng", False),)),
+    # FLAC cannot go into MP4, so the plan must transcode it; the AAC track is copied alongside
+    "flac_stereo": FixtureSpec("flac_stereo", audio=(("flac", 2), ("aac", 2)), subtitles=(("eng", False), ("spa", False))),
+    "forced_subs": FixtureSpec("forced_subs", audio=(("ac3", 6),), subtitles=(("eng", False), ("eng", True), ("fre", False))),
+}
+
+def _srt_time(seconds: float) -> str:
+    millis = int(round(seconds * 1000))
+    return f"{millis // 3600000:02}:{millis // 60000 % 60:02}:{millis // 1000 % 60:02},{millis % 1000:03}"
+
+def _write_srt(path: Path, seconds: int, forced: bool):
+    # A forced track only has the occasional line, like a real one
+    step = 8.0 if forced else 2.0
+    cues, start = [], 0.5
+    while start + 1.5 <= seconds:
+        text = SUBTITLE_LINES[len(cues) % len(SUBTITLE_LINES)]
+        cues.append(f"{len(cues) + 1}\n{_srt_time(start)} --> {_srt_time(start + 1.5)}\n{text}\n")
+        start += step
+    path.write_text("\n".join(cues), encoding="utf-8")
+
+def generate_fixture(spec: FixtureSpec, directory: Path, seconds: int, size: str, regenerate: bool = False) -> Path:
+    """Builds the clip for `spec` unless it already exists. Output is bit-exact, so reruns are comparable."""
+    output = directory / f"{spec.name}-{size}-{seconds}s.mkv"
+    if output.exists() and not regenerate:
+        return output
+    directory.mkdir(parents=True, exist_ok=True)
+    command = ["ffmpeg", "-y", "-v", "error", "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={DEFAULT_RATE}:duration={seconds}"]
+    for i, _track in enumerate(spec.audio):
+        command.extend(["-f", "lavfi", "-i", f"sine=frequency={220 * (i + 1)}:sample_rate=48000:duration={seconds}"])
+    for i, (language, forced) in enumerate(spec.subtitles):
+        srt_path = directory / f"{spec.name}-{i}-{language}{'-forced' if forced else ''}.srt"
+        _write_srt(srt_path, seconds, forced)
+        command.extend(["-i", str(srt_path)])
+
+    command.extend(["-map", "0:v"])
+    for i in range(len(spec.audio)):
+        command.extend(["-map", f"{i + 1}:a"])
+    for i in range(len(spec.subtitles)):
+        command.extend(["-map", f"{len(spec.audio) + i + 1}:s"])
+    command.extend(["-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-pix_fmt", "yuv420p", "-g", str(DEFAULT_RATE * 2)])
+    for i, (codec, channels) in enumerate(spec.audio):
+        command.extend([f"-c:a:{i}", codec, f"-ac:a:{i}", str(channels)])
+        command.extend([f"-metadata:s:a:{i}", "language=eng", f"-disposition:a:{i}", "default" if i == 0 else "0"])
+    for i, (language, forced) in enumerate(spec.subtitles):
+        command.extend([f"-c:s:{i}", "srt", f"-metadata:s:s:{i}", f"language={language}", f"-disposition:s:{i}", "forced" if forced else "0"])
+    command.extend(["-map_metadata", "-1", "-fflags", "+bitexact", "-flags:v", "+bitexact", "-flags:a", "+bitexact", str(output)])
+    print(f"[benchmark] Generating fixture {output.name}")
+    subprocess.run(command, check=True)
+    return output
+
+def probe_media(path: Path) -> MediaFile:
+    """
+    Builds a MediaFile from ffprobe output. The app scans with mkvmerge, but ffprobe is all the
+    benchmark needs and it ships with ffmpeg.
+    """
+    cmd = ["ffprobe", "-v", "error", "-show_format", "-show_streams", "-of", "json", str(path)]
+    data = json.loads(subprocess.run(cmd, check=True, capture_output=True, text=True, encoding="utf-8").stdout)
+    media = MediaFile(source_path=path)
+    media.container = data.get("format", {}).get("format_name", "Unknown")
+    media.duration_seconds = float(data.get("format", {}).get("duration") or 0.0)
+    media.original_size_gb = path.stat().st_size / (1024**3)
+    streams = data.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    if video:
+        numerator, _, denominator = video.get("r_frame_rate", "0/1").partition("/")
+        media.video_codec = video.get("codec_name")
+        media.video_width = int(video.get("width") or 0)
+        media.video_fps = float(numerator) / float(denominator) if float(denominator or 0) else 0.0
+    audio = [s for s in streams if s.get("codec_type") == "audio"]
+    for ffmpeg_index, stream in enumerate(audio):
+        media.audio_tracks.append(AudioTrack(
+            index=stream["index"], ffmpeg_index=ffmpeg_index, codec=stream.get("codec_name"),
+            channels=int(stream.get("channels") or 0), language=stream.get("tags", {}).get("language", "und"),
+            title=stream.get("tags", {}).get("title"), is_default=bool(stream.get("disposition", {}).get("default"))))
+    if media.audio_tracks:
+        primary = next((t for t in media.audio_tracks if t.is_default), media.audio_tracks[0])
+        media.audio_codec, media.audio_channels = primary.codec, primary.channels
+    subtitles = [s for s in streams if s.get("codec_type") == "subtitle"]
+    for ffmpeg_index, stream in enumerate(subtitles):
+        is_text = stream.get("codec_name") in TEXT_SUBTITLE_CODECS
+        media.subtitle_tracks.append(SubtitleTrack(
+            index=stream["index"], ffmpeg_index=ffmpeg_index,
+            language=stream.get("tags", {}).get("language", "und"), title=stream.get("tags", {}).get("title"),
+            codec=stream.get("codec_name"), is_default=bool(stream.get("disposition", {}).get("default")),
+            is_forced=bool(stream.get("disposition", {}).get("forced")), is_text_based=is_text,
+            action="copy" if is_text else "ignore"))
+    media.update_flags()
+    media.status = "Ready"
+    return media
+
+# --- Scenarios ---
+
+@dataclass(frozen=True)
+class Scenario:
+    """One conversion path. `entry` is "basic" (run_basic_conversion) or "convert" (convert_media_file)."""
+    name: str
+    fixture: str
+    entry: str
+    burn: bool = False
+    two_pass: bool = False
+    transcodes_audio: bool = False  # The fixture's plan must transcode at least one audio track
+
+SCENARIOS = [
+    Scenario("remux", "ac3_surround", "basic"),
+    Scenario("audio_transcode", "flac_stereo", "convert", transcodes_audio=True),
+    Scenario("burn_in", "forced_subs", "convert", burn=True),
+    Scenario("two_pass", "forced_subs", "convert", burn=True, two_pass=True),
+]
+IMAGE_FIXTURE = "image_fixture"
+IMAGE_SCENARIOS = [  # Image subtitles cannot be copied to MP4 or burned with the subtitles filter, so both paths drop them
+    Scenario("remux_image_subs", IMAGE_FIXTURE, "basic"),
+    Scenario("audio_transcode_image_subs", IMAGE_FIXTURE, "convert"),
+]
+
+class _LatestStats:
+    """item_stats_emitter that keeps the last ProgressStats of the run."""
+    def __init__(self):
+        self.latest = None
+
+    def __call__(self, _file_path: str, stats):
+        self.latest = stats
+
+def run_scenario(scenario: Scenario, fixture_path: Path, settings: ConversionSettings) -> Dict[str, Any]:
+    """Runs one conversion of the fixture and returns its measurements. The output file is deleted afterwards."""
+    media = probe_media(fixture_path)
+    media.title = f"{fixture_path.stem}.{scenario.name}"
+    if scenario.burn:
+        media.set_burned_subtitle(next((t for t in media.subtitle_tracks if t.is_forced and t.is_text_based), None))
+    run_settings = replace(settings, use_two_pass=scenario.two_pass)
+    plan = media.build_plan(run_settings)
+    # Fail loudly if a plan change means the scenario no longer exercises the path it is named after
+    if scenario.transcodes_audio and not plan.streams("audio", "transcode"):
+        raise RuntimeError(f"Scenario '{scenario.name}' expects an audio transcode, but the plan for {fixture_path.name} is "
+                           f"{[stream.action for stream in plan.audio]}")
+    if scenario.burn and not plan.encodes_video:
+        raise RuntimeError(f"Scenario '{scenario.name}' expects a video re-encode, but {fixture_path.name} has no forced text subtitle to burn in")
+    stats = _LatestStats()
+    spans_before = len(tracing.events("ffmpeg"))
+    times_before = os.times()
+    wall_start = time.perf_counter()
+    if scenario.entry == "basic":
+        run_basic_conversion(media, run_settings, item_stats_emitter=stats)
+    else:
+        # The generated subtitles are English by construction. The app's language check needs mkvextract and
+        # langdetect agreeing on a few short cues, and a miss would silently turn a burn-in run into a copy.
+        convert_media_file(media, run_settings, lambda _percent, _status: None, lambda: False, None, None, stats,
+                           verify_burn_language=scenario.fixture == IMAGE_FIXTURE)
+    wall_seconds = time.perf_counter() - wall_start
+    times_after = os.times()
+
+    ffmpeg_spans = tracing.events("ffmpeg")[spans_before:]
+    ffmpeg_seconds = sum(span["dur"] for span in ffmpeg_spans) / 1e6
+    output_path = media.destination_path
+    output_bytes = output_path.stat().st_size if output_path and output_path.exists() else 0
+    if output_path and output_path.exists():
+        output_path.unlink()
+    frames = stats.latest.frame if stats.latest else 0
+    # A run that converted but took a different path would be a wrong baseline, not a slow one
+    error = None if media.status in ("Converted", "Converted (Basic)") else (media.error_message or media.status)[-500:]
+    if not error and scenario.burn and media.burned_subtitle is None:
+        error = "The burn-in track was dropped, so the video was not re-encoded with subtitles."
+    if not error and scenario.two_pass and len(ffmpeg_spans) != 2:
+        error = f"Expected 2 ffmpeg passes, ran {len(ffmpeg_spans)}."
+    return {
+        "scenario": scenario.name,
+        "entry": "run_basic_conversion" if scenario.entry == "basic" else "convert_media_file",
+        "fixture": fixture_path.name,
+        "status": "error" if error else "ok",
+        "error": error,
+        "burned_subtitle": media.burned_subtitle is not None if scenario.burn else None,
+        "passes": len(ffmpeg_spans),
+        "media_seconds": media.duration_seconds,
+        "wall_seconds": wall_seconds,
+        "ffmpeg_seconds": ffmpeg_seconds,
+        "overhead_seconds": max(0.0, wall_seconds - ffmpeg_seconds),  # Probing, renames, process startup
+        "cpu_seconds": (times_after.children_user - times_before.children_user) + (times_after.children_system - times_before.children_system),
+        "frames": frames,
+        "fps": frames / ffmpeg_seconds if frames and ffmpeg_seconds else 0.0,  # Source frames per second of ffmpeg time, all passes
+        "speed": media.duration_seconds / wall_seconds if wall_seconds else 0.0,
+        "input_bytes": fixture_path.stat().st_size,
+        "output_bytes": output_bytes,
+    }
+
+def _median_result(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combines repeated runs of one scenario; numbers are medians, the rest comes from the last run."""
+    result = dict(runs[-1])
+    for key, value in result.items():
+        if isinstance(value, float):
+            result[key] = statistics.median(run[key] for run in runs)
+    result["runs"] = len(runs)
+    if any(run["status"] != "ok" for run in runs):
+        result["status"] = "error"
+        result["error"] = next(run["error"] for run in runs if run["status"] != "ok")
+    return result
+
+# --- Baselines ---
+
+def compare_results(results: List[Dict[str, Any]], baseline: Dict[str, Any],
+                    threshold: float = metrics.REGRESSION_THRESHOLD) -> List[str]:
+    """Returns a description of every scenario that is slower than the baseline by more than `threshold`."""
+    previous = {entry["scenario"]: entry for entry in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result["scenario"])
+        if not before or result["status"] != "ok" or before.get("status") != "ok":
+            continue
+        if before["wall_seconds"] and result["wall_seconds"] > before["wall_seconds"] * (1 + threshold):
+            regressions.append(f"{result['scenario']}: wall time {before['wall_seconds']:.2f}s -> {result['wall_seconds']:.2f}s")
+        if before["fps"] and result["fps"] < before["fps"] * (1 - threshold):
+            regressions.append(f"{result['scenario']}: fps {before['fps']:.1f} -> {result['fps']:.1f}")
+    return regressions
+
+def _ffmpeg_version() -> str:
+    result = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True)
+    return result.stdout.splitlines()[0] if result.stdout else "unknown"
+
+def print_results(results: List[Dict[str, Any]]):
+    print(f"{'Scenario':<28} {'Status':<6} {'Passes':>6} {'Wall s':>8} {'ffmpeg s':>9} {'Overhead':>9} {'FPS':>8} {'Speed':>7} {'Output MB':>10}")
+    for r in results:
+        print(f"{r['scenario']:<28} {r['status']:<6} {r['passes']:>6} {r['wall_seconds']:>8.2f} {r['ffmpeg_seconds']:>9.2f} "
+              f"{r['overhead_seconds']:>9.2f} {r['fps']:>8.1f} {r['speed']:>6.2f}x {r['output_bytes'] / (1024 ** 2):>10.2f}")
+        if r["error"]:
+            print(f"    {r['error'].strip()[-200:]}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the conversion paths on synthetic clips.")
+    parser.add_argument("--scenario", action="append", choices=[s.name for s in SCENARIOS + IMAGE_SCENARIOS], help="Only run these scenarios (repeatable).")
+    parser.add_argument("--seconds", type=int, default=DEFAULT_SECONDS, help="Length of the generated clips.")
+    parser.add_argument("--size", default=DEFAULT_SIZE, help="Frame size of the generated clips, e.g. 1920x1080.")
+    parser.add_argument("--video-codec", choices=["libx265", "libx264"], default="libx265", help="Software encoder for re-encodes.")
+    parser.add_argument("--preset", default="medium", help="Encoder preset for re-encodes.")
+    parser.add_argument("--crf", type=int, default=23)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario; the median is reported.")
+    parser.add_argument("--image-fixture", type=Path, help="An MKV with image (PGS/VobSub) subtitles. ffmpeg cannot generate these, so they must be supplied.")
+    parser.add_argument("--fixtures", type=Path, default=BENCHMARK_DIR / "fixtures", help="Where generated clips are kept between runs.")
+    parser.add_argument("--regenerate", action="store_true", help="Rebuild the clips even if they exist.")
+    parser.add_argument("--output", type=Path, help="Where to write the JSON results.")
+    parser.add_argument("--compare", type=Path, help="A previous results file; exits with 1 if any scenario regressed.")
+    args = parser.parse_args(argv)
+
+    for tool in ("ffmpeg", "ffprobe"):
+        if not shutil.which(tool):
+            print(f"[ERROR] {tool} was not found on PATH.")
+            return 2
+
+    scenarios = SCENARIOS + (IMAGE_SCENARIOS if args.image_fixture else [])
+    if args.scenario:
+        scenarios = [s for s in scenarios if s.name in args.scenario]
+    output = args.output or BENCHMARK_DIR / f"results-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    # Keep benchmark jobs out of the app's metrics, and trace every run for a closer look in Perfetto
+    metrics.use_store(metrics.MetricsStore(output.with_suffix(".metrics.sqlite3")))
+    tracing.enable(output.with_suffix(".trace.json"))
+
+    settings = ConversionSettings(use_nvenc=False, video_codec=args.video_codec, preset=args.preset, crf=args.crf,
+                                  filename_template="{title}", dry_run=False, delete_source_on_success=False)
+    results = []
+    for scenario in scenarios:
+        if scenario.fixture == IMAGE_FIXTURE:
+            fixture_path = args.image_fixture
+        else:
+            fixture_path = generate_fixture(FIXTURES[scenario.fixture], args.fixtures, args.seconds, args.size, args.regenerate)
+        print(f"[benchmark] Running {scenario.name} on {fixture_path.name}")
+        runs = [run_scenario(scenario, fixture_path, settings) for _ in range(max(1, args.repeat))]
+        results.append(_median_result(runs))
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "ffmpeg": _ffmpeg_version(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "settings": {"seconds": args.seconds, "size": args.size, "video_codec": args.video_codec, "preset": args.preset, "crf": args.crf, "repeat": args.repeat},
+        "results": results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print_results(results)
+    print(f"\nResults written to {output}")
+
+    exit_code = 1 if any(r["status"] != "ok" for r in results) else 0
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare_results(results, json.load(f))
+        for line in regressions:
+            print(f"  << REGRESSION {line}")
+        if regressions:
+            exit_code = 1
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+# copy_engine.py
+# This module moves large files between drives quickly, reporting progress in bytes.
+# Same-filesystem moves are a rename; other moves use copy_file_range/sendfile where the
+# OS supports them and large buffered copies otherwise. Copies can be hashed on the fly and
+# verified at the destination before they are renamed into place, and an interrupted copy
+# resumes from its last checkpoint.
+
+import errno
+import json
+import os
+import shutil
+import hashlib
+import logging
+from pathlib import Path
+from typing import Callable, List, Optional
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+DEFAULT_BUFFER_SIZE = 16 * 1024 * 1024
+KERNEL_COPY_CHUNK = 64 * 1024 * 1024  # Bytes per copy_file_range/sendfile call, so progress stays live
+PARTIAL_SUFFIX = ".partial"
+
+# --- Resumable copies ---
+# The '.partial' file is fsynced every CHECKPOINT_BYTES and the verified length is recorded
+# in a '.partial.json' sidecar. A later copy of the same source continues from there after
+# checking that the last RESUME_OVERLAP bytes before the offset still match the source.
+SIDECAR_SUFFIX = ".partial.json"
+CHECKPOINT_BYTES = 256 * 1024 * 1024
+RESUME_OVERLAP = 1024 * 1024
+
+# --- Verification ---
+# "none": trust the copy. "sample": compare blocks spread over the file with the source.
+# "full": re-read the whole destination and compare its hash with the one taken while copying.
+VERIFY_MODES = ("none", "sample", "full")
+VERIFY_SAMPLE_BLOCKS = 16
+VERIFY_SAMPLE_BLOCK_SIZE = 1024 * 1024
+
+class VerificationError(IOError):
+    """Raised when the destination does not match the source."""
+
+# Errors meaning "this copy method is not available here", as opposed to a real I/O failure.
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF}
+
+BytesCallback = Optional[Callable[[int], None]]
+
+def _report(bytes_callback: BytesCallback, count: int):
+    if bytes_callback and count:
+        bytes_callback(count)
+
+def default_hash_algorithm() -> str:
+    return "xxh3_128" if XXHASH_AVAILABLE else "blake2b"
+
+def new_hasher(algorithm: str):
+    if algorithm == "xxh3_128":
+        if not XXHASH_AVAILABLE:
+            raise ValueError("xxhash is not installed. Run 'pip install xxhash' or use blake2b.")
+        return xxhash.xxh3_128()
+    return hashlib.new(algorithm)
+
+def format_digest(algorithm: str, hasher) -> str:
+    return f"{algorithm}:{hasher.hexdigest()}"
+
+def hash_file(path: Path, algorithm: str, buffer_size: int = DEFAULT_BUFFER_SIZE) -> str:
+    """Hashes a file, asking the OS to bypass cached pages where it can. Returns 'algorithm:hex'."""
+    hasher = new_hasher(algorithm)
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        while read := f.readinto(view):
+            hasher.update(view[:read])
+    return format_digest(algorithm, hasher)
+
+def _sample_offsets(size: int) -> List[int]:
+    if size <= VERIFY_SAMPLE_BLOCKS * VERIFY_SAMPLE_BLOCK_SIZE:
+        return list(range(0, size, VERIFY_SAMPLE_BLOCK_SIZE))
+    last = size - VERIFY_SAMPLE_BLOCK_SIZE
+    return [last * i // (VERIFY_SAMPLE_BLOCKS - 1) for i in range(VERIFY_SAMPLE_BLOCKS)]
+
+def _verify_sampled(source: Path, destination: Path):
+    """Compares blocks at evenly spread offsets, always including the first and last block."""
+    with open(source, "rb") as src, open(destination, "rb") as dst:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(dst.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        for offset in _sample_offsets(os.fstat(src.fileno()).st_size):
+            src.seek(offset); dst.seek(offset)
+            if src.read(VERIFY_SAMPLE_BLOCK_SIZE) != dst.read(VERIFY_SAMPLE_BLOCK_SIZE):
+                raise VerificationError(f"Destination differs from source at offset {offset}.")
+
+def _copy_with_copy_file_range(src_fd: int, dst_fd: int, offset: int, size: int, bytes_callback: BytesCallback) -> int:
+    while offset < size:
+        copied = os.copy_file_range(src_fd, dst_fd, min(KERNEL_COPY_CHUNK, size - offset), offset, offset)
+        if copied == 0:
+            break
+        offset += copied
+        _report(bytes_callback, copied)
+    return offset
+
+def _copy_with_sendfile(src_fd: int, dst_fd: int, offset: int, size: int, bytes_callback: BytesCallback) -> int:
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    while offset < size:
+        copied = os.sendfile(dst_fd, src_fd, offset, min(KERNEL_COPY_CHUNK, size - offset))
+        if copied == 0:
+            break
+        offset += copied
+        _report(bytes_callback, copied)
+    return offset
+
+def _copy_buffered(src_fd: int, dst_fd: int, offset: int, size: int, bytes_callback: BytesCallback, buffer_size: int, hasher=None) -> int:
+    os.lseek(src_fd, offset, os.SEEK_SET)
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    with open(src_fd, "rb", buffering=0, closefd=False) as src:
+        while offset < size:
+            read = src.readinto(view)
+            if not read:
+                break
+            if hasher is not None:
+                hasher.update(view[:read])
+            written = 0
+            while written < read:
+                written += os.write(dst_fd, view[written:read])
+            offset += read
+            _report(bytes_callback, read)
+    return offset
+
+def _copy_contents(src_fd: int, dst_fd: int, size: int, bytes_callback: BytesCallback, buffer_size: int, hasher=None, offset: int = 0):
+    """
+    Copies bytes `offset`..`size` using the fastest method that works, continuing where a failed
+    method stopped. With a `hasher`, data has to pass through memory, so the buffered copy is used.
+    """
+    kernel_methods = []
+    if hasher is None and hasattr(os, "copy_file_range"):
+        kernel_methods.append(_copy_with_copy_file_range)
+    if hasher is None and hasattr(os, "sendfile") and os.name == "posix":
+        kernel_methods.append(_copy_with_sendfile)
+    for method in kernel_methods:
+        try:
+            offset = method(src_fd, dst_fd, offset, size, bytes_callback)
+            if offset >= size:
+                return
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+            logging.debug(f"{method.__name__} unavailable ({e}); trying the next copy method.")
+    offset = _copy_buffered(src_fd, dst_fd, offset, size, bytes_callback, buffer_size, hasher)
+    if offset < size:
+        raise IOError(f"Source ended after {offset} of {size} bytes.")
+
+def _source_identity(source: Path) -> dict:
+    stat = source.stat()
+    return {"source": str(source), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def _write_sidecar(sidecar_path: Path, identity: dict, verified_offset: int):
+    temp_path = sidecar_path.with_name(sidecar_path.name + ".tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({**identity, "verified_offset": verified_offset}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, sidecar_path)
+
+def _resume_offset(source: Path, temp_path: Path, sidecar_path: Path, identity: dict) -> int:
+    """
+    Returns how many bytes of an earlier partial copy can be kept, or 0. The partial copy is
+    only trusted if it belongs to the same, unchanged source and its last block before the
+    recorded offset matches the source.
+    """
+    try:
+        with open(sidecar_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        offset = min(int(state["verified_offset"]), temp_path.stat().st_size)
+    except (OSError, ValueError, KeyError, TypeError):
+        return 0
+    if {k: state.get(k) for k in identity} != identity or offset <= 0:
+        return 0
+    overlap_start = max(0, offset - RESUME_OVERLAP)
+    with open(source, "rb") as src, open(temp_path, "rb") as partial:
+        src.seek(overlap_start); partial.seek(overlap_start)
+        if src.read(offset - overlap_start) != partial.read(offset - overlap_start):
+            logging.warning(f"Partial copy of '{source.name}' does not match the source. Restarting from the beginning.")
+            return 0
+    return offset
+
+def _hash_prefix(source: Path, hasher, length: int, buffer_size: int):
+    """Feeds the already-copied prefix into `hasher`, reading it from the (usually local) source."""
+    with open(source, "rb", buffering=0) as f:
+        view = memoryview(bytearray(buffer_size))
+        remaining = length
+        while remaining > 0 and (read := f.readinto(view[:min(buffer_size, remaining)])):
+            hasher.update(view[:read])
+            remaining -= read
+
+def copy_file(source: Path, destination: Path, bytes_callback: BytesCallback = None, buffer_size: int = DEFAULT_BUFFER_SIZE,
+              hash_algorithm: Optional[str] = None, verify: str = "none") -> Optional[str]:
+    """
+    Copies `source` to `destination` through a temporary '.partial' file in the destination
+    folder, which is renamed into place only after the data is flushed and verified.
+    Timestamps and permission bits are preserved. Returns the 'algorithm:hex' digest of the
+    data when `hash_algorithm` is given (required for verify="full"), otherwise None.
+
+    If the copy is interrupted, the partial file and its sidecar are kept and the next copy of
+    the same source resumes from the last checkpoint. Bytes kept from the earlier attempt are
+    reported to `bytes_callback` up front.
+    """
+    if verify not in VERIFY_MODES:
+        raise ValueError(f"Unknown verify mode '{verify}'. Expected one of {VERIFY_MODES}.")
+    if verify == "full" and not hash_algorithm:
+        hash_algorithm = default_hash_algorithm()
+    hasher = new_hasher(hash_algorithm) if hash_algorithm else None
+    temp_path = destination.with_name(destination.name + PARTIAL_SUFFIX)
+    sidecar_path = destination.with_name(destination.name + SIDECAR_SUFFIX)
+    identity = _source_identity(source)
+    size = identity["size"]
+
+    offset = _resume_offset(source, temp_path, sidecar_path, identity) if temp_path.exists() else 0
+    if offset:
+        logging.info(f"Resuming copy of '{source.name}' at {offset / (1024**3):.2f} GB.")
+        if hasher is not None:
+            _hash_prefix(source, hasher, offset, buffer_size)
+        _report(bytes_callback, offset)
+    _write_sidecar(sidecar_path, identity, offset)
+
+    try:
+        with open(source, "rb") as src, open(temp_path, "r+b" if offset else "wb") as dst:
+            dst.truncate(offset)
+            checkpoint = {"copied": offset, "saved": offset}
+
+            def on_bytes(count: int):
+                checkpoint["copied"] += count
+                if checkpoint["copied"] - checkpoint["saved"] >= CHECKPOINT_BYTES:
+                    os.fsync(dst.fileno())
+                    _write_sidecar(sidecar_path, identity, checkpoint["copied"])
+                    checkpoint["saved"] = checkpoint["copied"]
+                _report(bytes_callback, count)
+
+            _copy_contents(src.fileno(), dst.fileno(), size, on_bytes, buffer_size, hasher, offset)
+            dst.flush()
+            os.fsync(dst.fileno())
+        digest = format_digest(hash_algorithm, hasher) if hasher else None
+        if verify == "sample":
+            _verify_sampled(source, temp_path)
+        elif verify == "full" and hash_file(temp_path, hash_algorithm, buffer_size) != digest:
+            raise VerificationError(f"Checksum mismatch after copying '{source.name}'.")
+        shutil.copystat(source, temp_path)
+        os.replace(temp_path, destination)
+        sidecar_path.unlink(missing_ok=True)
+        return digest
+    except VerificationError:
+        # A bad copy must not be resumed.
+        temp_path.unlink(missing_ok=True)
+        sidecar_path.unlink(missing_ok=True)
+        raise
+
+def _same_filesystem(source: Path, destination: Path) -> bool:
+    try:
+        return os.stat(source).st_dev == os.stat(destination.parent).st_dev
+    except OSError:
+        return False
+
+def move_file(source: Path, destination: Path, bytes_callback: BytesCallback = None, buffer_size: int = DEFAULT_BUFFER_SIZE,
+              hash_algorithm: Optional[str] = None, verify: str = "none") -> Optional[str]:
+    """
+    Moves a file, renaming when possible and copying then deleting the source otherwise.
+    Returns the digest computed while copying; a rename moves no data and returns None.
+    """
+    if _same_filesystem(source, destination):
+        try:
+            size = source.stat().st_size
+            os.replace(source, destination)
+            _report(bytes_callback, size)
+            return None
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+    digest = copy_file(source, destination, bytes_callback, buffer_size, hash_algorithm, verify)
+    source.unlink()
+    return digest
@@ -5,30 +5,40 @@
 import sys
 import os
 import json
-import re
 import inspect
+import threading
+import time
+import functools
+import traceback
+from collections import OrderedDict, deque
 from pathlib import Path
 from typing import List, Callable, Tuple, Dict, Any, Union, Optional
 
-from PyQt6.QtCore import QObject, QThread, pyqtSignal, Qt, QPoint
-from PyQt6.QtGui import QIcon, QIntValidator
+from PyQt6.QtCore import QObject, pyqtSignal, Qt, QPoint, QStringListModel, QAbstractListModel, QModelIndex, QRect, QSize, QTimer, QRunnable, QThreadPool
+from PyQt6.QtGui import QIcon, QIntValidator, QColor, QPen, QPainter
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QPushButton, QVBoxLayout, QListWidget, QListWidgetItem,
     QLabel, QFileDialog, QFrame, QHBoxLayout, QComboBox, QCheckBox, QGroupBox,
     QMessageBox, QDialog, QDialogButtonBox, QLineEdit, QStackedWidget,
     QStatusBar, QSpinBox, QTextEdit, QMenu, QProgressBar, QTableWidget,
-    QTableWidgetItem, QAbstractItemView, QHeaderView
+    QTableWidgetItem, QAbstractItemView, QHeaderView, QCompleter, QTreeView,
+    QStyledItemDelegate, QStyle, QStyleOptionProgressBar
 )
 
 # --- Project Modules ---
-from models import MediaFile, SubtitleTrack, ConversionSettings
+from models import MediaFile, SubtitleTrack, ConversionSettings, FINISHED_STATUSES
 import subtitlesmkv
 import convert
 import file_handler
 import basic_convert
 import mkv_modifier
+import ffmpeg_progress
+import tracing
+from path_index import PathMappingIndex
 try:
     import tmdb_client
+    import metadata_matcher
+    import title_index
     TMDB_ENABLED = True
 except ImportError:
     TMDB_ENABLED = False
@@ -59,39 +69,256 @@ def ensure_writable_config():
                 json.dump({}, f)
     return config_path
 
-def _clean_search_query(filename: str) -> str:
-    clean_title = Path(filename).stem
-    delimiters = [
-        r'(19|20)\d{2}', '4k', '2160p', '1080p', '720p', '480p',
-        'bluray', 'web-dl', 'webdl', 'webrip', 'hdrip', 'dvdrip', 'brrip', 'hdtv',
-        'extended', 'uncut', 'remastered', 'theatrical',
-    ]
-    split_pattern = r'\b(' + '|'.join(delimiters) + r')\b'
-    clean_title = re.split(split_pattern, clean_title, maxsplit=1, flags=re.IGNORECASE)[0]
-    clean_title = re.sub(r'[\._-]', ' ', clean_title)
-    clean_title = ' '.join(clean_title.split()).strip()
-    return clean_title
-
-
 # --- All Helper and Custom Widget Classes Defined First ---
 
-class Worker(QObject):
-    finished = pyqtSignal(object); error = pyqtSignal(tuple); progress = pyqtSignal(int, str)
+# Background tasks run on one shared executor with a capped thread pool per task class.
+TASK_CLASS_LIMITS = {
+    "probe": 2,      # mkvmerge identification and rescans
+    "network": 4,    # TMDb and title index searches
+    "extract": 2,    # mkvextract/mkvpropedit work on the source files
+    "job": 1,        # Long-running dashboard jobs (scan, convert, transfer)
+}
+RESULT_CACHE_SIZE = 256
+_CALLBACK_PARAMS = ("progress_callback", "item_status_emitter", "item_progress_emitter", "item_stats_emitter", "stop_check")
+
+@functools.lru_cache(maxsize=None)
+def _callback_params(fn: Callable) -> frozenset:
+    """The progress/cancellation callbacks `fn` accepts, looked up once per function."""
+    return frozenset(_CALLBACK_PARAMS).intersection(inspect.signature(fn).parameters)
+
+class TaskHandle(QObject):
+    """
+    Handle for a submitted task. `finished` or `error` is delivered on the UI thread; a
+    cancelled task emits `cancelled` instead, and functions that accept a `stop_check`
+    are asked to stop early.
+    """
+    finished = pyqtSignal(object); error = pyqtSignal(tuple); cancelled = pyqtSignal()
+    progress = pyqtSignal(int, str)
     item_status_changed = pyqtSignal(str, str)
     item_progress = pyqtSignal(str, int)
-    
-    def __init__(self, fn: Callable, *args, **kwargs):
-        super().__init__(); self.fn, self.args, self.kwargs = fn, args, kwargs
+    item_stats = pyqtSignal(str, object)
+    _completed = pyqtSignal(bool, object)  # Emitted from the pool thread
+
+    def __init__(self, task_class: str, cache_key: Any = None):
+        super().__init__()
+        self.task_class, self.cache_key = task_class, cache_key
+        self.done = False
+        self._cancel_event = threading.Event()
+        self._completed.connect(self._deliver)
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def _deliver(self, ok: bool, payload: Any):
+        self.done = True
+        if self.is_cancelled():
+            self.cancelled.emit()
+        elif ok:
+            self.finished.emit(payload)
+        else:
+            self.error.emit(payload)
+
+class TaskRunnable(QRunnable):
+    def __init__(self, handle: TaskHandle, fn: Callable, args: tuple, kwargs: dict,
+                 aggregator: Optional['ProgressAggregator'] = None):
+        super().__init__()
+        self.handle, self.fn, self.args, self.kwargs, self.aggregator = handle, fn, args, kwargs, aggregator
+
     def run(self):
+        handle, agg = self.handle, self.aggregator
+        if handle.is_cancelled():
+            handle._completed.emit(False, None)  # Cancelled before it started
+            return
         try:
-            if 'progress_callback' in inspect.signature(self.fn).parameters:
-                self.kwargs['progress_callback'] = lambda p, s: self.progress.emit(p, s)
-            if 'item_status_emitter' in inspect.signature(self.fn).parameters:
-                self.kwargs['item_status_emitter'] = lambda p, s: self.item_status_changed.emit(p, s)
-            if 'item_progress_emitter' in inspect.signature(self.fn).parameters:
-                self.kwargs['item_progress_emitter'] = lambda p, i: self.item_progress.emit(p, i)
-            result = self.fn(*self.args, **self.kwargs); self.finished.emit(result)
-        except Exception as e: import traceback; self.error.emit((type(e), e, traceback.format_exc()))
+            callbacks = {
+                'progress_callback': agg.report_overall if agg else handle.progress.emit,
+                'item_status_emitter': agg.report_status if agg else handle.item_status_changed.emit,
+                'item_progress_emitter': agg.report_progress if agg else handle.item_progress.emit,
+                'item_stats_emitter': agg.report_stats if agg else handle.item_stats.emit,
+                'stop_check': handle.is_cancelled,
+            }
+            kwargs = dict(self.kwargs)
+            for name in _callback_params(self.fn):
+                kwargs.setdefault(name, callbacks[name])
+            handle._completed.emit(True, self.fn(*self.args, **kwargs))
+        except Exception as e:
+            handle._completed.emit(False, (type(e), e, traceback.format_exc()))
+
+class TaskExecutor(QObject):
+    """Shared QThreadPool-backed executor. Results of tasks submitted with a `cache_key` are reused."""
+    def __init__(self, limits: Dict[str, int] = TASK_CLASS_LIMITS, cache_size: int = RESULT_CACHE_SIZE, parent=None):
+        super().__init__(parent)
+        self._pools: Dict[str, QThreadPool] = {}
+        for task_class, limit in limits.items():
+            pool = QThreadPool(self)
+            pool.setMaxThreadCount(limit)
+            self._pools[task_class] = pool
+        self._cache: "OrderedDict[Any, Any]" = OrderedDict()
+        self._cache_size = cache_size
+        self._active: set = set()  # Keeps handles alive until their result is delivered
+
+    def submit(self, fn: Callable, *args, task_class: str = "probe", cache_key: Any = None,
+               aggregator: Optional['ProgressAggregator'] = None, **kwargs) -> TaskHandle:
+        handle = TaskHandle(task_class, cache_key)
+        self._active.add(handle)
+        handle._completed.connect(lambda ok, payload: self._on_completed(handle, ok, payload))
+        if cache_key is not None and cache_key in self._cache:
+            self._cache.move_to_end(cache_key)
+            result = self._cache[cache_key]
+            QTimer.singleShot(0, lambda: handle._completed.emit(True, result))  # Let the caller connect first
+        else:
+            self._pools[task_class].start(TaskRunnable(handle, fn, args, kwargs, aggregator))
+        return handle
+
+    def _on_completed(self, handle: TaskHandle, ok: bool, payload: Any):
+        self._active.discard(handle)
+        if ok and handle.cache_key is not None and not handle.is_cancelled():
+            self._cache[handle.cache_key] = payload
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def shutdown(self, timeout_ms: int = 5000):
+        """Cancels everything and waits briefly for running tasks to notice."""
+        for handle in list(self._active):
+            handle.cancel()
+        for pool in self._pools.values():
+            pool.waitForDone(timeout_ms)
+
+_task_executor: Optional[TaskExecutor] = None
+
+def get_task_executor() -> TaskExecutor:
+    global _task_executor
+    if _task_executor is None:
+        _task_executor = TaskExecutor()
+    return _task_executor
+
+class ProgressAggregator(QObject):
+    """
+    Sits between a worker and the UI. Worker threads report as often as they like; only the
+    latest state per file is kept, and changes are flushed to the UI thread in one batch per
+    timer tick. Overall progress and the throughput figures are computed from the same
+    per-file state.
+    """
+    items_updated = pyqtSignal(dict)        # {source path: (status or None, percent or None)}
+    overall_updated = pyqtSignal(int, str)
+    throughput_updated = pyqtSignal(dict, dict)  # {source path: ProgressStats} of running jobs, queue summary
+    FLUSH_INTERVAL_MS = 100                 # 10 Hz
+    WRITE_RATE_WINDOW = 3.0                 # Seconds of samples behind the disk write rate
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._items: Dict[str, List] = {}   # Source path -> [status, percent]
+        self._dirty: Dict[str, List] = {}   # Changes since the last flush, same shape
+        self._overall: Tuple[int, str] = (0, "")
+        self._overall_dirty = False
+        self._stats: Dict[str, ffmpeg_progress.ProgressStats] = {}  # Latest ffmpeg stats per running file
+        self._stats_dirty = False
+        self._durations: Dict[str, float] = {}  # Media length of every queued file, for the queue ETA
+        self._finished_bytes = 0
+        self._write_samples: deque = deque()     # (monotonic time, total bytes written)
+        self._last_speed = 0.0
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.FLUSH_INTERVAL_MS)
+        self._timer.timeout.connect(self.flush)
+
+    def start(self):
+        with self._lock:
+            self._items.clear(); self._dirty.clear()
+            self._overall, self._overall_dirty = (0, ""), False
+            self._stats.clear(); self._durations.clear(); self._write_samples.clear()
+            self._finished_bytes, self._last_speed, self._stats_dirty = 0, 0.0, False
+        self._timer.start()
+
+    def set_durations(self, durations: Dict[str, float]):
+        """Media lengths of the files in the queue, so the queue ETA covers files not started yet."""
+        with self._lock:
+            self._durations = dict(durations)
+
+    def stop(self):
+        self._timer.stop()
+        self.flush()
+
+    # --- Called from worker threads ---
+    def report_status(self, file_path_str: str, status: str):
+        with self._lock:
+            self._items.setdefault(file_path_str, [None, 0])[0] = status
+            self._dirty.setdefault(file_path_str, [None, None])[0] = status
+            if status in FINISHED_STATUSES and file_path_str in self._stats:
+                self._finished_bytes += self._stats.pop(file_path_str).bytes_written
+                self._stats_dirty = True
+
+    def report_progress(self, file_path_str: str, percent: int):
+        with self._lock:
+            self._items.setdefault(file_path_str, [None, 0])[1] = percent
+            self._dirty.setdefault(file_path_str, [None, None])[1] = percent
+
+    def report_overall(self, percent: int, message: str):
+        with self._lock:
+            self._overall, self._overall_dirty = (percent, message), True
+
+    def report_stats(self, file_path_str: str, stats: 'ffmpeg_progress.ProgressStats'):
+        with self._lock:
+            previous = self._stats.get(file_path_str)
+            if previous and stats.bytes_written < previous.bytes_written:
+                self._finished_bytes += previous.bytes_written  # A new pass started writing from zero
+            self._stats[file_path_str] = stats
+            self._stats_dirty = True
+
+    # --- Runs on the UI thread ---
+    def _overall_percent(self) -> int:
+        if not self._items:
+            return self._overall[0]
+        done = sum(100 if status in FINISHED_STATUSES else percent for status, percent in self._items.values())
+        return int(done / len(self._items))
+
+    def _queue_summary(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        written = self._finished_bytes + sum(stats.bytes_written for stats in self._stats.values())
+        self._write_samples.append((now, written))
+        while now - self._write_samples[0][0] > self.WRITE_RATE_WINDOW:
+            self._write_samples.popleft()
+        first_time, first_written = self._write_samples[0]
+        write_rate = (written - first_written) / (now - first_time) if now > first_time else 0.0
+
+        speed = sum(stats.speed for stats in self._stats.values())
+        if speed > 0:
+            self._last_speed = speed
+        remaining_seconds, remaining_files = 0.0, 0
+        for path, duration in self._durations.items():
+            status, percent = self._items.get(path, (None, 0))
+            if status not in FINISHED_STATUSES:
+                remaining_files += 1
+                remaining_seconds += duration * (1 - percent / 100)
+        return {
+            "remaining_files": remaining_files,
+            "queue_eta": remaining_seconds / self._last_speed if self._last_speed > 0 and remaining_seconds else None,
+            "fps": sum(stats.fps for stats in self._stats.values()),
+            "write_rate": max(0.0, write_rate),
+            "bytes_written": written,
+        }
+
+    @tracing.traced("ui progress flush", "ui")
+    def flush(self):
+        with self._lock:
+            updates = {path: tuple(change) for path, change in self._dirty.items()}
+            self._dirty.clear()
+            send_overall = self._overall_dirty or bool(updates)
+            overall = (self._overall_percent(), self._overall[1])
+            self._overall_dirty = False
+            throughput = None
+            if self._stats_dirty or (updates and self._durations):
+                throughput = (dict(self._stats), self._queue_summary())
+                self._stats_dirty = False
+        if updates:
+            self.items_updated.emit(updates)
+        if send_overall:
+            self.overall_updated.emit(*overall)
+        if throughput:
+            self.throughput_updated.emit(*throughput)
 
 class CustomTitleBar(QWidget):
     def __init__(self, parent):
@@ -168,37 +395,39 @@ class MetadataSearchDialog(QDialog):
         self.layout.addWidget(self.results_list)
 
         self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        self.online_button = self.button_box.addButton("Search Online", QDialogButtonBox.ButtonRole.ActionRole)
+        self.online_button.clicked.connect(lambda: self.search(self.query, refresh=True))
         self.button_box.accepted.connect(self.accept)
         self.button_box.rejected.connect(self.reject)
         self.layout.addWidget(self.button_box)
         
-        self.thread = QThread()
-        self.worker = None
+        self.task: Optional[TaskHandle] = None
+        self.query = query
         
         self.search(query)
 
-    def search(self, query):
+    def search(self, query, refresh: bool = False):
         self.progress_bar.setVisible(True)
         self.button_box.button(QDialogButtonBox.StandardButton.Ok).setEnabled(False)
         self.button_box.button(QDialogButtonBox.StandardButton.Cancel).setEnabled(False)
+        self.online_button.setEnabled(False)
 
-        year_match = re.search(r'\b(19|20)\d{2}\b', query)
-        year = year_match.group(0) if year_match else None
-        
-        clean_query = _clean_search_query(query)
+        year = metadata_matcher.extract_year(query)
+        clean_query = metadata_matcher.clean_search_query(query)
         
         self.search_label.setText(f"Searching for: <b>{clean_query}</b> (Year: {year or 'Any'})")
 
-        self.worker = Worker(tmdb_client.search_movie, clean_query, year)
-        self.worker.moveToThread(self.thread)
-        self.thread.started.connect(self.worker.run)
-        self.worker.finished.connect(self.on_search_finished)
-        self.thread.start()
+        # The local title index answers first; TMDb is only asked when it has no confident match.
+        self.cancel_search()
+        self.task = get_task_executor().submit(title_index.search_with_fallback, clean_query, year, refresh, task_class="network")
+        self.task.finished.connect(self.on_search_finished)
+        self.task.error.connect(lambda error: self.on_search_finished([]))
 
     def on_search_finished(self, results: List[Dict]):
         self.progress_bar.setVisible(False)
         self.button_box.button(QDialogButtonBox.StandardButton.Ok).setEnabled(True)
         self.button_box.button(QDialogButtonBox.StandardButton.Cancel).setEnabled(True)
+        self.online_button.setEnabled(True)
 
         self.results_list.clear()
         if not results:
@@ -213,8 +442,6 @@ class MetadataSearchDialog(QDialog):
             item = QListWidgetItem(display_text)
             item.setData(Qt.ItemDataRole.UserRole, movie)
             self.results_list.addItem(item)
-        
-        self.stop_thread()
 
     def get_selected_movie(self) -> Optional[Dict]:
         selected_item = self.results_list.currentItem()
@@ -222,26 +449,13 @@ class MetadataSearchDialog(QDialog):
             return selected_item.data(Qt.ItemDataRole.UserRole)
         return None
 
-    def accept(self):
-        self.stop_thread()
-        super().accept()
-
-    def reject(self):
-        self.stop_thread()
-        super().reject()
+    def done(self, result: int):
+        self.cancel_search()
+        super().done(result)
 
-    def closeEvent(self, event):
-        self.stop_thread()
-        event.accept()
-
-    def stop_thread(self):
-        if self.thread and self.thread.isRunning():
-            try:
-                self.worker.finished.disconnect()
-            except TypeError:
-                pass
-            self.thread.quit()
-            self.thread.wait()
+    def cancel_search(self):
+        if self.task:
+            self.task.cancel()
 
 class RenameDialog(QDialog):
     def __init__(self, media_file: MediaFile, filename_template: str, parent=None):
@@ -288,9 +502,34 @@ class RenameDialog(QDialog):
         self.title_edit.textChanged.connect(self.on_metadata_changed)
         self.year_edit.textChanged.connect(self.on_metadata_changed)
         self.sync_checkbox.stateChanged.connect(self.on_metadata_changed)
+
+        # Title suggestions come from the offline title index, so typing never waits on the network.
+        self._suggestions: Dict[str, Dict] = {}
+        if TMDB_ENABLED:
+            self.title_completer = QCompleter(self)
+            self.title_completer.setModel(QStringListModel(self.title_completer))
+            self.title_completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+            self.title_completer.activated.connect(self.on_suggestion_chosen)
+            self.title_edit.setCompleter(self.title_completer)
+            self.title_edit.textEdited.connect(self.update_title_suggestions)
         
         self.on_metadata_changed()
 
+    def update_title_suggestions(self, text: str):
+        index = title_index.loaded_index()
+        if index is None or len(text.strip()) < 3:
+            return
+        self._suggestions = {}
+        for _score, movie in index.search(text, self.year_edit.text() or None, limit=10):
+            label = f"{movie.get('title', 'N/A')} ({metadata_matcher.release_year(movie) or 'N/A'})"
+            self._suggestions.setdefault(label, movie)
+        self.title_completer.model().setStringList(list(self._suggestions))
+
+    def on_suggestion_chosen(self, label: str):
+        movie = self._suggestions.get(label)
+        if movie:
+            self.set_fetched_metadata(movie)
+
     def on_metadata_changed(self):
         if self.sync_checkbox.isChecked():
             temp_mf = MediaFile(source_path=self.media_file.source_path)
@@ -443,6 +682,9 @@ class SettingsWindow(QDialog):
         self.api_key_edit = QLineEdit()
         self.api_key_edit.setEchoMode(QLineEdit.EchoMode.Password)
         api_key_layout.addWidget(self.api_key_edit)
+        self.import_titles_btn = QPushButton("Import Title Dataset...", clicked=self.import_title_dataset)
+        self.import_titles_btn.setEnabled(TMDB_ENABLED)
+        api_key_layout.addWidget(self.import_titles_btn)
         main_layout.addLayout(api_key_layout)
         
         main_group.setLayout(main_layout)
@@ -456,6 +698,8 @@ class SettingsWindow(QDialog):
         conv_layout.addWidget(self.two_pass_checkbox)
         self.delete_source_checkbox = QCheckBox("Delete Original File After Conversion")
         conv_layout.addWidget(self.delete_source_checkbox)
+        self.trace_checkbox = QCheckBox("Record a performance trace (written on exit, viewable in Perfetto)")
+        conv_layout.addWidget(self.trace_checkbox)
         quality_layout = QHBoxLayout()
         quality_label = QLabel("Target Quality Level (lower = better quality):")
         quality_layout.addWidget(quality_label)
@@ -466,6 +710,33 @@ class SettingsWindow(QDialog):
         conv_group.setLayout(conv_layout)
         self.layout.addWidget(conv_group)
 
+        transfer_group = QGroupBox("Transfer Settings")
+        transfer_layout = QHBoxLayout()
+        transfer_layout.addWidget(QLabel("Parallel transfers per destination:"))
+        self.dest_concurrency_spinbox = QSpinBox()
+        self.dest_concurrency_spinbox.setRange(1, 16)
+        transfer_layout.addWidget(self.dest_concurrency_spinbox)
+        transfer_layout.addSpacing(20)
+        transfer_layout.addWidget(QLabel("Parallel transfers per source drive:"))
+        self.source_concurrency_spinbox = QSpinBox()
+        self.source_concurrency_spinbox.setRange(1, 16)
+        transfer_layout.addWidget(self.source_concurrency_spinbox)
+        transfer_layout.addSpacing(20)
+        transfer_layout.addWidget(QLabel("Verify copies:"))
+        self.verify_combo = QComboBox()
+        self.verify_combo.addItem("Off", "none")
+        self.verify_combo.addItem("Sampled read-back", "sample")
+        self.verify_combo.addItem("Full checksum", "full")
+        transfer_layout.addWidget(self.verify_combo)
+        transfer_layout.addSpacing(20)
+        self.checksum_checkbox = QCheckBox("Record checksums")
+        self.checksum_checkbox.setToolTip("Hash files while copying so deliveries can be re-verified later.\n"
+                                          "Off lets the OS copy files directly, which is faster; copies are then checked by the verify mode only.")
+        transfer_layout.addWidget(self.checksum_checkbox)
+        transfer_layout.addStretch()
+        transfer_group.setLayout(transfer_layout)
+        self.layout.addWidget(transfer_group)
+
         path_group = QGroupBox("Path Mappings (Scan From -> Transfer To)")
         path_layout = QVBoxLayout()
         self.path_table = QTableWidget()
@@ -500,11 +771,40 @@ class SettingsWindow(QDialog):
         
         self.load_settings()
 
+    def import_title_dataset(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Select Title Dataset", "", "Datasets (*.json *.jsonl *.csv);;All Files (*)")
+        if not path:
+            return
+        # Large datasets take a while and the index may still be loading, so this runs off the UI thread.
+        self.import_titles_btn.setEnabled(False)
+        self.import_titles_btn.setText("Importing...")
+        self.import_task = get_task_executor().submit(title_index.import_dataset, Path(path), task_class="extract")
+        self.import_task.progress.connect(lambda percent, message: self.import_titles_btn.setText(f"Importing... {percent}%"))
+        self.import_task.finished.connect(self.on_title_import_finished)
+        self.import_task.error.connect(lambda error: self.on_title_import_failed(path, error[1]))
+
+    def _reset_import_button(self):
+        self.import_titles_btn.setText("Import Title Dataset...")
+        self.import_titles_btn.setEnabled(TMDB_ENABLED)
+
+    def on_title_import_finished(self, count: int):
+        self._reset_import_button()
+        QMessageBox.information(self, "Import Complete", f"Added or updated {count} title(s) in the offline index.")
+
+    def on_title_import_failed(self, path: str, error: Exception):
+        self._reset_import_button()
+        QMessageBox.warning(self, "Import Failed", f"Could not import '{path}':\n{error}")
+
     def load_settings(self):
         self.nvenc_checkbox.setChecked(self.config_handler.get_setting("use_nvenc", True))
         self.two_pass_checkbox.setChecked(self.config_handler.get_setting("use_two_pass", True))
         self.delete_source_checkbox.setChecked(self.config_handler.get_setting("delete_source_on_success", False))
+        self.trace_checkbox.setChecked(self.config_handler.get_setting("trace_enabled", False) or tracing.enabled())
         self.quality_spinbox.setValue(self.config_handler.get_setting("crf_value", 23))
+        self.dest_concurrency_spinbox.setValue(self.config_handler.get_setting("transfer_concurrency_per_destination", file_handler.DEFAULT_CONCURRENCY_PER_DESTINATION))
+        self.source_concurrency_spinbox.setValue(self.config_handler.get_setting("transfer_concurrency_per_source_device", file_handler.DEFAULT_CONCURRENCY_PER_SOURCE_DEVICE))
+        self.verify_combo.setCurrentIndex(max(0, self.verify_combo.findData(self.config_handler.get_setting("transfer_verify", file_handler.DEFAULT_VERIFY_MODE))))
+        self.checksum_checkbox.setChecked(self.config_handler.get_setting("transfer_record_checksums", file_handler.DEFAULT_RECORD_CHECKSUMS))
         
         self.template_edit.setText(self.config_handler.get_setting("filename_template", "{title} ({year}) - {width}p"))
         scan_types = self.config_handler.get_setting("scannable_file_types", [".mkv", ".mp4"])
@@ -553,7 +853,14 @@ class SettingsWindow(QDialog):
         self.config_handler.set_setting("use_nvenc", self.nvenc_checkbox.isChecked())
         self.config_handler.set_setting("use_two_pass", self.two_pass_checkbox.isChecked())
         self.config_handler.set_setting("delete_source_on_success", self.delete_source_checkbox.isChecked())
+        self.config_handler.set_setting("trace_enabled", self.trace_checkbox.isChecked())
+        if self.trace_checkbox.isChecked():
+            tracing.enable()
         self.config_handler.set_setting("crf_value", self.quality_spinbox.value())
+        self.config_handler.set_setting("transfer_concurrency_per_destination", self.dest_concurrency_spinbox.value())
+        self.config_handler.set_setting("transfer_concurrency_per_source_device", self.source_concurrency_spinbox.value())
+        self.config_handler.set_setting("transfer_verify", self.verify_combo.currentData())
+        self.config_handler.set_setting("transfer_record_checksums", self.checksum_checkbox.isChecked())
         
         self.config_handler.set_setting("filename_template", self.template_edit.text())
         scan_types = [t.strip() for t in self.scan_types_edit.text().split(",") if t.strip()]
@@ -583,8 +890,7 @@ class SubtitlePreviewDialog(QDialog):
         self.setWindowTitle("Subtitle Preview")
         self.setMinimumSize(500, 400)
         self.layout = QVBoxLayout(self)
-        self.thread = None
-        self.worker = None
+        self.task: Optional[TaskHandle] = None
 
         self.track_combo = QComboBox()
         self.layout.addWidget(QLabel("Select a subtitle track to preview:"))
@@ -622,54 +928,81 @@ class SubtitlePreviewDialog(QDialog):
         self.preview_text.setText("Loading preview...")
         self.lang_label.setText("Detecting language...")
         
-        self.thread = QThread()
-        self.worker = Worker(subtitlesmkv.get_subtitle_details, self.media_file.source_path, track.index)
-        self.worker.moveToThread(self.thread)
-        self.thread.started.connect(self.worker.run)
-        self.worker.finished.connect(self.on_preview_finished)
-        self.thread.start()
+        # Switching tracks quickly cancels the stale extraction instead of queueing behind it.
+        if self.task:
+            self.task.cancel()
+        source_path = self.media_file.source_path
+        try:
+            stat = source_path.stat()
+            cache_key = ("subtitle_details", str(source_path), track.index, stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            cache_key = None
+        self.task = get_task_executor().submit(subtitlesmkv.get_subtitle_details, source_path, track.index,
+                                               task_class="extract", cache_key=cache_key)
+        self.task.finished.connect(self.on_preview_finished)
+        self.task.error.connect(self.on_preview_error)
 
     def on_preview_finished(self, result: Tuple[str, str]):
         snippet, lang = result
         self.preview_text.setText(snippet)
         self.lang_label.setText(f"Detected Language: {lang}")
-        if self.thread:
-            self.thread.quit()
-            self.thread.wait()
+
+    def on_preview_error(self, error: Tuple):
+        self.preview_text.setText(f"Could not load a preview:\n{error[1]}")
+        self.lang_label.setText("Detected Language: N/A")
+
+    def done(self, result: int):
+        if self.task:
+            self.task.cancel()
+        super().done(result)
 
 class SubtitleEditorDialog(QDialog):
-    """A dialog to remove subtitle tracks from an MKV file."""
-    track_modified = pyqtSignal(QWidget)
+    """A dialog to drop subtitle tracks from the conversion or remove them from the MKV file."""
+    track_modified = pyqtSignal(object)
+    plan_changed = pyqtSignal()
 
     def __init__(self, media_file: MediaFile, parent=None):
         super().__init__(parent)
         self.media_file = media_file
-        self.parent_widget = parent
         self.setWindowTitle("Edit/Remove Subtitle Tracks")
         self.setMinimumWidth(600)
         self.layout = QVBoxLayout(self)
-        self.thread = None
-        self.worker = None
+        self.task: Optional[TaskHandle] = None
 
-        self.layout.addWidget(QLabel("Select tracks to permanently remove:"))
+        self.layout.addWidget(QLabel("Select tracks to remove:"))
         self.track_list = QListWidget()
         self.track_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         self.layout.addWidget(self.track_list)
         self.populate_list()
+
+        self.rewrite_checkbox = QCheckBox("Rewrite the source MKV now (keep an MKV without these tracks)")
+        self.rewrite_checkbox.setToolTip("When unchecked, the tracks are only left out of the converted file and the source is read once.")
+        self.layout.addWidget(self.rewrite_checkbox)
         
+        buttons_layout = QHBoxLayout()
+        self.toggle_forced_button = QPushButton("Toggle Forced Flag")
+        self.restore_button = QPushButton("Restore Selected Tracks")
         self.remove_button = QPushButton("Remove Selected Tracks")
-        self.layout.addWidget(self.remove_button)
+        buttons_layout.addWidget(self.toggle_forced_button)
+        buttons_layout.addWidget(self.restore_button)
+        buttons_layout.addWidget(self.remove_button)
+        self.layout.addLayout(buttons_layout)
 
         self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
         self.button_box.rejected.connect(self.reject)
         self.layout.addWidget(self.button_box)
         
         self.remove_button.clicked.connect(self.remove_selected_tracks)
+        self.toggle_forced_button.clicked.connect(self.toggle_forced_flags)
+        self.restore_button.clicked.connect(self.restore_selected_tracks)
         
     def populate_list(self):
         self.track_list.clear()
         for track in self.media_file.subtitle_tracks:
-            item = QListWidgetItem(track.get_display_name())
+            display_name = track.get_display_name()
+            if track.index in self.media_file.pending_subtitle_removals:
+                display_name += " (removed on conversion)"
+            item = QListWidgetItem(display_name)
             item.setData(Qt.ItemDataRole.UserRole, track.index)
             self.track_list.addItem(item)
             
@@ -680,6 +1013,12 @@ class SubtitleEditorDialog(QDialog):
             return
 
         track_ids_to_remove = [item.data(Qt.ItemDataRole.UserRole) for item in selected_items]
+
+        if not self.rewrite_checkbox.isChecked():
+            self.media_file.mark_subtitles_for_removal(track_ids_to_remove)
+            self.populate_list()
+            self.plan_changed.emit()
+            return
         
         reply = QMessageBox.question(self, "Confirm Removal", 
                                      f"Are you sure you want to permanently remove {len(track_ids_to_remove)} subtitle track(s)?\n\nThis will rewrite the source MKV file and cannot be undone.",
@@ -689,39 +1028,403 @@ class SubtitleEditorDialog(QDialog):
         if reply == QMessageBox.StandardButton.Yes:
             self.remove_button.setEnabled(False)
             self.remove_button.setText("Removing...")
-            self.thread = QThread()
-            self.worker = Worker(mkv_modifier.remove_subtitle_tracks, self.media_file.source_path, track_ids_to_remove)
-            self.worker.moveToThread(self.thread)
-            self.thread.started.connect(self.worker.run)
-            self.worker.finished.connect(self.on_removal_finished)
-            self.thread.start()
+            self.task = get_task_executor().submit(mkv_modifier.remove_subtitle_tracks, self.media_file.source_path,
+                                                   track_ids_to_remove, media=self.media_file, task_class="extract")
+            self.task.finished.connect(self.on_removal_finished)
+            self.task.error.connect(lambda error: self.on_removal_finished(False))
             
+    def restore_selected_tracks(self):
+        track_ids = {item.data(Qt.ItemDataRole.UserRole) for item in self.track_list.selectedItems()}
+        self.media_file.pending_subtitle_removals -= track_ids
+        self.populate_list()
+        self.plan_changed.emit()
+
+    def toggle_forced_flags(self):
+        selected_items = self.track_list.selectedItems()
+        if not selected_items:
+            QMessageBox.warning(self, "No Selection", "Please select one or more tracks to change.")
+            return
+        tracks = {t.index: t for t in self.media_file.subtitle_tracks}
+        edits = [mkv_modifier.TrackPropertyEdit(track_id=tid, is_forced=not tracks[tid].is_forced)
+                 for tid in (item.data(Qt.ItemDataRole.UserRole) for item in selected_items)]
+        self.toggle_forced_button.setEnabled(False)
+        self.task = get_task_executor().submit(mkv_modifier.edit_mkv_properties, self.media_file.source_path, edits, task_class="extract")
+        self.task.finished.connect(self.on_flags_changed)
+        self.task.error.connect(lambda error: self.on_flags_changed(False))
+
+    def on_flags_changed(self, success: bool):
+        self.toggle_forced_button.setEnabled(True)
+        if success:
+            self.track_modified.emit(self.media_file)
+            self.accept()
+        else:
+            QMessageBox.critical(self, "Error", "Failed to change the forced flag. Please check the application logs for more details.")
+
     def on_removal_finished(self, success: bool):
         if success:
             QMessageBox.information(self, "Success", "Tracks removed successfully. The file list will now be refreshed.")
-            self.track_modified.emit(self.parent_widget)
+            self.track_modified.emit(self.media_file)
             self.accept()
         else:
             QMessageBox.critical(self, "Error", "Failed to remove tracks. Please check the application logs for more details.")
             self.remove_button.setEnabled(True)
             self.remove_button.setText("Remove Selected Tracks")
-        
-        if self.thread:
-            self.thread.quit()
-            self.thread.wait()
+
+class BatchSubtitleStripDialog(QDialog):
+    """A dialog to remove subtitle tracks by language from many MKV files at once."""
+    def __init__(self, media_files: List[MediaFile], parent=None):
+        super().__init__(parent)
+        self.media_files = [mf for mf in media_files if mf.source_path.suffix.lower() == ".mkv" and mf.subtitle_tracks]
+        self.setWindowTitle("Strip Subtitle Tracks")
+        self.setMinimumWidth(450)
+        self.layout = QVBoxLayout(self)
+
+        self.layout.addWidget(QLabel(f"Select subtitle languages to permanently remove from {len(self.media_files)} MKV file(s):"))
+        self.language_list = QListWidget()
+        self.language_list.setSelectionMode(QAbstractItemView.SelectionMode.MultiSelection)
+        self.layout.addWidget(self.language_list)
+
+        self.keep_forced_checkbox = QCheckBox("Keep forced and likely forced tracks")
+        self.keep_forced_checkbox.setChecked(True)
+        self.layout.addWidget(self.keep_forced_checkbox)
+
+        self.rewrite_checkbox = QCheckBox("Rewrite the source MKVs now (otherwise tracks are dropped during conversion)")
+        self.layout.addWidget(self.rewrite_checkbox)
+
+        self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        self.button_box.accepted.connect(self.accept)
+        self.button_box.rejected.connect(self.reject)
+        self.layout.addWidget(self.button_box)
+        self.populate_languages()
+
+    def populate_languages(self):
+        counts: Dict[str, int] = {}
+        for media_file in self.media_files:
+            for track in media_file.subtitle_tracks:
+                counts[track.language] = counts.get(track.language, 0) + 1
+        for language, count in sorted(counts.items()):
+            item = QListWidgetItem(f"{language} ({count} track(s))")
+            item.setData(Qt.ItemDataRole.UserRole, language)
+            self.language_list.addItem(item)
+
+    def get_jobs(self) -> Tuple[List[Tuple[MediaFile, List[int]]], bool]:
+        """Returns the (file, track ids) pairs and whether the source files should be rewritten."""
+        if self.exec() != QDialog.DialogCode.Accepted:
+            return [], False
+        languages = {item.data(Qt.ItemDataRole.UserRole) for item in self.language_list.selectedItems()}
+        keep_forced = self.keep_forced_checkbox.isChecked()
+        jobs = []
+        for media_file in self.media_files:
+            track_ids = [t.index for t in media_file.subtitle_tracks
+                         if t.language in languages and not (keep_forced and (t.is_forced or t.is_likely_forced))]
+            if track_ids:
+                jobs.append((media_file, track_ids))
+        return jobs, self.rewrite_checkbox.isChecked()
+
+class MatchReviewDialog(QDialog):
+    """Lets the user pick the right TMDb entry for files the auto-match could not decide on."""
+    def __init__(self, results: List["metadata_matcher.MatchResult"], parent=None):
+        super().__init__(parent)
+        self.results = results
+        self.setWindowTitle("Review Metadata Matches")
+        self.setMinimumSize(800, 400)
+        self.layout = QVBoxLayout(self)
+
+        self.layout.addWidget(QLabel(f"{len(results)} file(s) need a decision. Choose a match or leave them unchanged:"))
+        self.table = QTableWidget(len(results), 2)
+        self.table.setHorizontalHeaderLabels(["File", "Match"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        for row, result in enumerate(results):
+            self.table.setItem(row, 0, QTableWidgetItem(result.media.filename))
+            combo = QComboBox()
+            combo.addItem("Leave unchanged", None)
+            for score, movie in result.candidates:
+                year = metadata_matcher.release_year(movie) or "N/A"
+                combo.addItem(f"{movie.get('title', 'N/A')} ({year}) - {score:.0%}", movie)
+            self.table.setCellWidget(row, 1, combo)
+        self.layout.addWidget(self.table)
+
+        self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        self.button_box.accepted.connect(self.accept)
+        self.button_box.rejected.connect(self.reject)
+        self.layout.addWidget(self.button_box)
+
+    def get_choices(self) -> List[Tuple[MediaFile, Dict]]:
+        if self.exec() != QDialog.DialogCode.Accepted:
+            return []
+        choices = []
+        for row, result in enumerate(self.results):
+            movie = self.table.cellWidget(row, 1).currentData()
+            if movie:
+                choices.append((result.media, movie))
+        return choices
 
 
 # --- Main UI Component Classes ---
 
+# Rows in these states show a progress bar; rows in FINISHED_STATUSES show the conversion summary.
+IN_PROGRESS_STATUSES = ["Preparing", "Queued", "Remuxing", "Encoding", "Encoding Pass 1/2", "Encoding Pass 2/2"]
+
+def get_safe_display_name(track: SubtitleTrack) -> str:
+    index = getattr(track, 'index', 'N/A')
+    title = getattr(track, 'title', '')
+    lang = getattr(track, 'language', 'und')
+    return title or lang.upper() or f"Track {index}"
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "--:--"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+def format_bytes(num_bytes: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1024 or unit == "GB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+class ThroughputPanel(QGroupBox):
+    """
+    Live ffmpeg throughput for the running jobs plus a queue summary. Only running jobs get a
+    row, so the cost does not depend on the size of the library.
+    """
+    COLUMNS = ["File", "FPS", "Speed", "Bitrate", "Written", "ETA"]
+
+    def __init__(self, parent=None):
+        super().__init__("Throughput", parent)
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.setMaximumHeight(120)
+        layout.addWidget(self.table)
+        self.setVisible(False)
+
+    def update_stats(self, running: Dict[str, 'ffmpeg_progress.ProgressStats'], summary: Dict[str, Any]):
+        self.setVisible(bool(running) or summary["remaining_files"] > 0)
+        if not self.isVisible():
+            return
+        self.summary_label.setText(
+            f"Queue: {summary['remaining_files']} file(s) left, ETA {format_duration(summary['queue_eta'])}  |  "
+            f"{summary['fps']:.0f} fps  |  Disk write {format_bytes(summary['write_rate'])}/s  |  "
+            f"{format_bytes(summary['bytes_written'])} written")
+        self.table.setRowCount(len(running))
+        for row, (file_path_str, stats) in enumerate(sorted(running.items())):
+            values = [Path(file_path_str).name, f"{stats.fps:.1f}", f"{stats.speed:.2f}x",
+                      f"{stats.bitrate_kbps / 1000:.1f} Mb/s", format_bytes(stats.bytes_written), format_duration(stats.eta_seconds)]
+            for column, value in enumerate(values):
+                item = self.table.item(row, column)
+                if item is None:
+                    self.table.setItem(row, column, QTableWidgetItem(value))
+                elif item.text() != value:
+                    item.setText(value)
+
+class MediaFileListModel(QAbstractListModel):
+    """List model over the scanned MediaFile catalog. Rows are painted by MediaFileDelegate."""
+    MediaFileRole = Qt.ItemDataRole.UserRole
+    ProgressRole = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._files: List[MediaFile] = []
+        self._progress: Dict[str, int] = {}  # Latest per-file percentage, keyed by source path
+        self._rows: Dict[str, int] = {}  # Source path -> row, so per-file signals are dispatched in constant time
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._files)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        media_file = self._files[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return media_file.title or media_file.filename
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return str(media_file.source_path)
+        if role == self.MediaFileRole:
+            return media_file
+        if role == self.ProgressRole:
+            return self._progress.get(str(media_file.source_path), 0)
+        return None
+
+    def set_media_files(self, media_files: List[MediaFile]):
+        self.beginResetModel()
+        self._files = media_files
+        self._progress.clear()
+        self._reindex()
+        self.endResetModel()
+
+    def _reindex(self):
+        self._rows = {str(media_file.source_path): row for row, media_file in enumerate(self._files)}
+
+    def media_file(self, row: int) -> MediaFile:
+        return self._files[row]
+
+    def media_files(self) -> List[MediaFile]:
+        return list(self._files)
+
+    def row_for_path(self, file_path_str: str) -> Optional[int]:
+        return self._rows.get(file_path_str)
+
+    def _row_changed(self, row: int):
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def replace_media_file(self, row: int, media_file: MediaFile):
+        old_path, new_path = str(self._files[row].source_path), str(media_file.source_path)
+        if old_path != new_path:
+            self._rows.pop(old_path, None)
+            self._progress.pop(old_path, None)
+            self._rows[new_path] = row
+        self._files[row] = media_file
+        self._row_changed(row)
+
+    def remove_media_files(self, file_path_strs: List[str]):
+        """Removes the rows for the given source paths, keeping the path index in sync."""
+        rows = sorted({self._rows[path] for path in file_path_strs if path in self._rows}, reverse=True)
+        for row in rows:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            removed = self._files.pop(row)
+            self._progress.pop(str(removed.source_path), None)
+            self.endRemoveRows()
+        if rows:
+            self._reindex()
+
+    def set_status(self, file_path_str: str, status: str):
+        row = self.row_for_path(file_path_str)
+        if row is not None:
+            self._files[row].status = status
+            self._row_changed(row)
+
+    def apply_updates(self, updates: Dict[str, Tuple[Optional[str], Optional[int]]]):
+        """Applies a batch of (status, percent) changes with a single dataChanged signal."""
+        rows = []
+        for file_path_str, (status, percent) in updates.items():
+            row = self._rows.get(file_path_str)
+            if row is None:
+                continue
+            if status is not None:
+                self._files[row].status = status
+            if percent is not None:
+                self._progress[file_path_str] = percent
+            rows.append(row)
+        if rows:
+            self.dataChanged.emit(self.index(min(rows)), self.index(max(rows)))
+
+    def refresh_all(self):
+        if self._files:
+            self.dataChanged.emit(self.index(0), self.index(len(self._files) - 1))
+
+class MediaFileDelegate(QStyledItemDelegate):
+    """
+    Paints file rows directly, so the list stays fast with tens of thousands of files.
+    Only the current row gets a real MediaFileItemWidget, as a persistent editor.
+    """
+    def __init__(self, dashboard_ref: 'Dashboard'):
+        super().__init__(dashboard_ref)
+        self.dashboard_ref = dashboard_ref
+        self.editor_row: Optional[int] = None
+        self._editor_height = 0
+
+    def sizeHint(self, option, index: QModelIndex) -> QSize:
+        if index.row() == self.editor_row and self._editor_height:
+            return QSize(0, self._editor_height)
+        return QSize(0, option.fontMetrics.height() * 2 + 26)
+
+    def createEditor(self, parent, option, index: QModelIndex):
+        editor = MediaFileItemWidget(index.data(MediaFileListModel.MediaFileRole), self.dashboard_ref, parent)
+        editor.setProperty("selected", True)
+        self._editor_height = editor.sizeHint().height()
+        return editor
+
+    def setEditorData(self, editor, index: QModelIndex):
+        editor.show_model_state(index.data(MediaFileListModel.MediaFileRole), index.data(MediaFileListModel.ProgressRole))
+
+    def setModelData(self, editor, model, index: QModelIndex):
+        pass  # The editor writes its changes straight to the MediaFile
+
+    def updateEditorGeometry(self, editor, option, index: QModelIndex):
+        editor.setGeometry(option.rect)
+
+    def paint(self, painter: QPainter, option, index: QModelIndex):
+        media_file: MediaFile = index.data(MediaFileListModel.MediaFileRole)
+        metrics = option.fontMetrics
+        selected = bool(option.state & QStyle.StateFlag.State_Selected)
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        frame = option.rect.adjusted(1, 1, -1, -3)
+        painter.setPen(QPen(QColor("#0078d4" if selected else "#40444b")))
+        painter.setBrush(QColor("#4a4e56" if selected else "#36393f"))
+        painter.drawRoundedRect(frame, 5, 5)
+
+        content = frame.adjusted(8, 5, -8, -5)
+        line_height = metrics.height()
+        status_text = f"Status: {media_file.status}"
+        status_width = metrics.horizontalAdvance(status_text)
+        header = QRect(content.left(), content.top(), content.width(), line_height)
+        painter.setPen(QColor("#e0e0e0"))
+        painter.drawText(header, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, status_text)
+
+        template = self.dashboard_ref.config_handler.get_setting("filename_template", "{title}")
+        heading = f"{media_file.title or media_file.filename} → {media_file.generate_filename_from_template(template)}"
+        title_font = painter.font()
+        title_font.setBold(True)
+        painter.setFont(title_font)
+        title_rect = header.adjusted(0, 0, -(status_width + 12), 0)
+        painter.drawText(title_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                         painter.fontMetrics().elidedText(heading, Qt.TextElideMode.ElideMiddle, title_rect.width()))
+        title_font.setBold(False)
+        painter.setFont(title_font)
+
+        detail_rect = QRect(content.left(), header.bottom() + 4, content.width(), line_height)
+        if media_file.status in IN_PROGRESS_STATUSES:
+            bar = QStyleOptionProgressBar()
+            bar.rect = detail_rect
+            bar.minimum, bar.maximum = 0, 100
+            bar.progress = index.data(MediaFileListModel.ProgressRole) or 0
+            bar.text = f"{bar.progress}%"
+            bar.textVisible = True
+            bar.state = QStyle.StateFlag.State_Enabled | QStyle.StateFlag.State_Horizontal
+            QApplication.style().drawControl(QStyle.ControlElement.CE_ProgressBar, bar, painter)
+        else:
+            painter.setPen(QColor("#b0b0b0"))
+            painter.drawText(detail_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                             metrics.elidedText(self._detail_text(media_file), Qt.TextElideMode.ElideRight, detail_rect.width()))
+        painter.restore()
+
+    @staticmethod
+    def _detail_text(media_file: MediaFile) -> str:
+        if media_file.status == "Error":
+            return f"Error: {media_file.error_message}"
+        if media_file.status in FINISHED_STATUSES:
+            return (f"Original: {media_file.original_size_gb:.2f} GB | Converted: {media_file.converted_size_gb:.2f} GB"
+                    f" | Change: {media_file.size_change_percent:+.2f}%")
+        text = (f"Video: {media_file.video_codec or 'N/A'}, {media_file.video_width}p | "
+                f"Audio: {media_file.audio_codec or 'N/A'}, {media_file.audio_channels}ch | "
+                f"Size: {media_file.original_size_gb:.2f} GB | Subs: {len(media_file.kept_subtitle_tracks)}")
+        if media_file.burned_subtitle:
+            text += f" | Burn-in: {get_safe_display_name(media_file.burned_subtitle)}"
+        if media_file.pending_subtitle_removals:
+            text += f" | Drop: {len(media_file.pending_subtitle_removals)} track(s)"
+        return text
+
 class MediaFileItemWidget(QFrame):
-    def __init__(self, media_file: MediaFile, dashboard_ref: 'Dashboard'):
-        super().__init__()
+    """Full controls for one file. The dashboard shows it for the current row only."""
+    def __init__(self, media_file: MediaFile, dashboard_ref: 'Dashboard', parent=None):
+        super().__init__(parent)
         self.media_file = media_file
         self.dashboard_ref = dashboard_ref
         self.setObjectName("MediaFileItemWidget")
-        
-        for attr, default in [('title', self.media_file.source_path.stem), ('output_filename', self.media_file.source_path.with_suffix('.mp4').name), ('status', 'Ready'), ('subtitle_tracks', []), ('original_size_gb', 0.0), ('converted_size_gb', 0.0), ('size_change_percent', 0.0), ('error_message', ''), ('burned_subtitle', None), ('use_basic_conversion', False)]:
-            if not hasattr(self.media_file, attr): setattr(self.media_file, attr, default)
+        self.setAutoFillBackground(True)
+        self._shown_status = None
         
         self.soft_copy_checkboxes: list[QCheckBox] = []
         main_layout = QVBoxLayout(self)
@@ -804,8 +1507,8 @@ class MediaFileItemWidget(QFrame):
         self.stack.addWidget(widget)
         
         self.fetch_meta_btn.clicked.connect(self.open_metadata_fetch)
-        self.burn_combo.currentIndexChanged.connect(self.update_conversion_profile_summary)
-        self.remux_checkbox.stateChanged.connect(self.update_conversion_profile_summary)
+        self.burn_combo.currentIndexChanged.connect(self.on_burn_selection_changed)
+        self.remux_checkbox.toggled.connect(self.on_remux_toggled)
         self.rename_btn.clicked.connect(lambda: self.open_rename_dialog())
         self.preview_sub_btn.clicked.connect(self.open_subtitle_preview)
         self.edit_sub_btn.clicked.connect(self.open_subtitle_editor)
@@ -843,7 +1546,8 @@ class MediaFileItemWidget(QFrame):
 
     def open_subtitle_editor(self):
         dialog = SubtitleEditorDialog(self.media_file, self)
-        dialog.track_modified.connect(self.dashboard_ref.refresh_list_item_by_widget)
+        dialog.track_modified.connect(self.dashboard_ref.refresh_media_file)
+        dialog.plan_changed.connect(self.refresh_state)
         dialog.exec()
 
     def _create_summary_view(self):
@@ -906,11 +1610,13 @@ class MediaFileItemWidget(QFrame):
         if switch_to_view:
             self.stack.setCurrentIndex(2)
     
-    def get_safe_display_name(self, track: SubtitleTrack) -> str:
-        index = getattr(track, 'index', 'N/A')
-        title = getattr(track, 'title', '')
-        lang = getattr(track, 'language', 'und')
-        return title or lang.upper() or f"Track {index}"
+    def show_model_state(self, media_file: MediaFile, percent: int):
+        """Updates the editor after the model changed; controls are only rebuilt when needed."""
+        if media_file is not self.media_file or media_file.status != self._shown_status:
+            self.media_file = media_file
+            self.refresh_state()
+        if self.media_file.status in IN_PROGRESS_STATUSES:
+            self.update_item_progress(percent, self.media_file.status)
 
     def refresh_state(self):
         template = self.dashboard_ref.config_handler.get_setting("filename_template", "{title}")
@@ -919,19 +1625,20 @@ class MediaFileItemWidget(QFrame):
         title = getattr(self.media_file, 'title', getattr(self.media_file, 'filename', ''))
         self.filename_label.setText(f"<b>{title}</b> → <i>{self.media_file.output_filename}</i>")
         status = self.media_file.status
+        self._shown_status = status
         self.status_label.setText(f"Status: {status}")
         
-        if status in ["Preparing", "Queued", "Remuxing", "Encoding Pass 1/2", "Encoding Pass 2/2"]:
+        if status in IN_PROGRESS_STATUSES:
             self.set_status_view(status)
-        elif status in ["Converted", "Transferred", "Skipped (Exists)", "Converted (Basic)", "Error"]:
+        elif status in FINISHED_STATUSES:
             self.stack.setCurrentIndex(1)
             self.orig_size_label.setText(f"Original: {self.media_file.original_size_gb:.2f} GB")
             self.new_size_label.setText(f"Converted: {self.media_file.converted_size_gb:.2f} GB")
             self.size_change_label.setText(f"Change: {self.media_file.size_change_percent:+.2f}%")
             self.audio_details_label.setText(f"Audio: {getattr(self.media_file, 'audio_conversion_details', 'N/A')}")
             
-            burned_sub = next((self.get_safe_display_name(s) for s in self.media_file.subtitle_tracks if getattr(s, 'action', 'ignore') == 'burn'), "None")
-            copied_subs = ", ".join([self.get_safe_display_name(s) for s in self.media_file.subtitle_tracks if getattr(s, 'action', 'ignore') == 'copy']) or "None"
+            burned_sub = next((get_safe_display_name(s) for s in self.media_file.subtitle_tracks if getattr(s, 'action', 'ignore') == 'burn'), "None")
+            copied_subs = ", ".join([get_safe_display_name(s) for s in self.media_file.subtitle_tracks if getattr(s, 'action', 'ignore') == 'copy']) or "None"
             
             self.subs_details_label.setText(f"Subs Burned: {burned_sub} | Copied: {copied_subs}")
             if status == "Error":
@@ -941,14 +1648,17 @@ class MediaFileItemWidget(QFrame):
             self.metadata_video_label.setText(f"Video: {getattr(self.media_file, 'video_codec', 'N/A')}, {getattr(self.media_file, 'video_width', 'N/A')}p")
             self.metadata_audio_label.setText(f"Audio: {getattr(self.media_file, 'audio_codec', 'N/A')}, {getattr(self.media_file, 'audio_channels', 'N/A')}ch")
             self.metadata_size_label.setText(f"Size: {self.media_file.original_size_gb:.2f} GB")
+            self.remux_checkbox.blockSignals(True)
+            self.remux_checkbox.setChecked(self.media_file.force_remux)
+            self.remux_checkbox.blockSignals(False)
             self.populate_selection_controls()
             self.update_conversion_profile_summary()
 
     def populate_selection_controls(self):
         self.burn_combo.blockSignals(True)
         self.burn_combo.clear(); self.burn_combo.addItem("None", None)
-        for track in self.media_file.subtitle_tracks:
-            self.burn_combo.addItem(self.get_safe_display_name(track), track)
+        for track in self.media_file.kept_subtitle_tracks:
+            self.burn_combo.addItem(get_safe_display_name(track), track)
             if self.media_file.burned_subtitle and getattr(self.media_file.burned_subtitle, 'index', -1) == getattr(track, 'index', -2): self.burn_combo.setCurrentIndex(self.burn_combo.count() - 1)
         self.burn_combo.blockSignals(False)
         
@@ -957,52 +1667,66 @@ class MediaFileItemWidget(QFrame):
             if child and child.widget(): child.widget().deleteLater()
         
         self.soft_copy_checkboxes = []
-        for track in self.media_file.subtitle_tracks:
+        for track in self.media_file.kept_subtitle_tracks:
             if getattr(track, 'is_text_based', False):
-                cb = QCheckBox(self.get_safe_display_name(track)); cb.setProperty("track", track);
-                cb.stateChanged.connect(self.update_conversion_profile_summary)
+                cb = QCheckBox(get_safe_display_name(track)); cb.setProperty("track", track)
+                cb.setChecked(getattr(track, 'action', 'ignore') == 'copy')
+                cb.toggled.connect(lambda checked, t=track: self.on_copy_toggled(t, checked))
                 self.soft_copy_checkboxes.append(cb); self.soft_copy_layout.addWidget(cb)
 
     def update_conversion_profile_summary(self):
         settings = self.dashboard_ref.get_current_settings()
         if not settings: return
         
-        video_action = "Copy (Remux)"
-        if self.remux_checkbox.isChecked(): video_action = "Copy (Fast Remux)"
-        elif self.burn_combo.currentData() is not None: video_action = f"Re-encode to {getattr(settings, 'video_codec', 'N/A').upper()}"
+        # The selection controls write to the MediaFile straight away, so its plan is current
+        plan = self.media_file.build_plan(settings)
+        if plan.video is None:
+            video_action = "None"
+        elif plan.encodes_video:
+            video_action = f"Re-encode to {plan.video.target_codec.upper()}"
+        else:
+            video_action = "Copy (Fast Remux)" if plan.remux_only else "Copy (Remux)"
         self.profile_video_label.setText(f"Video: {video_action}")
 
-        audio_codec = getattr(self.media_file, 'audio_codec', '').lower()
-        compatible_audio = ['aac', 'ac3', 'eac3']
-        if self.remux_checkbox.isChecked() or (audio_codec and audio_codec in compatible_audio):
-             audio_action = f"Copy existing {audio_codec.upper()}"
-        else:
-             audio_action = f"Re-encode to {getattr(settings, 'audio_codec', 'N/A').upper()}"
-        self.profile_audio_label.setText(f"Audio: {audio_action}")
+        copied = [s.source_codec or "?" for s in plan.audio if s.action == "copy"]
+        transcoded = [s.source_codec or "?" for s in plan.audio if s.action == "transcode"]
+        dropped = [s for s in plan.audio if s.action == "drop"]
+        audio_parts = []
+        if copied: audio_parts.append(f"Copy {', '.join(copied)}")
+        if transcoded: audio_parts.append(f"Re-encode {', '.join(transcoded)} to {settings.audio_codec.upper()}")
+        if dropped: audio_parts.append(f"Drop {len(dropped)}")
+        self.profile_audio_label.setText(f"Audio: {' | '.join(audio_parts) or 'None'}")
+
+        burned_track = plan.burned_subtitle
+        self.profile_burn_label.setText(f"Burn-in: {get_safe_display_name(burned_track) if burned_track else 'None'}")
+        
+        kept_subs = [stream for stream in plan.subtitles if stream.action != "drop"]
+        copy_text = f"Copy Subs: {len(kept_subs)} track(s)"
+        if self.media_file.pending_subtitle_removals:
+            copy_text += f" | Drop: {len(self.media_file.pending_subtitle_removals)} track(s)"
+        self.profile_copy_label.setText(copy_text)
+
+    # Selection changes are written to the MediaFile straight away, because the editor
+    # widget is destroyed as soon as another row becomes current.
+    def on_burn_selection_changed(self, _index: int):
+        self.media_file.set_burned_subtitle(self.burn_combo.currentData())
+        for cb in self.soft_copy_checkboxes:
+            track = cb.property("track")
+            if track is not self.media_file.burned_subtitle:
+                track.action = "copy" if cb.isChecked() else "ignore"
+        self.update_conversion_profile_summary()
 
-        burned_track = self.burn_combo.currentData()
-        self.profile_burn_label.setText(f"Burn-in: {self.get_safe_display_name(burned_track) if burned_track else 'None'}")
-        
-        copied_subs = [cb.text() for cb in self.soft_copy_checkboxes if cb.isChecked()]
-        self.profile_copy_label.setText(f"Copy Subs: {len(copied_subs)} track(s)")
+    def on_copy_toggled(self, track: SubtitleTrack, checked: bool):
+        if track is not self.media_file.burned_subtitle:
+            track.action = "copy" if checked else "ignore"
+        self.update_conversion_profile_summary()
 
-    def update_media_file_from_ui(self):
-        if self.remux_checkbox.isChecked():
-            self.media_file.use_basic_conversion = True
-        elif hasattr(self.media_file, 'classify'):
-            self.media_file.use_basic_conversion = (self.media_file.classify() == 'remux')
-        else:
-            self.media_file.use_basic_conversion = False
+    def on_remux_toggled(self, checked: bool):
+        self.media_file.force_remux = checked
+        self.update_conversion_profile_summary()
 
-        self.media_file.burned_subtitle = self.burn_combo.currentData()
-        for track in self.media_file.subtitle_tracks: track.action = "ignore"
-        if self.media_file.burned_subtitle: self.media_file.burned_subtitle.action = "burn"
-        for cb in self.soft_copy_checkboxes:
-            track_data = cb.property("track")
-            if cb.isChecked() and track_data:
-                burn_idx = getattr(self.media_file.burned_subtitle, 'index', -1)
-                track_idx = getattr(track_data, 'index', -2)
-                if not (self.media_file.burned_subtitle and burn_idx == track_idx): track_data.action = "copy"
+    def update_media_file_from_ui(self):
+        self.media_file.apply_selection()
 
 
 # --- Main Application Class ---
@@ -1030,9 +1754,14 @@ class Dashboard(QWidget):
         self.main_layout.addWidget(self.content_widget)
         
         self.media_files_data: List[MediaFile] = []
-        self.thread = None
-        self.worker = None
+        self.task: Optional[TaskHandle] = None
         self.config_handler = ConfigHandler()
+        if self.config_handler.get_setting("trace_enabled", False):
+            tracing.enable()
+        if TMDB_ENABLED:
+            # Warm the offline title index; searches on the same pool then find it loaded
+            warm_up = get_task_executor().submit(title_index.get_index, task_class="network")
+            warm_up.error.connect(lambda error: print(f"[DEBUG] Could not load the offline title index: {error[1]}"))
         
         top_controls = QHBoxLayout()
         self.scan_config_button = QPushButton("Scan Configured Folders", clicked=self.scan_configured_folders)
@@ -1044,11 +1773,29 @@ class Dashboard(QWidget):
         top_controls.addWidget(self.settings_button)
         self.layout.addLayout(top_controls)
         
-        self.file_list = QListWidget()
-        self.file_list.setSelectionMode(QListWidget.SelectionMode.ExtendedSelection)
-        self.file_list.itemSelectionChanged.connect(self.update_selection_styles)
+        self.file_model = MediaFileListModel(self)
+        self._refreshes: Dict[str, Tuple[TaskHandle, bool]] = {}  # Source path -> (task, rerun when done)
+        self.progress_aggregator = ProgressAggregator(self)
+        self.progress_aggregator.items_updated.connect(self.on_items_updated)
+        self.progress_aggregator.overall_updated.connect(self.update_progress)
+        self.throughput_panel = ThroughputPanel()
+        self.progress_aggregator.throughput_updated.connect(self.throughput_panel.update_stats)
+        self.file_delegate = MediaFileDelegate(self)
+        # A header-less QTreeView is used as the list: unlike QListView it only measures the rows
+        # it shows, so the taller editor row does not force a relayout of the whole library.
+        self.file_list = QTreeView()
+        self.file_list.setObjectName("FileList")
+        self.file_list.setHeaderHidden(True)
+        self.file_list.setRootIsDecorated(False)
+        self.file_list.setItemsExpandable(False)
+        self.file_list.setModel(self.file_model)
+        self.file_list.setItemDelegate(self.file_delegate)
+        self.file_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.file_list.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.file_list.selectionModel().currentRowChanged.connect(self.on_current_row_changed)
         self.layout.addWidget(self.file_list, 1)
         
+        self.layout.addWidget(self.throughput_panel)
         self.bottom_button_stack = QStackedWidget()
         self._create_normal_buttons()
         self.layout.addWidget(self.bottom_button_stack)
@@ -1069,55 +1816,66 @@ class Dashboard(QWidget):
         self.progress_bar = QProgressBar(); self.progress_bar.setVisible(False)
         self.preview_plan_button = QPushButton("Preview Conversion Plan", clicked=self.show_conversion_plan_preview)
         self.convert_button = QPushButton("Convert Selected", clicked=self.start_conversion)
+        self.strip_subs_button = QPushButton("Strip Subtitles...", clicked=self.start_subtitle_strip)
+        self.auto_match_button = QPushButton("Auto-Match Metadata", clicked=self.start_auto_match)
+        self.auto_match_button.setEnabled(TMDB_ENABLED)
         self.transfer_button = QPushButton("Transfer Files", clicked=self.start_transfer)
         self.cancel_button = QPushButton("Cancel", clicked=self.cancel_task); self.cancel_button.setEnabled(False)
         bottom_controls.addWidget(self.progress_bar, 1)
         bottom_controls.addWidget(self.preview_plan_button)
+        bottom_controls.addWidget(self.auto_match_button)
+        bottom_controls.addWidget(self.strip_subs_button)
         bottom_controls.addWidget(self.convert_button)
         bottom_controls.addWidget(self.transfer_button); bottom_controls.addWidget(self.cancel_button)
         self.bottom_button_stack.addWidget(normal_widget)
 
     def _run_task(self, task_function: Callable, on_finish: Callable, *args, **kwargs):
         self.set_buttons_enabled(False); self.status_bar.showMessage(f"Running {task_function.__name__}...")
-        self.thread = QThread(); self.worker = Worker(task_function, *args, **kwargs); self.worker.moveToThread(self.thread)
-        self.worker.item_status_changed.connect(self.on_item_status_changed)
-        self.worker.item_progress.connect(self.on_item_progress)
-        self.thread.started.connect(self.worker.run); self.worker.progress.connect(self.update_progress); self.worker.finished.connect(on_finish); self.worker.error.connect(self.on_task_error)
-        self.worker.finished.connect(self.thread.quit); self.worker.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater); self.thread.finished.connect(lambda: self.set_buttons_enabled(True))
-        self.thread.start()
-
-    def find_item_widget_by_path(self, file_path_str: str) -> Union[MediaFileItemWidget, None]:
-        for i in range(self.file_list.count()):
-            item = self.file_list.item(i)
-            widget = self.file_list.itemWidget(item)
-            if str(widget.media_file.source_path) == file_path_str:
-                return widget
-        return None
-
-    def on_item_status_changed(self, file_path_str: str, status: str):
-        widget = self.find_item_widget_by_path(file_path_str)
-        if widget:
-            widget.media_file.status = status
-            widget.update_item_progress(widget.item_progress_bar.value(), status)
-
-    def on_item_progress(self, file_path_str: str, percent: int):
-        widget = self.find_item_widget_by_path(file_path_str)
-        if widget:
-            widget.update_item_progress(percent, widget.media_file.status)
+        self.progress_aggregator.start()
+        self.task = get_task_executor().submit(task_function, *args, task_class="job", aggregator=self.progress_aggregator, **kwargs)
+        self.task.finished.connect(self.progress_aggregator.stop); self.task.error.connect(self.progress_aggregator.stop); self.task.cancelled.connect(self.progress_aggregator.stop)
+        self.task.finished.connect(on_finish); self.task.error.connect(self.on_task_error); self.task.cancelled.connect(self.on_task_cancelled)
+        for signal in (self.task.finished, self.task.error, self.task.cancelled):
+            signal.connect(lambda *_: self.set_buttons_enabled(True))
+
+    def on_items_updated(self, updates: Dict[str, Tuple[Optional[str], Optional[int]]]):
+        self.file_model.apply_updates(updates)
+
+    def current_item_widget(self) -> Optional[MediaFileItemWidget]:
+        """The editor widget of the current row, if one is open."""
+        index = self.file_list.currentIndex()
+        return self.file_list.indexWidget(index) if index.isValid() else None
+
+    def on_current_row_changed(self, current: QModelIndex, previous: QModelIndex):
+        if previous.isValid() and self.file_list.isPersistentEditorOpen(previous):
+            self.file_list.closePersistentEditor(previous)
+        self.file_delegate.editor_row = None
+        if previous.isValid():
+            self.file_delegate.sizeHintChanged.emit(previous)
+        if current.isValid():
+            self.file_delegate.editor_row = current.row()
+            self.file_list.openPersistentEditor(current)
+            self.file_delegate.sizeHintChanged.emit(current)
+            self.file_list.scrollTo(current)
 
     def set_buttons_enabled(self, enabled: bool):
         self.scan_config_button.setEnabled(enabled); self.scan_custom_button.setEnabled(enabled)
         self.settings_button.setEnabled(enabled); self.convert_button.setEnabled(enabled)
-        self.preview_plan_button.setEnabled(enabled)
+        self.preview_plan_button.setEnabled(enabled); self.strip_subs_button.setEnabled(enabled)
+        self.auto_match_button.setEnabled(enabled and TMDB_ENABLED)
         self.transfer_button.setEnabled(enabled)
         self.progress_bar.setVisible(not enabled); self.cancel_button.setEnabled(not enabled)
 
     def update_progress(self, percent: int, status: str):
-        self.progress_bar.setFormat(f"{status} - %p%"); self.progress_bar.setValue(percent)
+        self.progress_bar.setFormat(f"{status} - %p%" if status else "%p%"); self.progress_bar.setValue(percent)
         
     def cancel_task(self):
-        if self.worker: self.status_bar.showMessage("Cancellation requested...")
+        if self.task and not self.task.done:
+            self.task.cancel(); self.status_bar.showMessage("Cancellation requested...")
+
+    def on_task_cancelled(self):
+        self.refresh_ui()
+        self.status_bar.showMessage("Task cancelled.", 5000)
 
     def open_settings(self):
         SettingsWindow(self.config_handler, self).exec()
@@ -1133,7 +1891,8 @@ class Dashboard(QWidget):
         if not path_mappings:
             self.show_message("No Scan Directories", "Please configure at least one path mapping in Settings.")
             return
-        scan_dirs = [Path(m["source"]) for m in path_mappings if Path(m["source"]).is_dir()]
+        existing_mappings = [m for m in path_mappings if m.get("source") and Path(m["source"]).is_dir()]
+        scan_dirs = PathMappingIndex(existing_mappings).scan_roots()
         if not scan_dirs:
             self.show_message("Invalid Scan Directories", "None of the configured source paths exist. Please check your settings.")
             return
@@ -1152,39 +1911,43 @@ class Dashboard(QWidget):
         self.status_bar.showMessage(f"Scan complete. Found {len(result)} files.")
 
     def populate_file_list(self):
-        self.file_list.clear()
-        for media_file in self.media_files_data:
-            item_widget = MediaFileItemWidget(media_file, self)
-            list_item = QListWidgetItem(self.file_list)
-            list_item.setData(Qt.ItemDataRole.UserRole, media_file)
-            list_item.setSizeHint(item_widget.sizeHint())
-            self.file_list.addItem(list_item)
-            self.file_list.setItemWidget(list_item, item_widget)
-        self.update_selection_styles()
+        self.file_delegate.editor_row = None
+        self.file_model.set_media_files(self.media_files_data)
 
     def get_selected_media_files(self) -> List[MediaFile]:
-        selected_items = self.file_list.selectedItems()
-        if not selected_items:
-             return [self.file_list.itemWidget(self.file_list.item(i)).media_file for i in range(self.file_list.count())]
-        return [self.file_list.itemWidget(item).media_file for item in selected_items]
+        rows = sorted(index.row() for index in self.file_list.selectionModel().selectedRows())
+        if not rows:
+            return self.file_model.media_files()
+        return [self.file_model.media_file(row) for row in rows]
 
     def _run_combined_conversion(self, files: List[MediaFile], settings: ConversionSettings, 
                                  progress_callback: Callable, item_status_emitter: Callable, 
-                                 item_progress_emitter: Callable):
+                                 item_progress_emitter: Callable, item_stats_emitter: Optional[Callable] = None,
+                                 stop_check: Callable[[], bool] = lambda: False):
         for f in files:
-            widget = self.find_item_widget_by_path(str(f.source_path))
-            if widget:
-                widget.update_media_file_from_ui()
+            f.apply_selection()
             item_status_emitter(str(f.source_path), "Queued")
-        
-        basic_files = [f for f in files if getattr(f, 'use_basic_conversion', False)]
-        advanced_files = [f for f in files if not getattr(f, 'use_basic_conversion', False)]
 
-        if basic_files:
-            basic_convert.run_batch_basic_conversion(basic_files, settings)
+        # Pre-flight dedup: skip files whose output was already delivered to its mapped destination.
+        delivered = file_handler.mark_already_delivered(
+            files,
+            self.config_handler.get_setting("path_mappings", []),
+            settings.filename_template,
+            check=self.config_handler.get_setting("delivery_check", "size"),
+        )
+        for f in delivered:
+            item_status_emitter(str(f.source_path), f.status)
+        delivered_ids = {id(f) for f in delivered}  # Identity, not the dataclass __eq__ that compares every field
+        pending = [f for f in files if id(f) not in delivered_ids]
+
+        basic_files = [f for f in pending if getattr(f, 'use_basic_conversion', False)]
+        advanced_files = [f for f in pending if not getattr(f, 'use_basic_conversion', False)]
+
+        if basic_files and not stop_check():
+            basic_convert.run_batch_basic_conversion(basic_files, settings, item_status_emitter, item_progress_emitter, item_stats_emitter, stop_check)
         
-        if advanced_files:
-            convert.convert_batch(advanced_files, settings, progress_callback, item_status_emitter, item_progress_emitter)
+        if advanced_files and not stop_check():
+            convert.convert_batch(advanced_files, settings, progress_callback, item_status_emitter, item_progress_emitter, stop_check, item_stats_emitter)
         
         return files
 
@@ -1204,13 +1967,59 @@ class Dashboard(QWidget):
         
         self.progress_bar.setFormat("%p%")
         self._run_task(self._run_combined_conversion, self.on_action_finished, files=files, settings=settings)
+        self.progress_aggregator.set_durations({str(f.source_path): f.duration_seconds for f in files})
+
+    def start_subtitle_strip(self):
+        files = self.get_selected_media_files()
+        jobs, rewrite_sources = BatchSubtitleStripDialog(files, self).get_jobs()
+        if not jobs:
+            return
+        track_count = sum(len(ids) for _media, ids in jobs)
+        if not rewrite_sources:
+            for media_file, track_ids in jobs:
+                media_file.mark_subtitles_for_removal(track_ids)
+            self.refresh_ui()
+            self.status_bar.showMessage(f"{track_count} subtitle track(s) in {len(jobs)} file(s) will be dropped during conversion.")
+            return
+        reply = QMessageBox.question(self, "Confirm Removal",
+            f"Remove {track_count} subtitle track(s) from {len(jobs)} file(s)?\n\nThis will rewrite the source MKV files and cannot be undone.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
+        if reply == QMessageBox.StandardButton.Yes:
+            self.progress_bar.setFormat("%p%")
+            self._run_task(mkv_modifier.remove_subtitle_tracks_batch, self.on_subtitle_strip_finished, jobs=jobs)
+
+    def on_subtitle_strip_finished(self, results: Dict[str, bool]):
+        self.refresh_ui()
+        failed = sum(1 for ok in results.values() if not ok)
+        self.status_bar.showMessage(f"Subtitle stripping finished: {len(results) - failed} succeeded, {failed} failed.")
+
+    def start_auto_match(self):
+        if not tmdb_client.get_api_key():
+            self.show_message("API Key Required", "Please set your TMDb API key in Settings first.")
+            return
+        files = self.get_selected_media_files()
+        if not files:
+            self.show_message("No Files", "No files to match.")
+            return
+        self._run_task(metadata_matcher.auto_match, self.on_auto_match_finished, media_files=files,
+                       max_workers=self.config_handler.get_setting("metadata_match_workers", metadata_matcher.DEFAULT_MATCH_WORKERS))
+
+    def on_auto_match_finished(self, results: List["metadata_matcher.MatchResult"]):
+        matched = sum(1 for r in results if r.status == "matched")
+        unmatched = sum(1 for r in results if r.status == "no match")
+        review = [r for r in results if r.status == "review"]
+        for media_file, movie in (MatchReviewDialog(review, self).get_choices() if review else []):
+            metadata_matcher.apply_match(media_file, movie)
+        self.refresh_ui()
+        self.status_bar.showMessage(f"Auto-match finished: {matched} matched, {len(review)} reviewed, {unmatched} without results.")
 
     def show_conversion_plan_preview(self):
-        selected_items = self.file_list.selectedItems()
-        if not selected_items:
+        rows = sorted(index.row() for index in self.file_list.selectionModel().selectedRows())
+        if not rows:
             self.show_message("No File Selected", "Please select a file to preview its conversion plan.")
             return
-        widget = self.file_list.itemWidget(selected_items[0])
+        self.file_list.setCurrentIndex(self.file_model.index(rows[0]))
+        widget = self.current_item_widget()
         if widget:
             widget.show_conversion_preview(switch_to_view=True)
 
@@ -1218,10 +2027,10 @@ class Dashboard(QWidget):
         try:
             return ConversionSettings(
                 output_directory=Path(self.config_handler.get_setting("output_directory", "./converted")), 
-                use_nvenc=self.config_handler.get_setting("use_nvenc"),
-                crf=self.config_handler.get_setting("crf_value"), 
-                delete_source_on_success=self.config_handler.get_setting("delete_source_on_success"),
-                use_two_pass=self.config_handler.get_setting("use_two_pass"),
+                use_nvenc=self.config_handler.get_setting("use_nvenc", ConversionSettings.use_nvenc),
+                crf=self.config_handler.get_setting("crf_value", ConversionSettings.crf), 
+                delete_source_on_success=self.config_handler.get_setting("delete_source_on_success", ConversionSettings.delete_source_on_success),
+                use_two_pass=self.config_handler.get_setting("use_two_pass", ConversionSettings.use_two_pass),
                 filename_template=self.config_handler.get_setting("filename_template", "{title}"),
                 scannable_file_types=self.config_handler.get_setting("scannable_file_types", [".mkv"])
             )
@@ -1255,59 +2064,63 @@ class Dashboard(QWidget):
                 file_handler.move_converted_files, 
                 self.on_action_finished,
                 media_files=files_to_transfer, 
-                path_mappings=path_mappings
+                path_mappings=path_mappings,
+                max_concurrent_per_destination=self.config_handler.get_setting("transfer_concurrency_per_destination", file_handler.DEFAULT_CONCURRENCY_PER_DESTINATION),
+                max_concurrent_per_source_device=self.config_handler.get_setting("transfer_concurrency_per_source_device", file_handler.DEFAULT_CONCURRENCY_PER_SOURCE_DEVICE),
+                buffer_size=self.config_handler.get_setting("transfer_buffer_mb", 16) * 1024 * 1024,
+                verify=self.config_handler.get_setting("transfer_verify", file_handler.DEFAULT_VERIFY_MODE),
+                record_checksums=self.config_handler.get_setting("transfer_record_checksums", file_handler.DEFAULT_RECORD_CHECKSUMS)
             )
 
     def on_action_finished(self, result):
         self.refresh_ui()
         self.status_bar.showMessage("Task finished successfully.")
 
-    def find_list_item(self, media_file: MediaFile) -> QListWidgetItem | None:
-        for i in range(self.file_list.count()):
-            item = self.file_list.item(i)
-            if item.data(Qt.ItemDataRole.UserRole) == media_file: return item
-        return None
-
     def refresh_ui(self):
-        for i in range(self.file_list.count()):
-            item = self.file_list.item(i)
-            widget = self.file_list.itemWidget(item)
-            if widget:
-                widget.refresh_state()
-
-    def refresh_list_item_by_widget(self, widget: MediaFileItemWidget):
-        if not widget: return
-        for i in range(self.file_list.count()):
-            item = self.file_list.item(i)
-            if self.file_list.itemWidget(item) == widget:
-                self.refresh_list_item(item)
-                break
-
-    def refresh_list_item(self, item: QListWidgetItem):
-        widget = self.file_list.itemWidget(item)
+        self.file_model.refresh_all()
+        widget = self.current_item_widget()
         if widget:
-            new_media_file_state = subtitlesmkv.scan_file(widget.media_file.source_path)
-            new_media_file_state.output_filename = widget.media_file.output_filename
-            new_media_file_state.title = widget.media_file.title
-            new_media_file_state.year = widget.media_file.year
-            new_media_file_state.comment = widget.media_file.comment
-            
-            for i, mf in enumerate(self.media_files_data):
-                if mf.source_path == new_media_file_state.source_path:
-                    self.media_files_data[i] = new_media_file_state
-                    break
-            item.setData(Qt.ItemDataRole.UserRole, new_media_file_state)
-            widget.media_file = new_media_file_state
             widget.refresh_state()
 
-    def update_selection_styles(self):
-        for i in range(self.file_list.count()):
-            item = self.file_list.item(i)
-            widget = self.file_list.itemWidget(item)
-            if widget:
-                widget.setProperty("selected", item.isSelected())
-                widget.style().unpolish(widget)
-                widget.style().polish(widget)
+    def refresh_media_file(self, media_file: MediaFile):
+        """
+        Re-probes a file after its tracks changed on disk, keeping the user's edits. The probe
+        runs on a background pool; a refresh requested while one is running for the same file
+        is coalesced into a single follow-up.
+        """
+        file_path_str = str(media_file.source_path)
+        if file_path_str in self._refreshes:
+            task, _rerun = self._refreshes[file_path_str]
+            self._refreshes[file_path_str] = (task, True)
+            return
+        if self.file_model.row_for_path(file_path_str) is None:
+            return
+        self.file_model.set_status(file_path_str, "Refreshing")
+        task = get_task_executor().submit(subtitlesmkv.scan_file, media_file.source_path, task_class="probe")
+        task.finished.connect(lambda new_state: self.on_refresh_finished(file_path_str, new_state))
+        task.error.connect(lambda error: self.on_refresh_finished(file_path_str, None))
+        task.cancelled.connect(lambda: self.on_refresh_finished(file_path_str, None))
+        self._refreshes[file_path_str] = (task, False)
+
+    def on_refresh_finished(self, file_path_str: str, new_media_file_state: Optional[MediaFile]):
+        _task, rerun = self._refreshes.pop(file_path_str)
+        row = self.file_model.row_for_path(file_path_str)
+        if row is None:
+            return
+        old_state = self.file_model.media_file(row)
+        if new_media_file_state is None:
+            old_state.status = "Error"; old_state.error_message = "Refresh failed."
+            self.file_model.set_status(file_path_str, old_state.status)
+            return
+        new_media_file_state.output_filename = old_state.output_filename
+        new_media_file_state.title = old_state.title
+        new_media_file_state.year = old_state.year
+        new_media_file_state.comment = old_state.comment
+        new_media_file_state.force_remux = old_state.force_remux
+        new_media_file_state.mark_subtitles_for_removal(old_state.pending_subtitle_removals)
+        self.file_model.replace_media_file(row, new_media_file_state)
+        if rerun:
+            self.refresh_media_file(new_media_file_state)
 
     def on_task_error(self, error: Tuple):
         self.status_bar.showMessage(f"Error occurred: {error[1]}", 10000)
@@ -1326,4 +2139,5 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = Dashboard()
     window.show()
+    app.aboutToQuit.connect(get_task_executor().shutdown)
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,139 @@
+# ffmpeg_progress.py
+# This module runs ffmpeg while parsing its periodic stats lines
+# ("frame= ... fps= ... size= ... time= ... bitrate= ... speed=") into throughput figures.
+
+import re
+import sys
+import time
+import subprocess
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import tracing
+
+# --- Platform-specific subprocess creation flags ---
+if sys.platform == "win32":
+    CREATE_NO_WINDOW = subprocess.CREATE_NO_WINDOW
+else:
+    CREATE_NO_WINDOW = 0
+
+OUTPUT_TAIL_LINES = 200  # Lines of ffmpeg output kept for error messages
+
+_STAT_RE = re.compile(r"\b(frame|fps|L?size|time|bitrate|speed)=\s*(\S+)")
+_SIZE_RE = re.compile(r"([\d.]+)\s*([kmg]?i?b)", re.IGNORECASE)
+_SIZE_UNITS = {"b": 1, "kb": 1024, "kib": 1024, "mb": 1024 ** 2, "mib": 1024 ** 2, "gb": 1024 ** 3, "gib": 1024 ** 3}
+
+@dataclass
+class ProgressStats:
+    """One snapshot of a running ffmpeg job."""
+    out_seconds: float = 0.0        # Position reached in the output
+    duration: float = 0.0           # Length of the input, 0 if unknown
+    frame: int = 0
+    fps: float = 0.0
+    speed: float = 0.0              # Multiple of realtime
+    bitrate_kbps: float = 0.0
+    bytes_written: int = 0
+    elapsed: float = 0.0            # Wall-clock seconds since ffmpeg started
+
+    @property
+    def percent(self) -> int:
+        if self.duration <= 0:
+            return 0
+        return max(0, min(100, int(self.out_seconds / self.duration * 100)))
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        if self.duration <= 0:
+            return None
+        remaining = max(0.0, self.duration - self.out_seconds)
+        if self.speed > 0:
+            return remaining / self.speed
+        if self.out_seconds > 0 and self.elapsed > 0:
+            return remaining * self.elapsed / self.out_seconds
+        return None
+
+def time_to_seconds(time_str: str) -> float:
+    try:
+        sign = -1 if time_str.startswith("-") else 1
+        parts = time_str.lstrip("-").split(':')
+        return sign * (int(parts[0]) * 3600 + int(parts[1]) * 60 + float(parts[2]))
+    except (ValueError, IndexError):
+        return 0.0
+
+def _to_float(value: str) -> float:
+    try:
+        return float(value.rstrip("x").replace("kbits/s", ""))
+    except ValueError:
+        return 0.0  # "N/A"
+
+def _to_bytes(value: str) -> int:
+    match = _SIZE_RE.match(value)
+    if not match:
+        return 0
+    return int(float(match.group(1)) * _SIZE_UNITS.get(match.group(2).lower(), 1))
+
+def parse_stats_line(line: str) -> Optional[Dict[str, str]]:
+    """Returns the key/value fields of a stats line, or None for any other output."""
+    fields = {key.lstrip("L"): value for key, value in _STAT_RE.findall(line)}
+    return fields if "time" in fields else None
+
+class ProgressTracker:
+    """Turns a stream of ffmpeg output lines into ProgressStats snapshots."""
+    def __init__(self, duration: float):
+        self.duration = duration
+        self.started = time.monotonic()
+        self.latest = ProgressStats(duration=duration)
+
+    def feed(self, line: str) -> Optional[ProgressStats]:
+        fields = parse_stats_line(line)
+        if fields is None:
+            return None
+        self.latest = ProgressStats(
+            out_seconds=max(0.0, time_to_seconds(fields["time"])),
+            duration=self.duration,
+            frame=int(_to_float(fields.get("frame", "0"))),
+            fps=_to_float(fields.get("fps", "0")),
+            speed=_to_float(fields.get("speed", "0")),
+            bitrate_kbps=_to_float(fields.get("bitrate", "0")),
+            bytes_written=_to_bytes(fields.get("size", "")),
+            elapsed=time.monotonic() - self.started,
+        )
+        return self.latest
+
+def run_ffmpeg(command: List[str], duration: float,
+               on_stats: Optional[Callable[[ProgressStats], None]] = None,
+               stop_check: Callable[[], bool] = lambda: False) -> ProgressStats:
+    """
+    Runs an ffmpeg command, calling `on_stats` for every stats line. Returns the last
+    snapshot; raises InterruptedError when `stop_check` asks to stop and
+    CalledProcessError (with the output tail) when ffmpeg fails.
+    """
+    with tracing.span("ffmpeg", "subprocess", command=command) as span:
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            bufsize=1,
+            creationflags=CREATE_NO_WINDOW
+        )
+        tracing.instant("ffmpeg launched", "subprocess", pid=process.pid)
+        tracker = ProgressTracker(duration)
+        output_tail = deque(maxlen=OUTPUT_TAIL_LINES)
+        for line in iter(process.stdout.readline, ""):
+            output_tail.append(line)
+            if stop_check():
+                process.terminate(); process.wait()
+                raise InterruptedError("Process cancelled by user.")
+            stats = tracker.feed(line)
+            if stats and on_stats:
+                on_stats(stats)
+        process.wait()
+        span.set(returncode=process.returncode, fps=tracker.latest.fps, speed=tracker.latest.speed)
+    if process.returncode != 0:
+        output = ''.join(output_tail)
+        raise subprocess.CalledProcessError(returncode=process.returncode, cmd=command, output=output, stderr=output)
+    return tracker.latest
@@ -1,111 +1,340 @@
 # file_handler.py
 # Updated to use a list of path mappings for flexible transfers.
 
-import shutil
-import json
+import os
+import sys
+import argparse
+import threading
+import concurrent.futures
+from collections import defaultdict, deque
 from pathlib import Path
 import logging
 from datetime import datetime
-from typing import List, Callable, Dict
+from typing import List, Callable, Dict, Optional, Tuple
 
 from models import MediaFile
+import copy_engine
+import metrics
+import tracing
+from move_journal import MoveJournal
+from path_index import PathMappingIndex, normalize_path_parts
 
-LOG_FILE = Path("./move_log.json")
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def read_move_log() -> dict:
-    if not LOG_FILE.exists():
-        return {}
-    try:
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        return {}
+# --- Transfer concurrency ---
+# Each destination root (e.g. the NAS share or a USB archive drive) and each source device
+# gets its own limit, so transfers to different targets run side by side.
+DEFAULT_CONCURRENCY_PER_DESTINATION = 2
+DEFAULT_CONCURRENCY_PER_SOURCE_DEVICE = 2
+DEFAULT_VERIFY_MODE = "sample"
+# Recording checksums hashes each copy while it is written, so the move log has a digest for
+# `verify` and the "digest" delivery check, but the data has to pass through Python buffers.
+# With it off, copies use copy_file_range/sendfile and are checked by the verify mode alone
+# (a sampled read-back by default). On by default so every delivery can be re-verified later.
+DEFAULT_RECORD_CHECKSUMS = True
+DEFAULT_VERIFY_WORKERS = 4
 
-def write_move_log(log_data: dict):
-    try:
-        with open(LOG_FILE, "w", encoding="utf-8") as f:
-            json.dump(log_data, f, indent=4)
-    except IOError as e:
-        logging.error(f"Could not write to log file: {e}")
+def _device_id(path: Path) -> int:
+    """Returns the device of `path`, or of its nearest existing parent."""
+    for candidate in [path, *path.parents]:
+        try:
+            return os.stat(candidate).st_dev
+        except OSError:
+            continue
+    return -1
+
+def _find_destination(media: MediaFile, converted_file_path: Path, mapping_index: PathMappingIndex) -> Tuple[Optional[Path], Optional[Path], Optional[str]]:
+    """Returns (final destination path, source root, destination root) for the most specific mapping."""
+    mapping = mapping_index.lookup(media.source_path)
+    if mapping is None:
+        return None, None, None
+    return Path(mapping["destination"]) / converted_file_path.name, Path(mapping["source"]), mapping["destination"]
 
 def move_converted_files(
     media_files: List[MediaFile], 
     path_mappings: List[Dict[str, str]],
     dry_run: bool = False,
-    progress_callback: Callable = None
+    progress_callback: Callable = None,
+    max_concurrent_per_destination: int = DEFAULT_CONCURRENCY_PER_DESTINATION,
+    max_concurrent_per_source_device: int = DEFAULT_CONCURRENCY_PER_SOURCE_DEVICE,
+    buffer_size: int = copy_engine.DEFAULT_BUFFER_SIZE,
+    verify: str = DEFAULT_VERIFY_MODE,
+    hash_algorithm: Optional[str] = copy_engine.default_hash_algorithm(),
+    record_checksums: bool = DEFAULT_RECORD_CHECKSUMS
 ):
     """
-    Moves files based on a list of source-to-destination mappings.
+    Moves files based on a list of source-to-destination mappings. Transfers run concurrently,
+    limited per destination root and per source device, and progress is reported in bytes.
+    With `record_checksums`, copies are hashed with `hash_algorithm` while they are written and
+    the digest is stored in the move log; without it, the kernel copies the data. Either way
+    copies are checked according to `verify`.
     """
-    move_log = read_move_log()
-    total_files = len(media_files)
-    
-    for i, media in enumerate(media_files):
+    if not record_checksums:
+        hash_algorithm = None
+    mapping_index = PathMappingIndex(path_mappings)
+    planned: List[Tuple[MediaFile, Path, Path, Path, str]] = []
+
+    for media in media_files:
         converted_file_path = media.destination_path
-        
-        if progress_callback:
-            percent = int(((i + 1) / total_files) * 100)
-            progress_callback(percent, f"Moving file {i+1} of {total_files}: {converted_file_path.name}")
-        
         if not converted_file_path or not converted_file_path.exists():
             logging.warning(f"Skipping '{media.filename}' - converted file not found at '{converted_file_path}'.")
             continue
 
         # Find the correct destination from the mappings
-        final_destination_path = None
-        source_root_for_cleanup = None
-        for mapping in path_mappings:
-            source_root = Path(mapping["source"])
-            
-            # FIXED: Check if the file's parent is the source root OR a subdirectory of the source root.
-            if media.source_path.parent == source_root or source_root in media.source_path.parents:
-                final_destination_path = Path(mapping["destination"]) / converted_file_path.name
-                source_root_for_cleanup = source_root
-                break
-        
+        final_destination_path, source_root_for_cleanup, destination_root = _find_destination(media, converted_file_path, mapping_index)
         if not final_destination_path:
             logging.error(f"No valid path mapping found for source '{media.source_path}'. Skipping.")
             continue
-        
-        try:
-            if dry_run:
-                print(f"[DRY RUN] Would move: '{converted_file_path}' -> '{final_destination_path}'")
-                media.status = "Transferred (Dry Run)"
-                continue
 
+        if dry_run:
+            print(f"[DRY RUN] Would move: '{converted_file_path}' -> '{final_destination_path}'")
+            media.status = "Transferred (Dry Run)"
+            continue
+        planned.append((media, converted_file_path, final_destination_path, source_root_for_cleanup, destination_root))
+
+    if not planned:
+        logging.info("--- File transfer process complete. ---")
+        return media_files
+
+    # Jobs wait in one queue per (destination root, source device) pair and are only handed to a
+    # thread once both limits have room, so a backlog for one destination never holds up another.
+    destination_limit = max(1, max_concurrent_per_destination)
+    source_limit = max(1, max_concurrent_per_source_device)
+    queues: Dict[Tuple[str, int], deque] = {}
+    for job in planned:
+        queues.setdefault((job[4], _device_id(job[1])), deque()).append(job)
+    running_per_destination: Dict[str, int] = defaultdict(int)
+    running_per_source: Dict[int, int] = defaultdict(int)
+    slot_freed = threading.Condition()
+
+    total_bytes = sum(path.stat().st_size for _media, path, *_rest in planned) or 1
+    progress = {"bytes": 0, "files": 0, "percent": -1}
+    progress_lock = threading.Lock()
+    cleanup_lock = threading.Lock()
+
+    def report_bytes(count: int, name: str):
+        with progress_lock:
+            progress["bytes"] += count
+            percent = min(100, int(progress["bytes"] * 100 / total_bytes))
+            if percent == progress["percent"]:
+                return
+            progress["percent"] = percent
+            files_done = progress["files"]
+        if progress_callback:
+            progress_callback(percent, f"Moving files ({files_done}/{len(planned)} done): {name}")
+
+    def transfer(media: MediaFile, converted_file_path: Path, final_destination_path: Path, source_root_for_cleanup: Path, destination_root: str):
+        try:
             final_destination_path.parent.mkdir(parents=True, exist_ok=True)
             
             logging.info(f"Moving '{converted_file_path.name}' to '{final_destination_path}'...")
-            shutil.move(str(converted_file_path), str(final_destination_path))
+            with metrics.record_job("transfer", media=media, encoder=f"verify={verify}",
+                                    encoder_settings={"buffer_size": buffer_size, "hash": hash_algorithm}) as job, \
+                 tracing.span("move_file", file=converted_file_path.name, destination=destination_root):
+                job.input_bytes = converted_file_path.stat().st_size
+                digest = copy_engine.move_file(converted_file_path, final_destination_path, lambda n: report_bytes(n, converted_file_path.name),
+                                               buffer_size, hash_algorithm, verify)
+                job.output_bytes = final_destination_path.stat().st_size
             
             media.status = "Transferred"
             logging.info(f"Successfully moved '{final_destination_path.name}'.")
-            move_log[str(media.source_path)] = {
+            entry = {
                 "final_destination": str(final_destination_path),
                 "status": "Moved",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": datetime.now().isoformat(),
+                "size": final_destination_path.stat().st_size
             }
-            
-            original_parent_dir = media.source_path.parent
-            if not media.source_path.exists() and original_parent_dir.exists():
-                if original_parent_dir != source_root_for_cleanup:
-                    if not any(original_parent_dir.iterdir()):
-                        logging.info(f"Source folder '{original_parent_dir}' is empty. Deleting.")
-                        original_parent_dir.rmdir()
+            if digest:
+                entry["digest"] = digest
+            journal.record(str(media.source_path), entry)
+
+            with cleanup_lock:
+                original_parent_dir = media.source_path.parent
+                if not media.source_path.exists() and original_parent_dir.exists():
+                    if original_parent_dir != source_root_for_cleanup:
+                        if not any(original_parent_dir.iterdir()):
+                            logging.info(f"Source folder '{original_parent_dir}' is empty. Deleting.")
+                            original_parent_dir.rmdir()
 
         except Exception as e:
             media.status = "Transfer Error"
             media.error_message = str(e)
             logging.error(f"Failed to move '{converted_file_path.name}': {e}")
-            move_log[str(media.source_path)] = {
+            journal.record(str(media.source_path), {
                 "final_destination": str(final_destination_path),
                 "status": "Failed",
                 "error": str(e),
                 "timestamp": datetime.now().isoformat()
-            }
+            })
+        finally:
+            with progress_lock:
+                progress["files"] += 1
+
+    def run_admitted(job: Tuple[MediaFile, Path, Path, Path, str], source_device: int):
+        try:
+            transfer(*job)
         finally:
-            write_move_log(move_log)
+            with slot_freed:
+                running_per_destination[job[4]] -= 1
+                running_per_source[source_device] -= 1
+                slot_freed.notify()
+
+    # Admitted jobs never block, so one thread per destination slot is enough.
+    destinations = {destination_root for destination_root, _device in queues}
+    max_workers = min(len(planned), len(destinations) * destination_limit)
+    futures = []
+    with MoveJournal() as journal, concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        with slot_freed:
+            while queues:
+                key = next((key for key in queues
+                            if running_per_destination[key[0]] < destination_limit and running_per_source[key[1]] < source_limit), None)
+                if key is None:
+                    slot_freed.wait()
+                    continue
+                job = queues[key].popleft()
+                if not queues[key]:
+                    del queues[key]
+                running_per_destination[key[0]] += 1
+                running_per_source[key[1]] += 1
+                tracing.instant("transfer admitted", file=job[1].name, destination=key[0])
+                futures.append(executor.submit(run_admitted, job, key[1]))
+        for future in futures:
+            future.result()
 
     logging.info("--- File transfer process complete. ---")
-    return media_files
\ No newline at end of file
+    return media_files
+
+DELIVERY_CHECKS = ("exists", "size", "digest")
+
+def _is_delivered(entry: dict, expected_destination: Path, check: str) -> bool:
+    """True if the journal entry shows `expected_destination` was delivered and it still passes `check`."""
+    if entry.get("status") != "Moved":
+        return False
+    if normalize_path_parts(entry["final_destination"]) != normalize_path_parts(expected_destination):
+        return False  # Mapping or filename template changed since the transfer
+    try:
+        stat = expected_destination.stat()
+    except OSError:
+        return False
+    if check in ("size", "digest") and entry.get("size") is not None and stat.st_size != entry["size"]:
+        return False
+    if check == "digest" and entry.get("digest"):
+        algorithm = entry["digest"].split(":", 1)[0]
+        return copy_engine.hash_file(expected_destination, algorithm) == entry["digest"]
+    return True
+
+def mark_already_delivered(media_files: List[MediaFile], path_mappings: List[Dict[str, str]],
+                           filename_template: str, check: str = "size") -> List[MediaFile]:
+    """
+    Pre-flight check before converting: files whose output the move log shows was already
+    delivered to their mapped destination are marked "Done", so no ffmpeg process is started
+    for them. `check` is one of DELIVERY_CHECKS. Returns the files that were marked.
+    """
+    mapping_index = PathMappingIndex(path_mappings)
+    delivered = []
+    with MoveJournal() as journal:
+        for media in media_files:
+            entry = journal.lookup(str(media.source_path))
+            mapping = mapping_index.lookup(media.source_path)
+            if not entry or not mapping:
+                continue
+            output_filename = media.generate_filename_from_template(filename_template)
+            expected_destination = Path(mapping["destination"]) / output_filename
+            try:
+                if not _is_delivered(entry, expected_destination, check):
+                    continue
+            except OSError as e:
+                logging.warning(f"Could not check delivered file '{expected_destination}': {e}")
+                continue
+            media.output_filename = output_filename
+            media.destination_path = expected_destination
+            media.converted_size_gb = entry.get("size", 0) / (1024**3)
+            media.needs_conversion = False
+            media.status = "Done"
+            delivered.append(media)
+            logging.info(f"'{media.filename}' was already delivered to '{expected_destination}'. Skipping.")
+    return delivered
+
+def read_move_log() -> Dict[str, dict]:
+    """Returns the latest move log entry for every source path."""
+    with MoveJournal() as journal:
+        return journal.entries()
+
+def compact_move_log() -> int:
+    with MoveJournal() as journal:
+        return journal.compact()
+
+def _verify_destination(entry: dict) -> Tuple[str, Optional[float]]:
+    """Re-hashes a delivered file. Returns (result, destination mtime)."""
+    destination = Path(entry["final_destination"])
+    try:
+        stat = destination.stat()
+    except OSError:
+        return "Missing", None
+    if entry.get("size") is not None and stat.st_size != entry["size"]:
+        return "Size Mismatch", stat.st_mtime
+    algorithm = entry["digest"].split(":", 1)[0]
+    digest = copy_engine.hash_file(destination, algorithm)
+    return ("OK" if digest == entry["digest"] else "Checksum Mismatch"), stat.st_mtime
+
+def verify_library(max_workers: int = DEFAULT_VERIFY_WORKERS, force: bool = False,
+                   progress_callback: Callable = None) -> Dict[str, str]:
+    """
+    Re-checks delivered files against the digests stored in the move log, in parallel.
+    Files already verified OK whose modification time has not changed are skipped unless
+    `force` is set. Returns {source path: result} for the files that were checked.
+    """
+    results: Dict[str, str] = {}
+    with MoveJournal() as journal:
+        pending = []
+        for source, entry in journal.entries().items():
+            if entry.get("status") != "Moved" or not entry.get("digest"):
+                continue
+            if not force and entry.get("verify_result") == "OK":
+                try:
+                    if Path(entry["final_destination"]).stat().st_mtime == entry.get("verified_mtime"):
+                        continue
+                except OSError:
+                    pass
+            pending.append((source, entry))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {executor.submit(_verify_destination, entry): (source, entry) for source, entry in pending}
+            for done, future in enumerate(concurrent.futures.as_completed(futures), start=1):
+                source, entry = futures[future]
+                try:
+                    result, mtime = future.result()
+                except OSError as e:
+                    result, mtime = f"Read Error: {e}", None
+                results[source] = result
+                journal.record(source, {**entry, "verify_result": result, "verified_mtime": mtime,
+                                        "verified_at": datetime.now().isoformat()})
+                if result != "OK":
+                    logging.error(f"Verification failed for '{entry['final_destination']}': {result}")
+                if progress_callback:
+                    progress_callback(int(done * 100 / len(pending)), f"Verified {done} of {len(pending)} files")
+    return results
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Transfer log maintenance.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("compact-log", help="Rewrite the move journal keeping only the latest entry per file.")
+    verify_parser = subparsers.add_parser("verify-library", help="Re-check delivered files against their stored checksums.")
+    verify_parser.add_argument("--workers", type=int, default=DEFAULT_VERIFY_WORKERS, help="Files to verify in parallel.")
+    verify_parser.add_argument("--force", action="store_true", help="Also re-check files already verified and unchanged.")
+    args = parser.parse_args(argv)
+
+    if args.command == "compact-log":
+        count = compact_move_log()
+        print(f"Move journal compacted to {count} entries.")
+    elif args.command == "verify-library":
+        results = verify_library(max_workers=args.workers, force=args.force)
+        failed = {source: result for source, result in results.items() if result != "OK"}
+        print(f"Verified {len(results)} file(s): {len(results) - len(failed)} OK, {len(failed)} failed.")
+        for source, result in failed.items():
+            print(f"  {result}: {source}")
+        return 1 if failed else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
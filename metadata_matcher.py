@@ -0,0 +1,154 @@
+# metadata_matcher.py
+# This module matches many files to TMDb entries at once. Searches run on a bounded thread
+# pool behind a shared token-bucket rate limiter; confident matches fill in title and year,
+# and ambiguous ones are returned for review.
+
+import re
+import time
+import threading
+import concurrent.futures
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import List, Dict, Optional, Callable, Tuple, Any
+
+from models import MediaFile
+import tmdb_client
+
+DEFAULT_MATCH_WORKERS = 4
+DEFAULT_REQUESTS_PER_SECOND = 4.0   # Well under TMDb's published limits
+DEFAULT_BURST = 8
+AUTO_ACCEPT_SCORE = 0.85            # Best candidate must score at least this...
+AMBIGUITY_MARGIN = 0.08             # ...and beat the runner-up by this much
+MAX_CANDIDATES = 5
+
+_YEAR_RE = re.compile(r'\b(19|20)\d{2}\b')
+
+def clean_search_query(filename: str) -> str:
+    clean_title = Path(filename).stem
+    delimiters = [
+        r'(19|20)\d{2}', '4k', '2160p', '1080p', '720p', '480p',
+        'bluray', 'web-dl', 'webdl', 'webrip', 'hdrip', 'dvdrip', 'brrip', 'hdtv',
+        'extended', 'uncut', 'remastered', 'theatrical',
+    ]
+    split_pattern = r'\b(' + '|'.join(delimiters) + r')\b'
+    clean_title = re.split(split_pattern, clean_title, maxsplit=1, flags=re.IGNORECASE)[0]
+    clean_title = re.sub(r'[\._-]', ' ', clean_title)
+    clean_title = ' '.join(clean_title.split()).strip()
+    return clean_title
+
+def extract_year(filename: str) -> Optional[str]:
+    year_match = _YEAR_RE.search(filename)
+    return year_match.group(0) if year_match else None
+
+class TokenBucket:
+    """Thread-safe token bucket: allows `rate` acquisitions per second with bursts up to `capacity`."""
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+@dataclass
+class MatchResult:
+    """Outcome for one file. `status` is "matched", "review" or "no match"."""
+    media: MediaFile
+    query: str
+    year: Optional[str]
+    status: str
+    candidates: List[Tuple[float, Dict[str, Any]]] = field(default_factory=list)
+
+    @property
+    def best(self) -> Optional[Dict[str, Any]]:
+        return self.candidates[0][1] if self.candidates else None
+
+def normalize_title(title: str) -> str:
+    title = re.sub(r"[^\w\s]", " ", title.casefold())
+    return " ".join(word for word in title.split() if word not in ("the", "a", "an"))
+
+def release_year(movie: Dict[str, Any]) -> Optional[str]:
+    year = (movie.get("release_date") or "").split("-")[0]
+    return year if len(year) == 4 and year.isdigit() else None
+
+def score_candidate(query: str, year: Optional[str], movie: Dict[str, Any]) -> float:
+    """Scores a search result from 0 to 1 by title similarity, adjusted for the release year."""
+    wanted = normalize_title(query)
+    score = max(
+        SequenceMatcher(None, wanted, normalize_title(movie.get(key) or "")).ratio()
+        for key in ("title", "original_title")
+    )
+    movie_year = release_year(movie)
+    if year and movie_year:
+        difference = abs(int(year) - int(movie_year))
+        if difference == 0:
+            score += 0.1
+        elif difference > 1:  # Off-by-one years are common between regional releases
+            score -= 0.3
+    return max(0.0, min(1.0, score))
+
+def match_one(media: MediaFile, rate_limiter: Optional[TokenBucket] = None) -> MatchResult:
+    query = clean_search_query(media.filename)
+    year = extract_year(media.filename)
+    results = tmdb_client.search_movie(query, year, rate_limiter=rate_limiter)
+    if not results and year:
+        # The year in the filename is sometimes wrong; retry without it.
+        results = tmdb_client.search_movie(query, None, rate_limiter=rate_limiter)
+    candidates = sorted(((score_candidate(query, year, movie), movie) for movie in results),
+                        key=lambda pair: pair[0], reverse=True)[:MAX_CANDIDATES]
+    if not candidates:
+        return MatchResult(media, query, year, "no match")
+    best_score = candidates[0][0]
+    runner_up = candidates[1][0] if len(candidates) > 1 else 0.0
+    confident = best_score >= AUTO_ACCEPT_SCORE and best_score - runner_up >= AMBIGUITY_MARGIN
+    return MatchResult(media, query, year, "matched" if confident else "review", candidates)
+
+def apply_match(media: MediaFile, movie: Dict[str, Any]):
+    """Fills in the title and year from a TMDb result."""
+    media.title = movie.get("title") or media.title
+    year = release_year(movie)
+    media.year = int(year) if year else media.year
+
+def auto_match(media_files: List[MediaFile], max_workers: int = DEFAULT_MATCH_WORKERS,
+               requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+               progress_callback: Callable = None, stop_check: Callable = None) -> List[MatchResult]:
+    """
+    Searches TMDb for every file concurrently. Confident matches are applied to the files
+    straight away; all results are returned so ambiguous ones can be reviewed.
+    """
+    rate_limiter = TokenBucket(requests_per_second, DEFAULT_BURST)
+    results: List[MatchResult] = []
+    if not media_files:
+        return results
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(match_one, media, rate_limiter): media for media in media_files}
+        for done, future in enumerate(concurrent.futures.as_completed(futures), start=1):
+            if stop_check and stop_check():
+                for pending in futures:
+                    pending.cancel()
+                break
+            media = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[DEBUG] Matching '{media.filename}' failed: {e}")
+                result = MatchResult(media, clean_search_query(media.filename), extract_year(media.filename), "no match")
+            if result.status == "matched":
+                apply_match(media, result.best)
+            results.append(result)
+            if progress_callback:
+                progress_callback(int(done * 100 / len(futures)), f"Matched {done} of {len(futures)}: {media.filename}")
+    return results
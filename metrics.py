@@ -0,0 +1,260 @@
+# metrics.py
+# This module records timing and size data for every scan, remux, encode and transfer in a
+# local SQLite database, and reports throughput per codec, resolution, encoder and source
+# device so runs can be compared.
+
+import os
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import argparse
+import threading
+import contextlib
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+METRICS_DB = Path(os.getenv("APPDATA", Path.home())) / "MediaConverter" / "metrics.sqlite3"
+RUN_ID = datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]  # One run per app session
+REGRESSION_THRESHOLD = 0.2  # Latest run slower than earlier runs by more than this share is flagged
+JOB_KINDS = ("scan", "remux", "encode", "transfer")
+GROUP_COLUMNS = {"codec": "video_codec", "resolution": "resolution", "encoder": "encoder", "device": "source_device"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    status TEXT,
+    source TEXT,
+    source_device TEXT,
+    video_codec TEXT,
+    resolution TEXT,
+    classification TEXT,
+    encoder TEXT,
+    encoder_settings TEXT,
+    wall_seconds REAL,
+    cpu_seconds REAL,
+    media_seconds REAL,
+    avg_fps REAL,
+    avg_speed REAL,
+    input_bytes INTEGER,
+    output_bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS jobs_kind_run ON jobs (kind, run_id);
+"""
+
+@dataclass
+class JobRecord:
+    """One measured job. Fields can be filled in while the job runs."""
+    kind: str
+    source: Optional[str] = None
+    source_device: Optional[str] = None
+    video_codec: Optional[str] = None
+    resolution: Optional[str] = None
+    classification: Optional[str] = None
+    encoder: Optional[str] = None
+    encoder_settings: Dict[str, Any] = field(default_factory=dict)
+    media_seconds: float = 0.0
+    avg_fps: float = 0.0
+    avg_speed: float = 0.0
+    input_bytes: int = 0
+    output_bytes: int = 0
+    status: str = "ok"
+
+    def describe_media(self, media) -> "JobRecord":
+        """Fills in the source-file fields from a MediaFile."""
+        self.source = str(media.source_path)
+        self.source_device = _device_label(media.source_path)
+        self.video_codec = media.video_codec
+        self.resolution = _resolution_label(media.video_width)
+        self.classification = media.classify()
+        self.media_seconds = media.duration_seconds
+        try:
+            self.input_bytes = media.source_path.stat().st_size
+        except OSError:
+            pass
+        return self
+
+    def add_stats(self, stats):
+        """Records the averages of a finished ffmpeg run from its last ProgressStats."""
+        if stats is None or stats.elapsed <= 0:
+            return
+        self.avg_fps = stats.frame / stats.elapsed if stats.frame else stats.fps
+        self.avg_speed = stats.out_seconds / stats.elapsed if stats.out_seconds else stats.speed
+
+def _resolution_label(width: int) -> Optional[str]:
+    """Groups frame widths into the usual resolution classes (cropped widths vary)."""
+    if not width:
+        return None
+    for min_width, label in ((3200, "2160p"), (1800, "1080p"), (1200, "720p")):
+        if width >= min_width:
+            return label
+    return "SD"
+
+def _device_label(path: Path) -> Optional[str]:
+    """The drive (Windows) or mount point (elsewhere) a file lives on."""
+    if path.drive:
+        return path.drive.upper()
+    for candidate in [path, *path.parents]:
+        if os.path.ismount(candidate):
+            return str(candidate)
+    return None
+
+class MetricsStore:
+    """Thin wrapper around the metrics database. Connections are opened per call, so any thread may record."""
+    def __init__(self, path: Path = METRICS_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            conn.executescript(_SCHEMA)
+            self._initialized = True
+        return conn
+
+    def insert(self, record: JobRecord, started_at: str, wall_seconds: float, cpu_seconds: float, run_id: Optional[str] = None):
+        row = asdict(record)
+        row["encoder_settings"] = json.dumps(record.encoder_settings, sort_keys=True)
+        row.update(run_id=run_id or RUN_ID, started_at=started_at, wall_seconds=wall_seconds, cpu_seconds=cpu_seconds)
+        columns = ", ".join(row)
+        with self._lock, contextlib.closing(self._connect()) as conn, conn:
+            conn.execute(f"INSERT INTO jobs ({columns}) VALUES ({', '.join('?' * len(row))})", list(row.values()))
+
+    def query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock, contextlib.closing(self._connect()) as conn:
+            return conn.execute(sql, params).fetchall()
+
+_store = MetricsStore()
+
+def use_store(store: MetricsStore):
+    """Sends later records to another database, e.g. to keep benchmark runs out of the main one."""
+    global _store
+    _store = store
+
+def _cpu_seconds() -> float:
+    """CPU time of this process plus its waited-for children (ffmpeg, mkvmerge). Children are
+    not counted on Windows, and concurrent jobs share the same counters."""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+@contextlib.contextmanager
+def record_job(kind: str, media=None, store: Optional[MetricsStore] = None, **fields) -> Iterator[JobRecord]:
+    """
+    Measures the wall and CPU time of the enclosed block and stores a JobRecord for it.
+    The record is yielded so the block can add sizes and stats; an exception marks it
+    "error" and is re-raised. Failing to write metrics never fails the job.
+    """
+    record = JobRecord(kind=kind, **fields)
+    if media is not None:
+        record.describe_media(media)
+    started_at = datetime.now().isoformat(timespec="seconds")
+    wall_start, cpu_start = time.perf_counter(), _cpu_seconds()
+    try:
+        yield record
+    except BaseException as e:
+        record.status = "cancelled" if isinstance(e, InterruptedError) else "error"
+        raise
+    finally:
+        wall_seconds = time.perf_counter() - wall_start
+        try:
+            (store or _store).insert(record, started_at, wall_seconds, _cpu_seconds() - cpu_start)
+        except (sqlite3.Error, OSError) as e:
+            print(f"[DEBUG] Could not record metrics: {e}")
+
+# --- Reporting ---
+
+def _throughput_sql(group_column: str) -> str:
+    # Throughput is media seconds per wall second for remux/encode jobs, and MB/s for transfers and scans.
+    return f"""
+        SELECT kind, COALESCE({group_column}, '?') AS grp, run_id,
+               COUNT(*) AS jobs,
+               SUM(wall_seconds) AS wall,
+               SUM(cpu_seconds) AS cpu,
+               SUM(media_seconds) AS media,
+               SUM(input_bytes) AS bytes_in,
+               SUM(output_bytes) AS bytes_out,
+               AVG(NULLIF(avg_fps, 0)) AS fps
+        FROM jobs WHERE status = 'ok' {{where}}
+        GROUP BY kind, grp, run_id
+        ORDER BY kind, grp, MIN(started_at)
+    """
+
+def _rate(row: sqlite3.Row) -> float:
+    wall = row["wall"] or 0
+    if wall <= 0:
+        return 0.0
+    if row["kind"] in ("remux", "encode") and row["media"]:
+        return row["media"] / wall
+    return (row["bytes_in"] or 0) / wall / (1024 ** 2)
+
+def build_report(group_by: str = "codec", kind: Optional[str] = None, store: Optional[MetricsStore] = None) -> List[Dict[str, Any]]:
+    """
+    Aggregates successful jobs per (kind, group). Each entry carries the throughput of the
+    latest run, the mean of earlier runs, and whether the latest run is a regression.
+    """
+    where, params = ("AND kind = ?", (kind,)) if kind else ("", ())
+    rows = (store or _store).query(_throughput_sql(GROUP_COLUMNS[group_by]).format(where=where), params)
+    groups: Dict[tuple, List[sqlite3.Row]] = {}
+    for row in rows:
+        groups.setdefault((row["kind"], row["grp"]), []).append(row)
+
+    report = []
+    for (job_kind, group), runs in groups.items():
+        latest, earlier = runs[-1], runs[:-1]
+        latest_rate = _rate(latest)
+        earlier_rates = [rate for rate in (_rate(run) for run in earlier) if rate > 0]
+        baseline = sum(earlier_rates) / len(earlier_rates) if earlier_rates else None
+        report.append({
+            "kind": job_kind, "group": group, "runs": len(runs),
+            "jobs": sum(run["jobs"] for run in runs),
+            "unit": "x realtime" if job_kind in ("remux", "encode") and latest["media"] else "MB/s",
+            "latest_rate": latest_rate, "baseline_rate": baseline,
+            "avg_fps": latest["fps"],
+            "cpu_per_wall": (latest["cpu"] or 0) / latest["wall"] if latest["wall"] else None,
+            "regression": bool(baseline and latest_rate < baseline * (1 - REGRESSION_THRESHOLD)),
+        })
+    return report
+
+def print_report(report: List[Dict[str, Any]], group_by: str):
+    if not report:
+        print("No metrics recorded yet.")
+        return
+    print(f"{'Kind':<9} {group_by.capitalize():<24} {'Runs':>4} {'Jobs':>5} {'Latest':>10} {'Earlier':>10} {'FPS':>7} {'CPU/wall':>8}")
+    for entry in report:
+        baseline = f"{entry['baseline_rate']:.2f}" if entry["baseline_rate"] is not None else "-"
+        fps = f"{entry['avg_fps']:.1f}" if entry["avg_fps"] else "-"
+        cpu = f"{entry['cpu_per_wall']:.2f}" if entry["cpu_per_wall"] is not None else "-"
+        flag = "  << REGRESSION" if entry["regression"] else ""
+        print(f"{entry['kind']:<9} {str(entry['group'])[:24]:<24} {entry['runs']:>4} {entry['jobs']:>5} "
+              f"{entry['latest_rate']:>10.2f} {baseline:>10} {fps:>7} {cpu:>8}  {entry['unit']}{flag}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Conversion performance metrics.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    report_parser = subparsers.add_parser("report", help="Throughput per group, comparing the latest run with earlier runs.")
+    report_parser.add_argument("--by", choices=sorted(GROUP_COLUMNS), default="codec", help="Group jobs by this field.")
+    report_parser.add_argument("--kind", choices=JOB_KINDS, help="Only report one kind of job.")
+    report_parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args(argv)
+
+    if args.command == "report":
+        report = build_report(args.by, args.kind)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_report(report, args.by)
+        return 1 if any(entry["regression"] for entry in report) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+# mkv_header.py
+# This module edits Matroska header elements (segment title, track names and flags) in place,
+# the way mkvpropedit does, so small metadata changes do not require a full remux.
+
+import os
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Tuple
+
+# --- EBML element IDs (IDs keep their length marker bits) ---
+ID_EBML = 0x1A45DFA3
+ID_SEGMENT = 0x18538067
+ID_INFO = 0x1549A966
+ID_TRACKS = 0x1654AE6B
+ID_CLUSTER = 0x1F43B675
+ID_VOID = 0xEC
+ID_CRC32 = 0xBF
+ID_TITLE = 0x7BA9
+ID_TRACK_ENTRY = 0xAE
+ID_TRACK_NAME = 0x536E
+ID_FLAG_DEFAULT = 0x88
+ID_FLAG_FORCED = 0x55AA
+
+UNKNOWN_SIZE = -1
+MAX_HEADER_SCAN = 64  # Top-level elements to inspect before giving up on finding Info/Tracks
+
+class MatroskaHeaderError(Exception):
+    """Raised when a file cannot be parsed as Matroska."""
+
+@dataclass
+class TrackPropertyEdit:
+    """Changes to apply to one track. `track_id` is mkvmerge's 0-based track id; None leaves a value unchanged."""
+    track_id: int
+    name: Optional[str] = None
+    is_default: Optional[bool] = None
+    is_forced: Optional[bool] = None
+
+@dataclass
+class _Element:
+    id: int
+    offset: int          # Offset of the element's ID in the file
+    header_size: int     # Bytes used by the ID and size fields
+    size: int            # Payload size, or UNKNOWN_SIZE
+
+    @property
+    def data_offset(self) -> int:
+        return self.offset + self.header_size
+
+    @property
+    def total_size(self) -> int:
+        return self.header_size + self.size
+
+# --- EBML encoding helpers ---
+
+def _vint_length(first_byte: int) -> int:
+    for length in range(1, 9):
+        if first_byte & (0x80 >> (length - 1)):
+            return length
+    raise MatroskaHeaderError("Invalid EBML variable-length integer.")
+
+def _read_id(buf: bytes, pos: int) -> Tuple[int, int]:
+    length = _vint_length(buf[pos])
+    if length > 4 or pos + length > len(buf):
+        raise MatroskaHeaderError("Invalid EBML element ID.")
+    return int.from_bytes(buf[pos:pos + length], "big"), length
+
+def _read_size(buf: bytes, pos: int) -> Tuple[int, int]:
+    length = _vint_length(buf[pos])
+    if pos + length > len(buf):
+        raise MatroskaHeaderError("Truncated EBML element size.")
+    value = int.from_bytes(buf[pos:pos + length], "big") & ((1 << (7 * length)) - 1)
+    if value == (1 << (7 * length)) - 1:
+        value = UNKNOWN_SIZE
+    return value, length
+
+def _encode_id(element_id: int) -> bytes:
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+
+def _encode_size(value: int, length: int = 0) -> bytes:
+    if not length:
+        length = 1
+        while value >= (1 << (7 * length)) - 1:
+            length += 1
+    if length > 8 or value >= (1 << (7 * length)) - 1:
+        raise MatroskaHeaderError(f"Size {value} does not fit in {length} byte(s).")
+    return ((1 << (7 * length)) | value).to_bytes(length, "big")
+
+def _encode_element(element_id: int, payload: bytes, size_length: int = 0) -> bytes:
+    return _encode_id(element_id) + _encode_size(len(payload), size_length) + payload
+
+def _encode_uint(value: int) -> bytes:
+    return value.to_bytes(max(1, (value.bit_length() + 7) // 8), "big")
+
+def _encode_void(total_size: int) -> bytes:
+    """Returns a Void element occupying exactly `total_size` bytes (at least 2)."""
+    for size_length in range(1, 9):
+        payload_size = total_size - 1 - size_length
+        if 0 <= payload_size < (1 << (7 * size_length)) - 1:
+            return _encode_element(ID_VOID, bytes(payload_size), size_length)
+    raise MatroskaHeaderError(f"Cannot create a Void element of {total_size} bytes.")
+
+def _parse_children(payload: bytes) -> List[List]:
+    """Splits a master element's payload into [id, payload] pairs."""
+    children, pos = [], 0
+    while pos < len(payload):
+        element_id, id_length = _read_id(payload, pos)
+        size, size_length = _read_size(payload, pos + id_length)
+        if size == UNKNOWN_SIZE:
+            raise MatroskaHeaderError("Unknown-size element inside a header element.")
+        start = pos + id_length + size_length
+        children.append([element_id, payload[start:start + size]])
+        pos = start + size
+    return children
+
+def _serialize_children(children: List[List]) -> bytes:
+    """Serializes [id, payload] pairs, recomputing a leading CRC-32 element if there is one."""
+    body = b"".join(_encode_element(cid, data) for cid, data in children if cid != ID_CRC32)
+    if children and children[0][0] == ID_CRC32:
+        crc = zlib.crc32(body).to_bytes(4, "little")
+        return _encode_element(ID_CRC32, crc) + body
+    return body
+
+def _set_child(children: List[List], element_id: int, payload: Optional[bytes]):
+    """Replaces, adds or (with payload None) removes a child element."""
+    for i, (cid, _data) in enumerate(children):
+        if cid == element_id:
+            if payload is None:
+                del children[i]
+            else:
+                children[i][1] = payload
+            return
+    if payload is not None:
+        children.append([element_id, payload])
+
+# --- File access ---
+
+def _read_element_header(f: BinaryIO, offset: int) -> _Element:
+    f.seek(offset)
+    buf = f.read(12)
+    if len(buf) < 2:
+        raise MatroskaHeaderError("Unexpected end of file.")
+    element_id, id_length = _read_id(buf, 0)
+    size, size_length = _read_size(buf, id_length)
+    return _Element(element_id, offset, id_length + size_length, size)
+
+def _find_header_elements(f: BinaryIO) -> List[_Element]:
+    """Returns the top-level children of the Segment up to the first Cluster."""
+    file_size = f.seek(0, os.SEEK_END)
+    ebml = _read_element_header(f, 0)
+    if ebml.id != ID_EBML or ebml.size == UNKNOWN_SIZE:
+        raise MatroskaHeaderError("Not a Matroska file (missing EBML header).")
+    segment = _read_element_header(f, ebml.total_size)
+    if segment.id != ID_SEGMENT:
+        raise MatroskaHeaderError("Not a Matroska file (missing Segment).")
+    end = file_size if segment.size == UNKNOWN_SIZE else min(file_size, segment.data_offset + segment.size)
+
+    elements, offset = [], segment.data_offset
+    while offset < end and len(elements) < MAX_HEADER_SCAN:
+        element = _read_element_header(f, offset)
+        if element.id == ID_CLUSTER or element.size == UNKNOWN_SIZE:
+            break
+        elements.append(element)
+        offset = element.offset + element.total_size
+    return elements
+
+def _build_replacement(elements: List[_Element], index: int, children: List[List]) -> Optional[bytes]:
+    """
+    Returns the bytes that replace a rebuilt master element in place, growing into a directly
+    following Void element if needed and padding any leftover space with a new Void.
+    Returns None if the element does not fit.
+    """
+    element = elements[index]
+    available = element.total_size
+    following = elements[index + 1] if index + 1 < len(elements) else None
+    if following and following.id == ID_VOID:
+        available += following.total_size
+
+    payload = _serialize_children(children)
+    id_bytes = _encode_id(element.id)
+    size_length = max(element.header_size - len(id_bytes), len(_encode_size(len(payload))))
+    new_size = len(id_bytes) + size_length + len(payload)
+    if new_size > available:
+        return None
+    if available - new_size == 1:
+        # A Void needs at least two bytes, so absorb one spare byte in a wider size field.
+        if size_length == 8:
+            return None
+        size_length += 1
+        new_size += 1
+    data = _encode_element(element.id, payload, size_length)
+    if available > new_size:
+        data += _encode_void(available - new_size)
+    return data
+
+def edit_header_in_place(mkv_file: Path, track_edits: List[TrackPropertyEdit] = (), title: Optional[str] = None) -> bool:
+    """
+    Applies the edits directly to the file's Info and Tracks elements. Returns True if all
+    changes were written in place, False if they do not fit (the file is left untouched).
+    An empty `title` or track `name` removes the element.
+    """
+    with open(mkv_file, "r+b") as f:
+        elements = _find_header_elements(f)
+        planned: List[Tuple[int, List[List]]] = []
+
+        if title is not None:
+            info_index = next((i for i, e in enumerate(elements) if e.id == ID_INFO), None)
+            if info_index is None:
+                return False
+            f.seek(elements[info_index].data_offset)
+            info_children = _parse_children(f.read(elements[info_index].size))
+            _set_child(info_children, ID_TITLE, title.encode("utf-8") if title else None)
+            planned.append((info_index, info_children))
+
+        if track_edits:
+            tracks_index = next((i for i, e in enumerate(elements) if e.id == ID_TRACKS), None)
+            if tracks_index is None:
+                return False
+            f.seek(elements[tracks_index].data_offset)
+            tracks_children = _parse_children(f.read(elements[tracks_index].size))
+            entries = [child for child in tracks_children if child[0] == ID_TRACK_ENTRY]
+            for edit in track_edits:
+                if not 0 <= edit.track_id < len(entries):
+                    raise MatroskaHeaderError(f"Track {edit.track_id} does not exist.")
+                entry = entries[edit.track_id]
+                entry_children = _parse_children(entry[1])
+                if edit.name is not None:
+                    _set_child(entry_children, ID_TRACK_NAME, edit.name.encode("utf-8") if edit.name else None)
+                if edit.is_default is not None:
+                    _set_child(entry_children, ID_FLAG_DEFAULT, _encode_uint(int(edit.is_default)))
+                if edit.is_forced is not None:
+                    _set_child(entry_children, ID_FLAG_FORCED, _encode_uint(int(edit.is_forced)))
+                entry[1] = _serialize_children(entry_children)
+            planned.append((tracks_index, tracks_children))
+
+        # Build every replacement before writing, so a file is never half edited.
+        replacements = [(elements[index].offset, _build_replacement(elements, index, children)) for index, children in planned]
+        if any(data is None for _offset, data in replacements):
+            return False
+        for offset, data in replacements:
+            f.seek(offset)
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    return True
@@ -4,10 +4,18 @@
 import subprocess
 import json
 import sys
+import os
+import re
+import threading
+import concurrent.futures
+from collections import defaultdict, deque
 from pathlib import Path
-from typing import List
+from typing import List, Tuple, Dict, Callable, Optional
 import logging
 
+from models import MediaFile
+from mkv_header import TrackPropertyEdit, MatroskaHeaderError, edit_header_in_place
+
 # --- Platform-specific subprocess creation flags ---
 if sys.platform == "win32":
     CREATE_NO_WINDOW = subprocess.CREATE_NO_WINDOW
@@ -22,39 +30,103 @@ MKVTOOLNIX_PATH = Path("C:/Program Files/MKVToolNix/")
 
 MKVMERGE_PATH = MKVTOOLNIX_PATH / "mkvmerge.exe"
 
-def remove_subtitle_tracks(mkv_file: Path, track_ids_to_remove: List[int]) -> bool:
+# Rewrites are I/O bound, so running several against the same disk only causes seeking.
+DEFAULT_WORKERS_PER_DEVICE = 1
+
+def _build_command_from_scan(mkv_file: Path, output_file: Path, media: MediaFile, track_ids_to_remove: List[int]) -> Optional[List[str]]:
+    """Builds the mkvmerge command from an existing scan instead of re-running 'mkvmerge -J'."""
+    if not media.video_codec and not media.audio_codec:
+        logging.error(f"No video or audio tracks found in {mkv_file.name}. Aborting modification.")
+        return None
+    command = [str(MKVMERGE_PATH), "--gui-mode", "-o", str(output_file)]
+    remaining = [t for t in media.subtitle_tracks if t.index not in track_ids_to_remove]
+    if not remaining:
+        command.append("--no-subtitles")
+    else:
+        command.extend(["--subtitle-tracks", "!" + ",".join(str(tid) for tid in track_ids_to_remove)])
+    command.append(str(mkv_file))
+    return command
+
+def _build_command_from_identify(mkv_file: Path, output_file: Path, track_ids_to_remove: List[int]) -> Optional[List[str]]:
+    id_cmd = [str(MKVMERGE_PATH), "-J", str(mkv_file)]
+    result = subprocess.run(id_cmd, check=True, capture_output=True, text=True, encoding='utf-8', creationflags=CREATE_NO_WINDOW)
+    data = json.loads(result.stdout)
+    video_tracks, audio_tracks, subtitle_tracks_to_keep = [], [], []
+    for track in data.get("tracks", []):
+        tid = str(track['id'])
+        if track['type'] == 'video':
+            video_tracks.append(tid)
+        elif track['type'] == 'audio':
+            audio_tracks.append(tid)
+        elif track['type'] == 'subtitles':
+            if track['id'] not in track_ids_to_remove:
+                subtitle_tracks_to_keep.append(tid)
+    if not video_tracks and not audio_tracks:
+        logging.error(f"No video or audio tracks found in {mkv_file.name}. Aborting modification.")
+        return None
+    command = [str(MKVMERGE_PATH), "--gui-mode", "-o", str(output_file), "--video-tracks", ",".join(video_tracks), "--audio-tracks", ",".join(audio_tracks)]
+    if subtitle_tracks_to_keep:
+        command.extend(["--subtitle-tracks", ",".join(subtitle_tracks_to_keep)])
+    else:
+        command.append("--no-subtitles")
+    command.append(str(mkv_file))
+    return command
+
+def _run_mkvmerge_with_progress(command: List[str], progress_callback: Optional[Callable[[int], None]]):
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding='utf-8', errors='replace', creationflags=CREATE_NO_WINDOW)
+    full_output = []
+    for line in iter(process.stdout.readline, ""):
+        full_output.append(line)
+        if progress_callback and (match := re.search(r"progress\s*:?\s*(\d+)%", line, re.IGNORECASE)):
+            progress_callback(int(match.group(1)))
+    process.wait()
+    # mkvmerge uses exit code 1 for warnings; the output is still complete.
+    if process.returncode not in (0, 1):
+        raise subprocess.CalledProcessError(returncode=process.returncode, cmd=command, stderr=''.join(full_output))
+
+def _apply_removal_to_media(media: MediaFile, track_ids_removed: List[int]):
+    """Updates an already-scanned MediaFile so it matches the rewritten file without rescanning."""
+    removed = sorted(track_ids_removed)
+    def new_id(tid: int) -> int:
+        # mkvmerge numbers the output tracks sequentially, so later ids shift down.
+        return tid - sum(1 for r in removed if r < tid)
+
+    media.subtitle_tracks = [t for t in media.subtitle_tracks if t.index not in removed]
+    for ffmpeg_index, track in enumerate(media.subtitle_tracks):
+        track.index = new_id(track.index)
+        track.ffmpeg_index = ffmpeg_index
+    media.pending_subtitle_removals = {new_id(tid) for tid in media.pending_subtitle_removals if tid not in removed}
+    if media.burned_subtitle and media.burned_subtitle not in media.subtitle_tracks:
+        media.burned_subtitle = None
+    if media.source_path.exists():
+        media.original_size_gb = media.source_path.stat().st_size / (1024**3)
+    media.update_flags()
+
+def remove_subtitle_tracks(mkv_file: Path, track_ids_to_remove: List[int], media: Optional[MediaFile] = None,
+                           progress_callback: Optional[Callable[[int], None]] = None) -> bool:
+    """
+    Rewrites an MKV without the given subtitle tracks. When the already-scanned `media`
+    is passed, its track list is used instead of identifying the file again and it is
+    updated in place after a successful rewrite.
+    """
     if not MKVMERGE_PATH.exists():
         logging.error(f"mkvmerge.exe not found at {MKVMERGE_PATH}. Cannot modify file. Please check the MKVTOOLNIX_PATH in mkv_modifier.py.")
         return False
     temp_output_file = mkv_file.with_name(f"{mkv_file.stem}_modified.mkv")
     try:
-        id_cmd = [str(MKVMERGE_PATH), "-J", str(mkv_file)]
-        result = subprocess.run(id_cmd, check=True, capture_output=True, text=True, encoding='utf-8', creationflags=CREATE_NO_WINDOW)
-        data = json.loads(result.stdout)
-        video_tracks, audio_tracks, subtitle_tracks_to_keep = [], [], []
-        for track in data.get("tracks", []):
-            tid = str(track['id'])
-            if track['type'] == 'video':
-                video_tracks.append(tid)
-            elif track['type'] == 'audio':
-                audio_tracks.append(tid)
-            elif track['type'] == 'subtitles':
-                if track['id'] not in track_ids_to_remove:
-                    subtitle_tracks_to_keep.append(tid)
-        if not video_tracks and not audio_tracks:
-            logging.error(f"No video or audio tracks found in {mkv_file.name}. Aborting modification.")
-            return False
-        command = [str(MKVMERGE_PATH), "-o", str(temp_output_file), "--video-tracks", ",".join(video_tracks), "--audio-tracks", ",".join(audio_tracks)]
-        if subtitle_tracks_to_keep:
-            command.extend(["--subtitle-tracks", ",".join(subtitle_tracks_to_keep)])
+        if media is not None:
+            command = _build_command_from_scan(mkv_file, temp_output_file, media, track_ids_to_remove)
         else:
-            command.append("--no-subtitles")
-        command.append(str(mkv_file))
+            command = _build_command_from_identify(mkv_file, temp_output_file, track_ids_to_remove)
+        if not command:
+            return False
         logging.info(f"Rewriting MKV to remove tracks {track_ids_to_remove}: {' '.join(command)}")
-        subprocess.run(command, check=True, capture_output=True, text=True, encoding='utf-8', creationflags=CREATE_NO_WINDOW)
+        _run_mkvmerge_with_progress(command, progress_callback)
         if temp_output_file.exists() and temp_output_file.stat().st_size > 0:
             mkv_file.unlink()
             temp_output_file.rename(mkv_file)
+            if media is not None:
+                _apply_removal_to_media(media, track_ids_to_remove)
             logging.info(f"Successfully removed tracks {track_ids_to_remove} from '{mkv_file.name}'")
             return True
         else:
@@ -67,4 +139,122 @@ def remove_subtitle_tracks(mkv_file: Path, track_ids_to_remove: List[int]) -> bo
         logging.error(f"mkvmerge details: {error_details}")
         if temp_output_file.exists():
             temp_output_file.unlink()
-        return False
\ No newline at end of file
+        return False
+
+def _device_id(path: Path) -> int:
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        return -1
+
+def remove_subtitle_tracks_batch(jobs: List[Tuple[MediaFile, List[int]]],
+                                 max_workers_per_device: int = DEFAULT_WORKERS_PER_DEVICE,
+                                 progress_callback: Optional[Callable] = None,
+                                 stop_check: Callable[[], bool] = lambda: False) -> Dict[str, bool]:
+    """
+    Removes subtitle tracks from many scanned files in parallel. Each physical device runs at
+    most `max_workers_per_device` rewrites at a time. Returns {source path: success}.
+    """
+    jobs = [(media, ids) for media, ids in jobs if ids]
+    results: Dict[str, bool] = {}
+    if not jobs:
+        return results
+
+    # One queue per device, drained by that device's own workers, so a long run of files on one
+    # disk never keeps the others idle. The device is looked up once per job.
+    device_queues: Dict[int, deque] = defaultdict(deque)
+    for media, ids in jobs:
+        device_queues[_device_id(media.source_path)].append((media, ids))
+
+    file_progress: Dict[str, int] = {str(media.source_path): 0 for media, _ids in jobs}
+    lock = threading.Lock()
+
+    def report(media: MediaFile, percent: int):
+        with lock:
+            file_progress[str(media.source_path)] = percent
+            overall = sum(file_progress.values()) // len(file_progress)
+            done = sum(1 for p in file_progress.values() if p >= 100)
+        if progress_callback:
+            progress_callback(overall, f"Stripping subtitles ({done}/{len(jobs)}): {media.filename}")
+
+    def run_job(media: MediaFile, track_ids: List[int]) -> bool:
+        media.status = "Stripping Subtitles"
+        success = remove_subtitle_tracks(media.source_path, track_ids, media=media, progress_callback=lambda p: report(media, p))
+        media.status = "Ready" if success else "Error"
+        if not success:
+            media.error_message = "Failed to remove subtitle tracks. See the application log."
+        report(media, 100)
+        return success
+
+    def drain(queue: deque):
+        while not stop_check():
+            try:
+                media, track_ids = queue.popleft()
+            except IndexError:
+                return
+            try:
+                success = run_job(media, track_ids)
+            except Exception as e:
+                logging.error(f"Subtitle stripping failed for '{media.filename}': {e}")
+                success = False
+            with lock:
+                results[str(media.source_path)] = success
+
+    per_device = max(1, max_workers_per_device)
+    workers = [queue for queue in device_queues.values() for _ in range(min(per_device, len(queue)))]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(workers)) as executor:
+        for future in [executor.submit(drain, queue) for queue in workers]:
+            future.result()
+    for media, _ids in jobs:
+        results.setdefault(str(media.source_path), False)  # Not started before a stop request
+    return results
+
+def _rewrite_properties_with_mkvmerge(mkv_file: Path, track_edits: List[TrackPropertyEdit], title: Optional[str]) -> bool:
+    if not MKVMERGE_PATH.exists():
+        logging.error(f"mkvmerge.exe not found at {MKVMERGE_PATH}. Cannot modify file. Please check the MKVTOOLNIX_PATH in mkv_modifier.py.")
+        return False
+    temp_output_file = mkv_file.with_name(f"{mkv_file.stem}_modified.mkv")
+    command = [str(MKVMERGE_PATH), "--gui-mode", "-o", str(temp_output_file)]
+    if title is not None:
+        command.extend(["--title", title])
+    for edit in track_edits:
+        if edit.name is not None:
+            command.extend(["--track-name", f"{edit.track_id}:{edit.name}"])
+        if edit.is_default is not None:
+            command.extend(["--default-track-flag", f"{edit.track_id}:{int(edit.is_default)}"])
+        if edit.is_forced is not None:
+            command.extend(["--forced-display-flag", f"{edit.track_id}:{int(edit.is_forced)}"])
+    command.append(str(mkv_file))
+    try:
+        logging.info(f"Rewriting MKV to change header properties: {' '.join(command)}")
+        _run_mkvmerge_with_progress(command, None)
+        if temp_output_file.exists() and temp_output_file.stat().st_size > 0:
+            mkv_file.unlink()
+            temp_output_file.rename(mkv_file)
+            return True
+        logging.error(f"Modified file '{temp_output_file.name}' was not created or is empty.")
+        temp_output_file.unlink(missing_ok=True)
+        return False
+    except Exception as e:
+        logging.error(f"Failed to modify MKV file '{mkv_file.name}': {e}")
+        logging.error(f"mkvmerge details: {getattr(e, 'stderr', '')}")
+        temp_output_file.unlink(missing_ok=True)
+        return False
+
+def edit_mkv_properties(mkv_file: Path, track_edits: List[TrackPropertyEdit] = (), title: Optional[str] = None) -> bool:
+    """
+    Changes the segment title and track names/default/forced flags. The header is edited in
+    place when the new values fit in the existing space (including adjacent Void padding);
+    otherwise the file is rewritten with mkvmerge.
+    """
+    track_edits = list(track_edits)
+    if not track_edits and title is None:
+        return True
+    try:
+        if edit_header_in_place(mkv_file, track_edits, title):
+            logging.info(f"Edited header of '{mkv_file.name}' in place.")
+            return True
+        logging.info(f"Header changes for '{mkv_file.name}' do not fit in place. Falling back to a full rewrite.")
+    except (MatroskaHeaderError, OSError) as e:
+        logging.warning(f"In-place header edit of '{mkv_file.name}' failed ({e}). Falling back to a full rewrite.")
+    return _rewrite_properties_with_mkvmerge(mkv_file, track_edits, title)
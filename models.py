@@ -6,9 +6,36 @@ import sys
 import re
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional, Literal
+from typing import Iterable, List, Optional, Literal, Set
 
 SubtitleAction = Literal["burn", "copy", "ignore"]
+StreamAction = Literal["copy", "transcode", "drop"]
+
+# Codecs the MP4 container takes as-is. Names are compared after normalize_codec(), so
+# mkvmerge's "AC-3"/"E-AC-3"/"AVC/H.264/MPEG-4p10" and ffprobe's "ac3"/"eac3"/"h264" all match.
+MP4_VIDEO_CODECS = ("h264", "avc", "hevc", "h265")
+MP4_AUDIO_CODECS = ("aac", "ac3", "eac3")
+MP4_SUBTITLE_CODEC = "mov_text"
+
+# Software fallbacks for the NVENC codecs, used when ConversionSettings.use_nvenc is off
+SOFTWARE_ENCODERS = {"hevc_nvenc": "libx265", "h264_nvenc": "libx264", "hevc": "libx265", "h264": "libx264"}
+
+# Every status a worker leaves a file in once it is done with it. Progress and the queue ETA
+# count these files as complete, and the file list shows their conversion summary.
+FINISHED_STATUSES = (
+    "Converted", "Converted (Basic)", "Dry Run (Basic)", "Skipped", "Skipped (Exists)", "Done",
+    "Transferred", "Transferred (Dry Run)", "Error", "Error (Basic)", "Transfer Error",
+)
+
+def normalize_codec(codec: Optional[str]) -> str:
+    return re.sub(r"[^a-z0-9]", "", (codec or "").lower())
+
+def is_mp4_video_codec(codec: Optional[str]) -> bool:
+    key = normalize_codec(codec)
+    return any(name in key for name in MP4_VIDEO_CODECS)
+
+def is_mp4_audio_codec(codec: Optional[str]) -> bool:
+    return normalize_codec(codec) in MP4_AUDIO_CODECS
 
 @dataclass
 class SubtitleTrack:
@@ -16,14 +43,91 @@ class SubtitleTrack:
     index: int; ffmpeg_index: Optional[int] = None; language: str = "und"; title: Optional[str] = None
     codec: Optional[str] = None; is_default: bool = False; is_forced: bool = False
     is_text_based: bool = False; action: SubtitleAction = "ignore" 
+    # Statistics tags written by mkvmerge; 0 when the muxer did not write them
+    num_frames: int = 0; num_bytes: int = 0; duration_seconds: float = 0.0
+    is_likely_forced: bool = False
 
     def get_display_name(self) -> str:
         parts = [f"Track {self.index}", f"({self.language})"];
         if self.title: parts.append(f"'{self.title}'")
         if self.is_forced: parts.append("[FORCED]")
+        elif self.is_likely_forced: parts.append("[LIKELY FORCED]")
+        if self.is_default: parts.append("[DEFAULT]")
+        return " - ".join(parts)
+
+@dataclass
+class AudioTrack:
+    """Represents a single audio track within a media file."""
+    index: int; ffmpeg_index: int = 0; codec: Optional[str] = None; channels: int = 0
+    language: str = "und"; title: Optional[str] = None; is_default: bool = False
+
+    def get_display_name(self) -> str:
+        parts = [f"Track {self.index}", f"({self.language})", f"{self.codec or '?'} {self.channels}ch"]
+        if self.title: parts.append(f"'{self.title}'")
         if self.is_default: parts.append("[DEFAULT]")
         return " - ".join(parts)
 
+@dataclass
+class StreamPlan:
+    """What happens to one source stream. `source_index` is the stream's position among its type (0:a:N)."""
+    kind: Literal["video", "audio", "subtitle"]
+    source_index: int
+    action: StreamAction
+    source_codec: Optional[str] = None
+    target_codec: Optional[str] = None  # Set for transcodes
+    bitrate: Optional[str] = None
+    name: str = ""
+    reason: str = ""
+
+    def describe(self) -> str:
+        if self.action == "copy":
+            text = f"Copy {self.source_codec or 'stream'}"
+        elif self.action == "transcode":
+            text = f"{self.source_codec or 'stream'} → {(self.target_codec or '?').upper()}" + (f" at {self.bitrate}" if self.bitrate else "")
+        else:
+            text = "Drop"
+        return f"{text} ({self.reason})" if self.reason else text
+
+@dataclass
+class ConversionPlan:
+    """Per-stream copy/transcode/drop decisions for one file, built by MediaFile.build_plan()."""
+    video: Optional[StreamPlan]
+    audio: List[StreamPlan]
+    subtitles: List[StreamPlan]
+    burned_subtitle: Optional[SubtitleTrack] = None
+    remux_only: bool = False  # The fast remux path, which copies video/audio and strips subtitles
+
+    @property
+    def route(self) -> str:
+        """'remux' when every kept stream is copied and no subtitles are kept; 'convert' otherwise."""
+        if self.remux_only:
+            return "remux"
+        if self.video and self.video.action == "transcode":
+            return "convert"
+        if any(stream.action == "transcode" for stream in self.audio):
+            return "convert"
+        if any(stream.action != "drop" for stream in self.subtitles):
+            return "convert"  # The fast remux path strips subtitles
+        return "remux"
+
+    @property
+    def encodes_video(self) -> bool:
+        return bool(self.video and self.video.action == "transcode")
+
+    def streams(self, kind: str, action: Optional[str] = None) -> List[StreamPlan]:
+        streams = {"video": [self.video] if self.video else [], "audio": self.audio, "subtitle": self.subtitles}[kind]
+        return [stream for stream in streams if action is None or stream.action == action]
+
+    def describe_audio(self) -> str:
+        """Short summary for the results view, e.g. "Copied AC-3 6ch; Converted DTS to AC3 640k"."""
+        parts = []
+        for stream in self.audio:
+            if stream.action == "copy":
+                parts.append(f"Copied {stream.name}")
+            elif stream.action == "transcode":
+                parts.append(f"Converted {stream.name} to {(stream.target_codec or '').upper()} {stream.bitrate or ''}".rstrip())
+        return "; ".join(parts) or "None"
+
 @dataclass
 class MediaFile:
     """Represents a single media file to be processed."""
@@ -34,11 +138,13 @@ class MediaFile:
     
     # Metadata fields
     container: str = "N/A"
+    duration_seconds: float = 0.0
     video_codec: Optional[str] = None
     video_width: int = 0
     video_fps: float = 0.0
     audio_codec: Optional[str] = None
     audio_channels: int = 0
+    audio_tracks: List[AudioTrack] = field(default_factory=list)
     
     # NEW: Fields for storing metadata
     title: str = ""
@@ -47,10 +153,13 @@ class MediaFile:
     
     subtitle_tracks: List[SubtitleTrack] = field(default_factory=list)
     burned_subtitle: Optional[SubtitleTrack] = None
+    # Track ids to leave out of the converted output. The source MKV is not rewritten.
+    pending_subtitle_removals: Set[int] = field(default_factory=set)
     status: str = "Pending"; error_message: Optional[str] = None
     has_forced_subtitles: bool = field(init=False, default=False); needs_conversion: bool = True
     original_size_gb: float = 0.0; converted_size_gb: float = 0.0
     use_basic_conversion: bool = False
+    force_remux: bool = False  # User asked for a fast remux regardless of classify()
 
     def __post_init__(self):
         self.filename = self.source_path.name
@@ -60,7 +169,36 @@ class MediaFile:
 
     def update_flags(self):
         self.has_forced_subtitles = any(track.is_forced for track in self.subtitle_tracks)
+
+    @property
+    def kept_subtitle_tracks(self) -> List[SubtitleTrack]:
+        """Subtitle tracks that are not pending removal."""
+        return [t for t in self.subtitle_tracks if t.index not in self.pending_subtitle_removals]
+
+    def mark_subtitles_for_removal(self, track_ids: Iterable[int]):
+        """Drops tracks from the conversion plan; they are left out when the file is converted."""
+        self.pending_subtitle_removals.update(track_ids)
+        for track in self.subtitle_tracks:
+            if track.index in self.pending_subtitle_removals:
+                track.action = "ignore"
+        if self.burned_subtitle and self.burned_subtitle.index in self.pending_subtitle_removals:
+            self.burned_subtitle = None
         
+    def set_burned_subtitle(self, track: Optional[SubtitleTrack]):
+        """Selects the track to burn in (or None), demoting any previously burned track."""
+        for t in self.subtitle_tracks:
+            if t.action == "burn":
+                t.action = "ignore"
+        self.burned_subtitle = track
+        if track:
+            track.action = "burn"
+
+    def apply_selection(self):
+        """Settles the conversion route from the current selection, right before converting."""
+        self.use_basic_conversion = self.force_remux or self.classify() == 'remux'
+        if self.burned_subtitle:
+            self.burned_subtitle.action = "burn"
+
     def generate_filename_from_template(self, template: str) -> str:
         """Generates a filename from a template string and the file's metadata."""
         if not template:
@@ -83,51 +221,108 @@ class MediaFile:
         
         return f"{cleaned_name}.mp4"
 
+    @property
+    def all_audio_tracks(self) -> List[AudioTrack]:
+        """The scanned audio tracks, or the primary track alone for files scanned before tracks were listed."""
+        if self.audio_tracks or not self.audio_codec:
+            return self.audio_tracks
+        return [AudioTrack(index=-1, codec=self.audio_codec, channels=self.audio_channels, is_default=True)]
+
+    def build_plan(self, settings: Optional['ConversionSettings'] = None) -> ConversionPlan:
+        """
+        Decides per stream what the conversion does: the video is re-encoded only to burn in
+        subtitles or when MP4 cannot hold its codec; each audio track is copied when MP4 can hold
+        it and transcoded otherwise; text subtitles marked for copying become mov_text. A forced
+        remux copies everything MP4 can take and drops subtitles.
+        """
+        settings = settings or ConversionSettings()
+        burned = self.burned_subtitle
+        if burned and (self.force_remux or burned.index in self.pending_subtitle_removals):
+            burned = None
+
+        video = None
+        if self.video_codec:
+            video = StreamPlan("video", 0, "copy", self.video_codec, name=self.video_codec)
+            if self.force_remux:
+                video.reason = "fast remux"
+            elif burned:
+                video.action, video.target_codec, video.reason = "transcode", settings.video_encoder, "burning in subtitles"
+            elif not is_mp4_video_codec(self.video_codec):
+                video.action, video.target_codec, video.reason = "transcode", settings.video_encoder, "not supported in MP4"
+
+        audio = []
+        primary = next((t for t in self.all_audio_tracks if t.is_default), None) or next(iter(self.all_audio_tracks), None)
+        for track in self.all_audio_tracks:
+            stream = StreamPlan("audio", track.ffmpeg_index, "copy", track.codec, name=f"{track.codec or '?'} {track.channels}ch")
+            if not is_mp4_audio_codec(track.codec):
+                if not self.force_remux:
+                    stream.action, stream.target_codec, stream.bitrate = "transcode", settings.audio_codec, settings.audio_bitrate
+                    stream.reason = "not supported in MP4"
+                elif track is not primary:
+                    stream.action, stream.reason = "drop", "not supported in MP4"
+            audio.append(stream)
+
+        subtitles = []
+        for track in self.subtitle_tracks:
+            stream = StreamPlan("subtitle", track.ffmpeg_index if track.ffmpeg_index is not None else 0, "drop", track.codec, name=track.get_display_name())
+            if burned and track.index == burned.index:
+                stream.reason = "burned into the video"
+            elif track.index in self.pending_subtitle_removals:
+                stream.reason = "marked for removal"
+            elif track.action != "copy":
+                stream.reason = "not selected"
+            elif self.force_remux:
+                stream.reason = "fast remux strips subtitles"
+            elif not track.is_text_based:
+                stream.reason = "image subtitles are not supported in MP4"
+            elif normalize_codec(track.codec) == normalize_codec(MP4_SUBTITLE_CODEC):
+                stream.action = "copy"
+            else:
+                stream.action, stream.target_codec = "transcode", MP4_SUBTITLE_CODEC
+            subtitles.append(stream)
+        return ConversionPlan(video, audio, subtitles, burned, remux_only=self.force_remux)
+
     def classify(self) -> str:
         """Determines if a file should be remuxed or fully converted."""
-        if self.burned_subtitle: return "convert"
-        compatible_audio = ['aac', 'ac3', 'eac3']
-        if self.audio_codec and self.audio_codec.lower() not in compatible_audio: return "convert"
-        compatible_video = ['h264', 'hevc']
-        if self.video_codec and not any(c in self.video_codec.lower() for c in compatible_video): return "convert"
-        return "remux"
+        return self.build_plan().route
 
     def generate_preview(self, settings: 'ConversionSettings') -> str:
         """Generates a detailed, human-readable summary of the planned conversion."""
+        conversion = self.build_plan(settings)
         plan = []
         plan.append("--- SOURCE FILE METADATA ---")
         plan.append(f"  Container: {self.container}")
         plan.append(f"  Size: {self.original_size_gb:.2f} GB")
         plan.append(f"  Video: {self.video_codec}, {self.video_width}p, {self.video_fps:.2f} fps")
-        plan.append(f"  Audio: {self.audio_codec}, {self.audio_channels} channels")
+        plan.append(f"  Audio: {', '.join(t.get_display_name() for t in self.all_audio_tracks) or 'None'}")
         plan.append("\n--- PLANNED CONVERSION ---")
 
-        conversion_type = self.classify()
-        plan.append(f"  Operation Type: {'Fast Remux' if conversion_type == 'remux' else 'Full Re-encode'}")
+        if conversion.route == "remux":
+            operation = "Fast Remux"
+        else:
+            operation = "Full Re-encode" if conversion.encodes_video else "Remux with Stream Conversion"
+        plan.append(f"  Operation Type: {operation}")
 
         # Video Plan
-        if self.burned_subtitle:
-            video_plan = f"Re-encode to {settings.video_codec.upper()}"
-            if settings.use_two_pass:
+        if conversion.video:
+            video_plan = conversion.video.describe()
+            if conversion.encodes_video and settings.use_two_pass:
                 video_plan += " (2-Pass)"
-        else:
-            video_plan = "Copy (remux)"
-        plan.append(f"  Video Action: {video_plan}")
+            plan.append(f"  Video Action: {video_plan}")
 
         # Audio Plan
-        compatible_audio = ['aac', 'ac3', 'eac3']
-        if self.audio_codec and self.audio_codec.lower() in compatible_audio and self.audio_channels >= 6:
-            audio_plan = f"Copy existing {self.audio_codec.upper()} stream"
-        else:
-            audio_plan = f"Re-encode to {settings.audio_codec.upper()} at {settings.audio_bitrate}"
-        plan.append(f"  Audio Action: {audio_plan}")
+        for stream in conversion.audio:
+            plan.append(f"  Audio {stream.source_index} ({stream.name}): {stream.describe()}")
 
         # Subtitle Plan
-        burned = self.burned_subtitle.get_display_name() if self.burned_subtitle else "None"
+        burned = conversion.burned_subtitle.get_display_name() if conversion.burned_subtitle else "None"
         plan.append(f"  Subtitles to Burn: {burned}")
-        
-        copied = [s.get_display_name() for s in self.subtitle_tracks if s.action == 'copy']
-        plan.append(f"  Subtitles to Copy: {', '.join(copied) if copied else 'None'}")
+
+        kept = [s.name for s in conversion.subtitles if s.action != "drop"]
+        plan.append(f"  Subtitles to Copy: {', '.join(kept) if kept else 'None'}")
+
+        dropped = [f"{s.name} ({s.reason})" for s in conversion.subtitles if s.action == "drop" and s.reason != "not selected"]
+        plan.append(f"  Subtitles to Drop: {', '.join(dropped) if dropped else 'None'}")
         
         plan.append("\n--- OUTPUT ---")
         plan.append(f"  Container: .mp4")
@@ -153,4 +348,11 @@ class ConversionSettings:
     crf: int = 23; output_directory: Path = Path("./converted"); dry_run: bool = False
     delete_source_on_success: bool = False
     filename_template: str = "{title} ({year}) - {width}p" # NEW
-    scannable_file_types: List[str] = field(default_factory=lambda: [".mkv"]) # NEW
\ No newline at end of file
+    scannable_file_types: List[str] = field(default_factory=lambda: [".mkv"]) # NEW
+
+    @property
+    def video_encoder(self) -> str:
+        """The ffmpeg encoder used for re-encodes: the NVENC codec, or its x264/x265 counterpart when NVENC is off."""
+        if self.use_nvenc:
+            return self.video_codec
+        return SOFTWARE_ENCODERS.get(self.video_codec, self.video_codec)
\ No newline at end of file
@@ -0,0 +1,129 @@
+# move_journal.py
+# This module keeps the transfer history as an append-only JSON Lines journal.
+# Each transfer appends one line instead of rewriting the whole log, and the latest
+# entry per source path is kept in memory for fast lookups.
+
+import json
+import os
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, Optional, TextIO
+
+JOURNAL_FILE = Path("./move_log.jsonl")
+LEGACY_LOG_FILE = Path("./move_log.json")
+FSYNC_BATCH = 32  # Appended entries between fsync calls
+
+class MoveJournal:
+    """
+    Append-only transfer journal. Use as a context manager, or call open() and close().
+    A torn last line from a crash is skipped when the journal is loaded.
+    """
+    def __init__(self, path: Path = JOURNAL_FILE, legacy_path: Path = LEGACY_LOG_FILE, fsync_batch: int = FSYNC_BATCH):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.fsync_batch = max(1, fsync_batch)
+        self._index: Dict[str, dict] = {}
+        self._file: Optional[TextIO] = None
+        self._unsynced = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "MoveJournal":
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self) -> "MoveJournal":
+        if not self.path.exists() and self.legacy_path.exists():
+            self._migrate_legacy_log()
+        self._load()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell() and not self._ends_with_newline():
+            self._file.write("\n")  # Terminate a torn last line so new entries start cleanly
+        return self
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._sync()
+                self._file.close()
+                self._file = None
+
+    def _load(self):
+        self._index.clear()
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    self._index[entry.pop("source")] = entry
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    logging.warning(f"Skipping unreadable line {line_number} in '{self.path}'.")
+
+    def _migrate_legacy_log(self):
+        """One-time import of the old move_log.json, which is renamed afterwards."""
+        try:
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            logging.error(f"Could not read legacy move log '{self.legacy_path}': {e}")
+            return
+        self._write_entries(self.path, legacy)
+        self.legacy_path.rename(self.legacy_path.with_name(self.legacy_path.name + ".migrated"))
+        logging.info(f"Migrated {len(legacy)} entries from '{self.legacy_path}' to '{self.path}'.")
+
+    @staticmethod
+    def _write_entries(path: Path, entries: Dict[str, dict]):
+        """Writes a complete journal through a temporary file and atomically replaces `path`."""
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for source, entry in entries.items():
+                f.write(json.dumps({"source": source, **entry}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def record(self, source_path: str, entry: dict):
+        """Appends an entry for `source_path`; it replaces any earlier entry in lookups."""
+        with self._lock:
+            if not self._file:
+                raise RuntimeError("MoveJournal is not open.")
+            self._file.write(json.dumps({"source": source_path, **entry}) + "\n")
+            self._file.flush()
+            self._index[source_path] = entry
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_batch:
+                self._sync()
+
+    def lookup(self, source_path: str) -> Optional[dict]:
+        return self._index.get(source_path)
+
+    def entries(self) -> Dict[str, dict]:
+        with self._lock:
+            return dict(self._index)
+
+    def compact(self) -> int:
+        """Rewrites the journal with only the latest entry per source. Returns the entry count."""
+        with self._lock:
+            if not self._file:
+                raise RuntimeError("MoveJournal is not open.")
+            self._sync()
+            self._file.close()
+            self._write_entries(self.path, self._index)
+            self._file = open(self.path, "a", encoding="utf-8")
+            return len(self._index)
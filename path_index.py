@@ -0,0 +1,77 @@
+# path_index.py
+# This module precompiles the configured path mappings into a trie over path components,
+# so finding the mapping for a file costs O(path depth) and the most specific mapping wins.
+
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+_WINDOWS_DRIVE_RE = re.compile(r"^[A-Za-z]:")
+
+def normalize_path_parts(path: Union[str, Path]) -> Tuple[str, ...]:
+    """
+    Splits a path into comparable components. Backslashes and forward slashes are treated
+    alike, and Windows-style paths (drive letters, UNC shares, backslashes) compare
+    case-insensitively.
+    """
+    text = str(path)
+    windows_style = sys.platform == "win32" or "\\" in text or bool(_WINDOWS_DRIVE_RE.match(text))
+    text = text.replace("\\", "/")
+    if windows_style:
+        text = text.casefold()
+    if text.startswith("//"):
+        root = "//"
+    elif text.startswith("/"):
+        root = "/"
+    else:
+        root = ""
+    parts = [part for part in text.split("/") if part and part != "."]
+    return (root, *parts) if root else tuple(parts)
+
+class _Node:
+    __slots__ = ("children", "mapping")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.mapping: Optional[Dict[str, str]] = None
+
+class PathMappingIndex:
+    """Longest-prefix lookup over a list of {"source": ..., "destination": ...} mappings."""
+    def __init__(self, path_mappings: List[Dict[str, str]]):
+        self._root = _Node()
+        self._mappings: List[Dict[str, str]] = []
+        for mapping in path_mappings:
+            if not mapping.get("source") or not mapping.get("destination"):
+                continue
+            node = self._root
+            for part in normalize_path_parts(mapping["source"]):
+                node = node.children.setdefault(part, _Node())
+            if node.mapping is None:  # Keep the first of duplicate sources, as before
+                node.mapping = mapping
+                self._mappings.append(mapping)
+
+    def lookup(self, file_path: Union[str, Path]) -> Optional[Dict[str, str]]:
+        """Returns the most specific mapping whose source folder contains `file_path`."""
+        parts = normalize_path_parts(file_path)[:-1]  # Only folders can match, not the file itself
+        node, best = self._root, None
+        for part in parts:
+            node = node.children.get(part)
+            if node is None:
+                break
+            if node.mapping is not None:
+                best = node.mapping
+        return best
+
+    def scan_roots(self) -> List[Path]:
+        """Returns the mapping sources that are not inside another mapping's source, in config order."""
+        roots: List[Dict[str, str]] = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node.mapping is not None:
+                roots.append(node.mapping)
+                continue  # Nested sources are covered by the recursive scan of this one
+            stack.extend(node.children.values())
+        roots.sort(key=lambda mapping: next(i for i, m in enumerate(self._mappings) if m is mapping))
+        return [Path(mapping["source"]) for mapping in roots]
@@ -1,23 +1,27 @@
 # subtitlesmkv.py
-# Version: 2.3
+# Version: 2.4
 # This module scans media files and extracts subtitle track information or snippets.
 
 import subprocess
 import json
 import sys
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple
 import logging
 import re
+import threading
+from collections import OrderedDict
 try:
-    from langdetect import detect, DetectorFactory
+    from langdetect import detect_langs, DetectorFactory
     DetectorFactory.seed = 0
     LANGDETECT_AVAILABLE = True
 except ImportError:
     LANGDETECT_AVAILABLE = False
     logging.warning("langdetect library not found. Language detection will be skipped. Run 'pip install langdetect'")
 
-from models import MediaFile, SubtitleTrack
+from models import MediaFile, SubtitleTrack, AudioTrack
+import metrics
+import tracing
 
 # --- Platform-specific subprocess creation flags ---
 if sys.platform == "win32":
@@ -29,6 +33,40 @@ MKVTOOLNIX_PATH = Path("C:/Program Files/MKVToolNix/")
 MKVMERGE_PATH = MKVTOOLNIX_PATH / "mkvmerge.exe"
 MKVEXTRACT_PATH = MKVTOOLNIX_PATH / "mkvextract.exe"
 
+# --- Forced subtitle heuristics ---
+# A forced track only covers foreign dialogue, so it has far fewer events than a full
+# track of the same language. All checks use mkvmerge's statistics tags only.
+FORCED_FRAME_RATIO = 0.25           # At most this share of the largest sibling's events
+FORCED_BYTES_RATIO = 0.25           # Or of its bytes, when event counts are missing or tie
+FORCED_MAX_EVENTS_PER_MINUTE = 2.0  # Used when a track has no same-language siblings
+FORCED_MIN_DURATION_SECONDS = 600   # Density is meaningless for very short files
+
+# --- Probe cache ---
+# mkvmerge -J output keyed by (path, size, mtime), so rescans and refreshes of unchanged
+# files skip the subprocess. Any write to the file changes the key.
+PROBE_CACHE_SIZE = 4096
+_probe_cache: "OrderedDict[Tuple[str, int, int], Dict[str, Any]]" = OrderedDict()
+_probe_cache_lock = threading.Lock()
+
+def probe_file(file_path: Path) -> Dict[str, Any]:
+    """Returns mkvmerge's JSON identification of a file, from the cache when the file is unchanged."""
+    stat = file_path.stat()
+    key = (str(file_path), stat.st_size, stat.st_mtime_ns)
+    with _probe_cache_lock:
+        if key in _probe_cache:
+            _probe_cache.move_to_end(key)
+            return _probe_cache[key]
+    cmd = [str(MKVMERGE_PATH), "-J", str(file_path)]
+    with metrics.record_job("scan", source=str(file_path), input_bytes=stat.st_size, encoder="mkvmerge"):
+        with tracing.span("mkvmerge -J", "subprocess", file=str(file_path)):
+            result = subprocess.run(cmd, check=True, capture_output=True, text=True, encoding='utf-8', creationflags=CREATE_NO_WINDOW)
+        data = json.loads(result.stdout)
+    with _probe_cache_lock:
+        _probe_cache[key] = data
+        while len(_probe_cache) > PROBE_CACHE_SIZE:
+            _probe_cache.popitem(last=False)
+    return data
+
 def scan_directory(directory_path: Path, file_types: List[str]) -> List[MediaFile]:
     """Scans a single directory recursively for specified file types."""
     media_files = []
@@ -45,6 +83,7 @@ def scan_directory(directory_path: Path, file_types: List[str]) -> List[MediaFil
             
     return media_files
 
+@tracing.traced("scan_file")
 def scan_file(file_path: Path) -> MediaFile:
     """Scans a single media file for subtitle and audio tracks using mkvmerge."""
     media = MediaFile(source_path=file_path)
@@ -52,21 +91,26 @@ def scan_file(file_path: Path) -> MediaFile:
     try:
         if file_path.exists():
             media.original_size_gb = file_path.stat().st_size / (1024**3)
-        cmd = [str(MKVMERGE_PATH), "-J", str(file_path)]
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True, encoding='utf-8', creationflags=CREATE_NO_WINDOW)
-        data = json.loads(result.stdout)
+        data = probe_file(file_path)
         # ... (rest of the function is unchanged)
-        subtitle_ffmpeg_index = 0
+        subtitle_ffmpeg_index = audio_ffmpeg_index = 0
         audio_tracks_found, video_tracks_found = [], []
         media.container = data.get("container", {}).get("type", "Unknown")
+        container_duration = _to_int(data.get("container", {}).get("properties", {}).get("duration")) / 1e9
+        media.duration_seconds = container_duration
         for track in data.get("tracks", []):
             properties = track.get("properties", {})
             if track.get("type") == "video":
                 video_tracks_found.append({'codec': track.get("codec"), 'width': properties.get("pixel_dimensions", "0x0").split('x')[0], 'fps': properties.get("video_frames_per_second", 0.0)})
             elif track.get("type") == "audio":
                 audio_tracks_found.append({'codec': track.get("codec"), 'channels': properties.get("audio_channels"), 'is_default': properties.get("default_track", False)})
+                media.audio_tracks.append(AudioTrack(index=track.get("id"), ffmpeg_index=audio_ffmpeg_index, codec=track.get("codec"), channels=_to_int(properties.get("audio_channels")),
+                                                     language=properties.get("language", "und"), title=properties.get("track_name"), is_default=properties.get("default_track", False)))
+                audio_ffmpeg_index += 1
             elif track.get("type") == "subtitles":
-                media.subtitle_tracks.append(SubtitleTrack(index=track.get("id"), ffmpeg_index=subtitle_ffmpeg_index, language=properties.get("language", "und"), title=properties.get("track_name"), codec=track.get("codec"), is_default=properties.get("default_track", False), is_forced=properties.get("forced_track", False), is_text_based=properties.get("text_subtitles", False)))
+                media.subtitle_tracks.append(SubtitleTrack(index=track.get("id"), ffmpeg_index=subtitle_ffmpeg_index, language=properties.get("language", "und"), title=properties.get("track_name"), codec=track.get("codec"), is_default=properties.get("default_track", False), is_forced=properties.get("forced_track", False), is_text_based=properties.get("text_subtitles", False),
+                                                          num_frames=_to_int(properties.get("tag_number_of_frames")), num_bytes=_to_int(properties.get("tag_number_of_bytes")),
+                                                          duration_seconds=container_duration or _duration_to_seconds(properties.get("tag_duration"))))
                 subtitle_ffmpeg_index += 1
         if video_tracks_found:
             primary_video = video_tracks_found[0]
@@ -77,37 +121,169 @@ def scan_file(file_path: Path) -> MediaFile:
             primary_audio = next((t for t in audio_tracks_found if t['is_default']), audio_tracks_found[0])
             media.audio_codec = primary_audio['codec']
             media.audio_channels = primary_audio['channels']
+        flag_likely_forced_tracks(media.subtitle_tracks)
         media.update_flags()
-        for track in media.subtitle_tracks:
-            if track.language == "eng" and track.is_forced:
-                track.action = "burn"; media.burned_subtitle = track
-                break
+        english_tracks = [t for t in media.subtitle_tracks if t.language == "eng"]
+        burn_track = next((t for t in english_tracks if t.is_forced), None) or next((t for t in english_tracks if t.is_likely_forced), None)
+        if burn_track:
+            burn_track.action = "burn"; media.burned_subtitle = burn_track
         media.status = "Ready"
     except Exception as e:
         media.status = "Error"; media.error_message = f"Scan error: {e}"
     return media
 
+def _to_int(value) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+def _duration_to_seconds(value) -> float:
+    """Parses mkvmerge's DURATION tag, e.g. '01:52:13.123000000'."""
+    try:
+        hours, minutes, seconds = str(value).split(':')
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    except (TypeError, ValueError):
+        return 0.0
+
+def flag_likely_forced_tracks(tracks: List[SubtitleTrack]):
+    """
+    Marks subtitle tracks that are probably forced even though the forced flag is not set.
+    A track qualifies if its title says so, if it has far fewer events (or, when the event
+    counts are missing or equal, far fewer bytes) than the largest track of the same
+    language, or, without siblings, if its events are very sparse. No subtitle payload is read.
+    """
+    for track in tracks:
+        if track.is_forced:
+            continue
+        if track.title and "forced" in track.title.lower():
+            track.is_likely_forced = True
+            continue
+        siblings = [t for t in tracks if t is not track and t.language == track.language]
+        largest_frames = max((t.num_frames for t in siblings), default=0)
+        largest_bytes = max((t.num_bytes for t in siblings), default=0)
+        if track.num_frames and largest_frames and track.num_frames != largest_frames:
+            track.is_likely_forced = track.num_frames <= largest_frames * FORCED_FRAME_RATIO
+        elif track.num_bytes and largest_bytes:
+            track.is_likely_forced = track.num_bytes <= largest_bytes * FORCED_BYTES_RATIO
+        elif not largest_frames and not largest_bytes and track.num_frames and track.duration_seconds >= FORCED_MIN_DURATION_SECONDS:
+            events_per_minute = track.num_frames / (track.duration_seconds / 60)
+            track.is_likely_forced = events_per_minute < FORCED_MAX_EVENTS_PER_MINUTE
+
+# --- Subtitle sampling for language detection ---
+# Detection only needs a few dozen cues, so the extracted track is sampled at evenly
+# spaced byte offsets instead of being read in full.
+SAMPLE_WINDOWS = 8                  # Number of evenly spaced offsets to sample from
+MAX_WINDOW_BYTES = 64 * 1024        # Stop scanning a window after this many bytes
+DEFAULT_SAMPLE_CUES = 40
+MAX_SAMPLE_CUES = 320
+MIN_DETECTION_CONFIDENCE = 0.90
+SNIPPET_LINES = 10
+
+_MARKUP_RE = re.compile(r'<[^>]+>|\{[^}]*\}')
+
+def _clean_cue_text(text: str) -> str:
+    text = text.replace('\\N', ' ').replace('\\n', ' ')
+    return _MARKUP_RE.sub('', text).strip()
+
+def _iter_cues(f: BinaryIO, byte_limit: int = 0) -> Iterator[str]:
+    """
+    Streams cue texts from an SRT or ASS file starting at the current position.
+    Starting mid-file is fine: SRT text is only collected after a timing line and
+    ASS text only from 'Dialogue:' lines, so the parser resyncs on its own.
+    """
+    bytes_read = 0
+    in_cue = False
+    cue_lines: List[str] = []
+    for raw_line in f:
+        bytes_read += len(raw_line)
+        line = raw_line.decode('utf-8', errors='ignore').strip().lstrip('\ufeff')
+        if line.startswith('Dialogue:'):
+            parts = line.split(',', 9)
+            if len(parts) == 10 and (text := _clean_cue_text(parts[9])):
+                yield text
+        elif '-->' in line:
+            in_cue, cue_lines = True, []
+        elif in_cue:
+            if line:
+                if cleaned := _clean_cue_text(line): cue_lines.append(cleaned)
+            else:
+                in_cue = False
+                if cue_lines: yield "\n".join(cue_lines)
+        if byte_limit and bytes_read >= byte_limit:
+            return
+    if in_cue and cue_lines:
+        yield "\n".join(cue_lines)
+
+def sample_subtitle_cues(subtitle_path: Path, max_cues: int = DEFAULT_SAMPLE_CUES) -> List[str]:
+    """
+    Returns up to `max_cues` cue texts spread across the whole track. Each sample window
+    reads at most MAX_WINDOW_BYTES, so the cost does not depend on the track length.
+    """
+    file_size = subtitle_path.stat().st_size
+    windows = max(1, min(SAMPLE_WINDOWS, max_cues))
+    cues_per_window = -(-max_cues // windows)
+    cues: List[str] = []
+    with open(subtitle_path, "rb") as f:
+        for w in range(windows):
+            f.seek(file_size * w // windows)
+            if w > 0: f.readline()  # Discard the partial line we landed in
+            for n, cue in enumerate(_iter_cues(f, MAX_WINDOW_BYTES), start=1):
+                cues.append(cue)
+                if n >= cues_per_window or len(cues) >= max_cues: break
+            if len(cues) >= max_cues: break
+    return cues
+
+def read_subtitle_snippet(subtitle_path: Path, max_lines: int = SNIPPET_LINES) -> List[str]:
+    """Returns the first `max_lines` lines of cue text, reading only as far as needed."""
+    lines: List[str] = []
+    with open(subtitle_path, "rb") as f:
+        for cue in _iter_cues(f):
+            lines.extend(cue.splitlines())
+            if len(lines) >= max_lines: break
+    return lines[:max_lines]
+
+def detect_subtitle_language(subtitle_path: Path, sample_cues: int = DEFAULT_SAMPLE_CUES,
+                             max_cues: int = MAX_SAMPLE_CUES,
+                             min_confidence: float = MIN_DETECTION_CONFIDENCE) -> Tuple[str, float]:
+    """
+    Detects the language of an extracted subtitle file from a bounded sample of cues.
+    Returns (language, confidence). The sample is doubled, up to `max_cues`, only while
+    detection stays below `min_confidence`.
+    """
+    if not LANGDETECT_AVAILABLE:
+        return "n/a", 0.0
+    best = ("unknown", 0.0)
+    while True:
+        clean_text = "\n".join(sample_subtitle_cues(subtitle_path, sample_cues))
+        if not clean_text:
+            return best
+        with tracing.span("langdetect", cues=sample_cues):
+            candidates = detect_langs(clean_text)
+        if candidates and candidates[0].prob >= best[1]:
+            best = (candidates[0].lang, candidates[0].prob)
+        if best[1] >= min_confidence or sample_cues >= max_cues:
+            return best
+        sample_cues = min(sample_cues * 2, max_cues)
+
 def get_subtitle_details(mkv_file: Path, track_id: int) -> Tuple[str, str]:
     if not MKVEXTRACT_PATH.exists():
         return f"Error: mkvextract.exe not found.", "unknown"
     temp_srt_path = mkv_file.with_name(f"{mkv_file.stem}_preview_{track_id}.srt")
     try:
         command = [str(MKVEXTRACT_PATH), "tracks", str(mkv_file), f"{track_id}:{temp_srt_path}"]
-        subprocess.run(command, check=True, capture_output=True, text=True, encoding='utf-8', creationflags=CREATE_NO_WINDOW)
-        with open(temp_srt_path, "r", encoding="utf-8", errors="ignore") as f:
-            content = f.read()
-        text_lines = [line.strip() for line in content.splitlines() if not re.match(r'^\d+$', line.strip()) and '-->' not in line]
-        clean_text = "\n".join(text_lines)
-        if not clean_text:
+        with tracing.span("mkvextract", "subprocess", file=str(mkv_file), track=track_id):
+            subprocess.run(command, check=True, capture_output=True, text=True, encoding='utf-8', creationflags=CREATE_NO_WINDOW)
+        snippet_lines = read_subtitle_snippet(temp_srt_path)
+        if not snippet_lines:
             return "No text found in track.", "unknown"
         detected_lang = "n/a"
         if LANGDETECT_AVAILABLE:
             try:
-                detected_lang = detect(clean_text)
+                detected_lang, _confidence = detect_subtitle_language(temp_srt_path)
             except Exception as e:
                 detected_lang = f"detection_failed ({e})"
-        snippet = "\n".join(text_lines[:10])
-        return snippet, detected_lang
+        return "\n".join(snippet_lines), detected_lang
     except Exception as e:
         logging.error(f"Error getting subtitle details for track {track_id}: {e}")
         return f"Error extracting subtitle preview: {e}", "error"
@@ -0,0 +1,95 @@
+# conftest.py
+# Makes the top-level modules importable and keeps app data written during tests out of the
+# real APPDATA folder. Also provides a local stand-in for the TMDb API.
+
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib import parse
+
+import pytest
+
+os.environ["APPDATA"] = tempfile.mkdtemp(prefix="mediaconverter-tests-")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import tmdb_client
+
+class FakeTMDb:
+    """
+    Serves /search/movie from `movies` (normalized query -> results) and /movie/<id> with a
+    stub. Queued `(status, headers)` pairs in `errors` are answered first. Every request is
+    recorded, along with the most that were in flight at once.
+    """
+    def __init__(self):
+        self.movies = {}
+        self.errors = deque()
+        self.delay = 0.0
+        self.requests = []  # (monotonic time, path, params)
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def searches(self):
+        return [params for _time, path, params in self.requests if path.endswith("/search/movie")]
+
+    def respond(self, path: str, params: dict):
+        with self._lock:
+            self.requests.append((time.monotonic(), path, params))
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            error = self.errors.popleft() if self.errors else None
+        try:
+            time.sleep(self.delay)
+            if error:
+                return error[0], error[1], {"status_message": "error"}
+            if path.endswith("/search/movie"):
+                return 200, {}, {"results": self.movies.get(" ".join(params.get("query", "").casefold().split()), [])}
+            movie_id = int(path.rsplit("/", 1)[-1])
+            return 200, {}, {"id": movie_id, "title": f"Movie {movie_id}"}
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+@pytest.fixture
+def tmdb_server(tmp_path, monkeypatch):
+    """Points tmdb_client at a FakeTMDb on localhost, with a test API key and an empty cache in tmp_path."""
+    fake = FakeTMDb()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+
+        def do_GET(self):
+            url = parse.urlsplit(self.path)
+            params = dict(parse.parse_qsl(url.query))
+            status, headers, payload = fake.respond(url.path, params)
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    # TMDB_API_BASE_URL is read when tmdb_client is imported, so the resolved value is patched as well
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/3"
+    monkeypatch.setenv("TMDB_API_BASE_URL", base_url)
+    monkeypatch.setattr(tmdb_client, "API_BASE_URL", base_url)
+    monkeypatch.setattr(tmdb_client, "get_api_key", lambda: "test-key")
+    monkeypatch.setattr(tmdb_client, "_cache", tmdb_client.ResponseCache(tmp_path / "tmdb_cache"))
+    yield fake
+    tmdb_client._drop_connection()
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,57 @@
+# test_benchmark.py
+# Checks the benchmark scenarios still exercise the paths they are named after, without
+# running ffmpeg: the fixture specs are turned into MediaFiles like probe_media() would.
+
+from pathlib import Path
+
+import pytest
+
+import benchmark
+from models import MediaFile, AudioTrack, SubtitleTrack, ConversionSettings
+
+def _media_for(spec: benchmark.FixtureSpec) -> MediaFile:
+    media = MediaFile(source_path=Path(f"{spec.name}.mkv"))
+    media.video_codec = "h264"
+    media.audio_tracks = [AudioTrack(index=i + 1, ffmpeg_index=i, codec=codec, channels=channels, is_default=i == 0)
+                          for i, (codec, channels) in enumerate(spec.audio)]
+    return media
+
+@pytest.mark.parametrize("scenario", [s for s in benchmark.SCENARIOS if s.transcodes_audio], ids=lambda s: s.name)
+def test_audio_transcode_scenarios_transcode_audio(scenario):
+    plan = _media_for(benchmark.FIXTURES[scenario.fixture]).build_plan(ConversionSettings(use_nvenc=False))
+    assert plan.streams("audio", "transcode")
+
+def test_remux_scenario_copies_all_audio():
+    scenario = next(s for s in benchmark.SCENARIOS if s.name == "remux")
+    plan = _media_for(benchmark.FIXTURES[scenario.fixture]).build_plan()
+    assert plan.route == "remux"
+    assert [stream.action for stream in plan.audio] == ["copy"] * len(plan.audio)
+
+def _forced_subs_media(path: Path) -> MediaFile:
+    spec = benchmark.FIXTURES["forced_subs"]
+    media = _media_for(spec)
+    media.source_path = path
+    media.subtitle_tracks = [SubtitleTrack(index=len(spec.audio) + 1 + i, ffmpeg_index=i, language=language, codec="subrip",
+                                           is_forced=forced, is_text_based=True, action="copy")
+                             for i, (language, forced) in enumerate(spec.subtitles)]
+    return media
+
+@pytest.mark.parametrize("keeps_burn", [True, False])
+def test_burn_in_run_that_drops_the_burn_is_an_error(keeps_burn, monkeypatch, tmp_path):
+    fixture_path = tmp_path / "forced_subs.mkv"
+    fixture_path.write_bytes(b"\0" * 16)
+    monkeypatch.setattr(benchmark, "probe_media", _forced_subs_media)
+    calls = []
+
+    def fake_convert(media, settings, progress_callback, stop_check, status, progress, stats, verify_burn_language=True):
+        calls.append(verify_burn_language)
+        if not keeps_burn:
+            media.burned_subtitle = None
+        media.status = "Converted"
+
+    monkeypatch.setattr(benchmark, "convert_media_file", fake_convert)
+    scenario = next(s for s in benchmark.SCENARIOS if s.name == "burn_in")
+    result = benchmark.run_scenario(scenario, fixture_path, ConversionSettings(use_nvenc=False))
+    assert calls == [False]  # Generated fixtures skip the language check
+    assert result["burned_subtitle"] is keeps_burn
+    assert result["status"] == ("ok" if keeps_burn else "error")
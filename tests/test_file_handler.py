@@ -0,0 +1,106 @@
+# test_file_handler.py
+
+import time
+import threading
+from pathlib import Path
+
+import pytest
+
+import copy_engine
+import file_handler
+import metrics
+from models import MediaFile
+
+COPY_SECONDS = 0.3
+
+def _media(tmp_path: Path, folder: str, name: str) -> MediaFile:
+    source = tmp_path / "library" / folder / f"{name}.mkv"
+    source.parent.mkdir(parents=True, exist_ok=True)
+    source.write_bytes(b"source")
+    media = MediaFile(source_path=source)
+    media.destination_path = source.with_suffix(".mp4")
+    media.destination_path.write_bytes(b"converted")
+    return media
+
+def test_transfers_to_different_destinations_overlap(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # The move journal lives in the working directory
+    metrics.use_store(metrics.MetricsStore(tmp_path / "metrics.sqlite3"))
+    windows = {}
+    lock = threading.Lock()
+
+    def slow_move(source, destination, progress_callback=None, *args, **kwargs):
+        started = time.monotonic()
+        time.sleep(COPY_SECONDS)
+        destination.write_bytes(source.read_bytes())
+        source.unlink()
+        with lock:
+            windows[destination.parent.name, source.name] = (started, time.monotonic())
+        return None
+    monkeypatch.setattr(copy_engine, "move_file", slow_move)
+
+    # All NAS jobs come first, so a FIFO pool would start the USB jobs only after them
+    media_files = [_media(tmp_path, "nas", f"nas{i}") for i in range(4)] + [_media(tmp_path, "usb", f"usb{i}") for i in range(4)]
+    mappings = [{"source": str(tmp_path / "library" / "nas"), "destination": str(tmp_path / "NAS")},
+                {"source": str(tmp_path / "library" / "usb"), "destination": str(tmp_path / "USB")}]
+
+    started = time.monotonic()
+    file_handler.move_converted_files(media_files, mappings, max_concurrent_per_destination=2,
+                                      max_concurrent_per_source_device=8, hash_algorithm=None)
+    elapsed = time.monotonic() - started
+
+    assert all(media.status == "Transferred" for media in media_files)
+    first_nas_end = min(end for (dest, _name), (_start, end) in windows.items() if dest == "NAS")
+    first_usb_start = min(start for (dest, _name), (start, _end) in windows.items() if dest == "USB")
+    assert first_usb_start < first_nas_end
+    assert elapsed < COPY_SECONDS * 3  # Two rounds of 2+2 parallel copies, not 4 rounds
+
+def test_source_device_limit_is_respected(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    metrics.use_store(metrics.MetricsStore(tmp_path / "metrics.sqlite3"))
+    running = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def slow_move(source, destination, progress_callback=None, *args, **kwargs):
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.05)
+        destination.write_bytes(source.read_bytes())
+        source.unlink()
+        with lock:
+            running["now"] -= 1
+    monkeypatch.setattr(copy_engine, "move_file", slow_move)
+
+    media_files = [_media(tmp_path, folder, f"{folder}{i}") for folder in ("nas", "usb") for i in range(3)]
+    mappings = [{"source": str(tmp_path / "library" / "nas"), "destination": str(tmp_path / "NAS")},
+                {"source": str(tmp_path / "library" / "usb"), "destination": str(tmp_path / "USB")}]
+    file_handler.move_converted_files(media_files, mappings, max_concurrent_per_destination=2,
+                                      max_concurrent_per_source_device=1, hash_algorithm=None)
+
+    assert all(media.status == "Transferred" for media in media_files)
+    assert running["peak"] == 1  # Everything reads from the same temp device
+
+@pytest.mark.parametrize("record_checksums", [True, False])
+def test_kernel_copy_is_used_when_checksums_are_off(record_checksums, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    metrics.use_store(metrics.MetricsStore(tmp_path / "metrics.sqlite3"))
+    monkeypatch.setattr(copy_engine, "_same_filesystem", lambda source, destination: False)  # Force a copy
+    methods = []
+    for name in ("_copy_with_copy_file_range", "_copy_with_sendfile", "_copy_buffered"):
+        original = getattr(copy_engine, name)
+        monkeypatch.setattr(copy_engine, name, lambda *args, _name=name, _original=original, **kwargs:
+                            methods.append(_name) or _original(*args, **kwargs))
+
+    media = _media(tmp_path, "nas", "movie")
+    mappings = [{"source": str(tmp_path / "library" / "nas"), "destination": str(tmp_path / "NAS")}]
+    file_handler.move_converted_files([media], mappings, verify="sample", record_checksums=record_checksums)
+
+    assert media.status == "Transferred"
+    assert (tmp_path / "NAS" / "movie.mp4").read_bytes() == b"converted"
+    entry = file_handler.read_move_log()[str(media.source_path)]
+    if record_checksums:
+        assert methods == ["_copy_buffered"]  # Hashing needs the data in memory
+        assert entry["digest"].startswith(copy_engine.default_hash_algorithm() + ":")
+    else:
+        assert methods[0] != "_copy_buffered"
+        assert "digest" not in entry
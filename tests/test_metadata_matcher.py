@@ -0,0 +1,77 @@
+# test_metadata_matcher.py
+# auto_match against the local TMDb stand-in: the worker bound and request rate hold, rate-limited
+# requests are retried, and results split into matched, review and no match.
+
+import time
+from pathlib import Path
+
+import metadata_matcher
+from metadata_matcher import TokenBucket, auto_match
+from models import MediaFile
+
+class FakeClock:
+    """Stands in for the time module inside metadata_matcher."""
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+def _files(tmp_path: Path, *names: str):
+    return [MediaFile(source_path=tmp_path / name) for name in names]
+
+def test_token_bucket_allows_a_burst_then_the_rate(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(metadata_matcher, "time", clock)
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.now == 0.0
+    for _ in range(4):
+        bucket.acquire()
+    assert abs(clock.now - 2.0) < 1e-9  # Four more tokens at two per second
+
+def test_concurrency_is_bounded_by_max_workers(tmdb_server, tmp_path):
+    tmdb_server.delay = 0.1
+    files = _files(tmp_path, *(f"Movie {i}.mkv" for i in range(8)))
+    results = auto_match(files, max_workers=2, requests_per_second=1000)
+    assert len(results) == 8
+    assert len(tmdb_server.searches()) == 8
+    assert tmdb_server.max_in_flight == 2
+
+def test_request_rate_is_limited(tmdb_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(metadata_matcher, "DEFAULT_BURST", 1)
+    files = _files(tmp_path, *(f"Movie {i}.mkv" for i in range(6)))
+    auto_match(files, max_workers=4, requests_per_second=20)
+    times = sorted(sent for sent, _path, _params in tmdb_server.requests)
+    assert len(times) == 6
+    assert times[-1] - times[0] >= 5 / 20 * 0.9  # One burst token, then 50 ms apart
+
+def test_rate_limited_search_is_retried(tmdb_server, tmp_path):
+    tmdb_server.movies["the matrix"] = [{"id": 603, "title": "The Matrix", "release_date": "1999-03-31"}]
+    tmdb_server.errors.append((429, {"Retry-After": "0"}))
+    files = _files(tmp_path, "The.Matrix.1999.1080p.BluRay.mkv")
+    [result] = auto_match(files, max_workers=1)
+    assert result.status == "matched"
+    assert len(tmdb_server.searches()) == 2
+
+def test_results_split_into_matched_review_and_no_match(tmdb_server, tmp_path):
+    tmdb_server.movies["the matrix"] = [{"id": 603, "title": "The Matrix", "release_date": "1999-03-31"},
+                                        {"id": 604, "title": "The Matrix Reloaded", "release_date": "2003-05-15"}]
+    tmdb_server.movies["heat"] = [{"id": 949, "title": "Heat", "release_date": "1995-12-15"},
+                                  {"id": 950, "title": "Heat", "release_date": "1996-02-01"}]
+    matrix, heat, unknown = files = _files(tmp_path, "The.Matrix.1999.1080p.BluRay.mkv", "Heat.1995.mkv", "Unknown.Film.2001.mkv")
+    results = {result.media.filename: result for result in auto_match(files)}
+
+    assert results[matrix.filename].status == "matched"
+    assert (matrix.title, matrix.year) == ("The Matrix", 1999)  # Confident matches are applied straight away
+    assert results[heat.filename].status == "review"  # Two equally good candidates
+    assert [movie["id"] for _score, movie in results[heat.filename].candidates] == [949, 950]
+    assert heat.year is None  # Left for the user to pick
+    assert results[unknown.filename].status == "no match"
+    # A search with the filename's year that finds nothing is retried without it
+    assert [(params["query"], params.get("year")) for params in tmdb_server.searches() if params["query"] == "Unknown Film"] == \
+        [("Unknown Film", "2001"), ("Unknown Film", None)]
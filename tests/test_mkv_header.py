@@ -0,0 +1,171 @@
+# test_mkv_header.py
+# Edits locally generated MKVs in place and checks the result: the new values read back
+# (through mkvmerge -J when it is installed), the CRC-32 elements still match, and no byte
+# from the first Cluster onwards changes. Needs ffmpeg on PATH to build the fixtures.
+
+import json
+import shutil
+import subprocess
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pytest
+
+import mkv_header
+import mkv_modifier
+from mkv_header import TrackPropertyEdit, edit_header_in_place
+
+pytestmark = pytest.mark.skipif(not shutil.which("ffmpeg"), reason="ffmpeg is needed to build MKV fixtures")
+
+LONG_TITLE = "The Original Segment Title, Long Enough To Leave Room When It Is Shortened"
+LONG_TRACK_NAME = "English Subtitles (Full Dialogue, Including Songs and Signs)"
+
+def _mkvmerge() -> Optional[str]:
+    if mkv_modifier.MKVMERGE_PATH.exists():
+        return str(mkv_modifier.MKVMERGE_PATH)
+    return shutil.which("mkvmerge")
+
+@pytest.fixture
+def mkv_file(tmp_path: Path) -> Path:
+    """A one-second clip with video, audio and two subtitle tracks (mkvmerge ids 0-3). ffmpeg writes
+    CRC-32 elements and no Void after Info or Tracks."""
+    srt = tmp_path / "cues.srt"
+    srt.write_text("1\n00:00:00,100 --> 00:00:00,900\nHello there.\n", encoding="utf-8")
+    output = tmp_path / "fixture.mkv"
+    subprocess.run([
+        "ffmpeg", "-v", "error", "-y",
+        "-f", "lavfi", "-i", "testsrc2=size=64x64:rate=10:duration=1",
+        "-f", "lavfi", "-i", "sine=duration=1",
+        "-i", str(srt), "-i", str(srt),
+        "-map", "0", "-map", "1", "-map", "2", "-map", "3",
+        "-c:v", "mpeg4", "-c:a", "flac", "-c:s", "srt",
+        "-metadata", f"title={LONG_TITLE}",
+        "-metadata:s:s:0", f"title={LONG_TRACK_NAME}", "-metadata:s:s:1", "title=Forced",
+        "-disposition:s:0", "0", "-disposition:s:1", "forced",
+        "-fflags", "+bitexact", str(output),
+    ], check=True)
+    return output
+
+# --- Reading the result back ---
+
+def _header(path: Path) -> Dict[str, Any]:
+    """Title, per-track name/default/forced, and the top-level header layout."""
+    with open(path, "rb") as f:
+        elements = mkv_header._find_header_elements(f)
+        result: Dict[str, Any] = {"layout": [e.id for e in elements], "tracks": []}
+        for element in elements:
+            f.seek(element.data_offset)
+            children = mkv_header._parse_children(f.read(element.size)) if element.id in (mkv_header.ID_INFO, mkv_header.ID_TRACKS) else []
+            if element.id == mkv_header.ID_INFO:
+                result["title"] = next((data.decode("utf-8") for cid, data in children if cid == mkv_header.ID_TITLE), None)
+            for cid, data in children:
+                if cid != mkv_header.ID_TRACK_ENTRY:
+                    continue
+                entry = dict((child_id, child_data) for child_id, child_data in mkv_header._parse_children(data))
+                result["tracks"].append({
+                    "name": entry[mkv_header.ID_TRACK_NAME].decode("utf-8") if mkv_header.ID_TRACK_NAME in entry else None,
+                    "default": int.from_bytes(entry.get(mkv_header.ID_FLAG_DEFAULT, b"\x01"), "big") == 1,
+                    "forced": int.from_bytes(entry.get(mkv_header.ID_FLAG_FORCED, b"\x00"), "big") == 1,
+                })
+    return result
+
+def _assert_crcs_match(path: Path):
+    with open(path, "rb") as f:
+        for element in mkv_header._find_header_elements(f):
+            if element.id == mkv_header.ID_VOID:
+                continue
+            f.seek(element.data_offset)
+            payload = f.read(element.size)
+            children = mkv_header._parse_children(payload)
+            if children and children[0][0] == mkv_header.ID_CRC32:
+                crc_element_size = 2 + len(children[0][1])
+                assert zlib.crc32(payload[crc_element_size:]).to_bytes(4, "little") == children[0][1], hex(element.id)
+
+def _cluster_bytes(path: Path) -> bytes:
+    with open(path, "rb") as f:
+        last = mkv_header._find_header_elements(f)[-1]
+        start = last.offset + last.total_size
+        assert mkv_header._read_element_header(f, start).id == mkv_header.ID_CLUSTER
+        f.seek(start)
+        return f.read()
+
+def _assert_mkvmerge_reports(path: Path, title: Optional[str], tracks: Dict[int, Dict[str, Any]]):
+    mkvmerge = _mkvmerge()
+    if not mkvmerge:
+        return
+    data = json.loads(subprocess.run([mkvmerge, "-J", str(path)], check=True, capture_output=True, text=True, encoding="utf-8").stdout)
+    assert data["container"]["properties"].get("title") == title
+    by_id = {track["id"]: track["properties"] for track in data["tracks"]}
+    for track_id, expected in tracks.items():
+        if "name" in expected:
+            assert by_id[track_id].get("track_name") == expected["name"]
+        if "default" in expected:
+            assert by_id[track_id]["default_track"] == expected["default"]
+        if "forced" in expected:
+            assert by_id[track_id]["forced_track"] == expected["forced"]
+
+def _assert_edited(path: Path, clusters: bytes, title: Optional[str], tracks: Dict[int, Dict[str, Any]]):
+    header = _header(path)
+    assert header["title"] == title
+    for track_id, expected in tracks.items():
+        for key, value in expected.items():
+            assert header["tracks"][track_id][key] == value, (track_id, key)
+    _assert_crcs_match(path)
+    assert _cluster_bytes(path) == clusters
+    _assert_mkvmerge_reports(path, title, tracks)
+
+# --- Tests ---
+
+def test_fixture_has_no_padding_after_header_elements(mkv_file):
+    layout = _header(mkv_file)["layout"]
+    for element_id in (mkv_header.ID_INFO, mkv_header.ID_TRACKS):
+        following = layout[layout.index(element_id) + 1] if layout.index(element_id) + 1 < len(layout) else None
+        assert following != mkv_header.ID_VOID
+    _assert_crcs_match(mkv_file)
+
+def test_shrinking_edits_fit_without_padding(mkv_file):
+    clusters = _cluster_bytes(mkv_file)
+    edits = [TrackPropertyEdit(2, name="English", is_default=True), TrackPropertyEdit(3, is_forced=False)]
+    assert edit_header_in_place(mkv_file, edits, title="Short Title")
+    _assert_edited(mkv_file, clusters, "Short Title",
+                   {2: {"name": "English", "default": True}, 3: {"forced": False, "name": "Forced"}})
+    # The freed space was turned into Void padding behind both elements
+    layout = _header(mkv_file)["layout"]
+    assert layout[layout.index(mkv_header.ID_INFO) + 1] == mkv_header.ID_VOID
+    assert layout[layout.index(mkv_header.ID_TRACKS) + 1] == mkv_header.ID_VOID
+
+def test_shrinking_by_one_byte_widens_the_size_field(mkv_file):
+    clusters = _cluster_bytes(mkv_file)
+    assert edit_header_in_place(mkv_file, title=LONG_TITLE[:-1])
+    _assert_edited(mkv_file, clusters, LONG_TITLE[:-1], {})
+
+def test_growing_edits_use_void_padding(mkv_file):
+    clusters = _cluster_bytes(mkv_file)
+    assert edit_header_in_place(mkv_file, [TrackPropertyEdit(2, name="Eng")], title="T")  # Leaves padding behind
+    # Far longer than the current values, so these only fit by growing into the padding
+    grown_title, grown_name = LONG_TITLE.upper(), LONG_TRACK_NAME.upper()
+    edits = [TrackPropertyEdit(2, name=grown_name, is_default=False), TrackPropertyEdit(3, name="", is_forced=True)]
+    assert edit_header_in_place(mkv_file, edits, title=grown_title)
+    _assert_edited(mkv_file, clusters, grown_title,
+                   {2: {"name": grown_name, "default": False}, 3: {"name": None, "forced": True}})
+
+def test_edit_that_does_not_fit_leaves_file_untouched(mkv_file):
+    before = mkv_file.read_bytes()
+    assert not edit_header_in_place(mkv_file, [TrackPropertyEdit(2, name="x" * 50)], title=LONG_TITLE * 5)
+    assert mkv_file.read_bytes() == before
+
+def test_edit_that_does_not_fit_falls_back_to_mkvmerge(mkv_file, monkeypatch):
+    calls = []
+    monkeypatch.setattr(mkv_modifier, "_rewrite_properties_with_mkvmerge",
+                        lambda path, edits, title: calls.append((path, edits, title)) or True)
+    edits = [TrackPropertyEdit(2, name="x" * 50)]
+    assert mkv_modifier.edit_mkv_properties(mkv_file, edits, LONG_TITLE * 5)
+    assert calls == [(mkv_file, edits, LONG_TITLE * 5)]
+
+@pytest.mark.skipif(not _mkvmerge(), reason="mkvmerge is not installed")
+def test_mkvmerge_fallback_rewrites_the_file(mkv_file, monkeypatch):
+    monkeypatch.setattr(mkv_modifier, "MKVMERGE_PATH", Path(_mkvmerge()))
+    edits = [TrackPropertyEdit(2, name="x" * 50, is_default=True)]
+    assert mkv_modifier.edit_mkv_properties(mkv_file, edits, LONG_TITLE * 5)
+    _assert_mkvmerge_reports(mkv_file, LONG_TITLE * 5, {2: {"name": "x" * 50, "default": True}})
@@ -0,0 +1,41 @@
+# test_mkv_modifier.py
+
+import time
+import threading
+from pathlib import Path
+
+import mkv_modifier
+from models import MediaFile
+
+def test_subtitle_stripping_runs_devices_side_by_side(tmp_path, monkeypatch):
+    windows = {}
+    lock = threading.Lock()
+
+    def slow_remove(mkv_file, track_ids, media=None, progress_callback=None):
+        started = time.monotonic()
+        time.sleep(0.2)
+        with lock:
+            windows[mkv_file.name] = (started, time.monotonic())
+        return True
+    monkeypatch.setattr(mkv_modifier, "remove_subtitle_tracks", slow_remove)
+    monkeypatch.setattr(mkv_modifier, "_device_id", lambda path: 1 if path.name.startswith("disk1") else 2)
+
+    # The selection starts with every file on the first disk
+    jobs = [(MediaFile(source_path=tmp_path / f"disk{disk}-{i}.mkv"), [3]) for disk in (1, 2) for i in range(3)]
+    started = time.monotonic()
+    results = mkv_modifier.remove_subtitle_tracks_batch(jobs, max_workers_per_device=1)
+    elapsed = time.monotonic() - started
+
+    assert all(results.values()) and len(results) == 6
+    first_disk1_end = min(end for name, (_start, end) in windows.items() if name.startswith("disk1"))
+    first_disk2_start = min(start for name, (start, _end) in windows.items() if name.startswith("disk2"))
+    assert first_disk2_start < first_disk1_end
+    assert elapsed < 0.2 * 5  # Three rounds of one file per disk, not six in a row
+
+def test_subtitle_stripping_stops_between_files(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(mkv_modifier, "remove_subtitle_tracks", lambda mkv_file, *args, **kwargs: calls.append(mkv_file) or True)
+    jobs = [(MediaFile(source_path=tmp_path / f"file{i}.mkv"), [3]) for i in range(3)]
+    results = mkv_modifier.remove_subtitle_tracks_batch(jobs, stop_check=lambda: len(calls) >= 1)
+    assert len(calls) == 1
+    assert sorted(results.values()) == [False, False, True]
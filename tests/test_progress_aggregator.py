@@ -0,0 +1,67 @@
+# test_progress_aggregator.py
+# Overall progress and the queue ETA treat every file a worker has finished with as complete,
+# including files convert_batch skips.
+
+import os
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("PyQt6")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QCoreApplication
+
+import convert
+import dashboard
+from models import MediaFile, ConversionSettings, FINISHED_STATUSES
+
+@pytest.fixture
+def aggregator():
+    app = QCoreApplication.instance() or QCoreApplication([])
+    aggregator = dashboard.ProgressAggregator()
+    aggregator.start()
+    yield aggregator
+    aggregator.stop()
+
+def _fake_convert(media, settings, progress_callback, stop_check, item_status_emitter, item_progress_emitter, item_stats_emitter=None):
+    item_status_emitter(str(media.source_path), "Encoding")
+    item_progress_emitter(str(media.source_path), 50)
+    media.status = "Converted"
+    item_status_emitter(str(media.source_path), media.status)
+
+def test_skipped_and_converted_files_end_at_100_percent(aggregator, monkeypatch, tmp_path):
+    monkeypatch.setattr(convert, "convert_media_file", _fake_convert)
+    skipped, converted = MediaFile(source_path=tmp_path / "skipped.mkv"), MediaFile(source_path=tmp_path / "converted.mkv")
+    skipped.needs_conversion = False
+    files = [skipped, converted]
+    aggregator.set_durations({str(f.source_path): 600.0 for f in files})
+    for f in files:
+        aggregator.report_status(str(f.source_path), "Queued")
+
+    convert.convert_batch(files, ConversionSettings(), item_status_emitter=aggregator.report_status,
+                          item_progress_emitter=aggregator.report_progress)
+
+    assert skipped.status == "Skipped"
+    assert aggregator._overall_percent() == 100
+    summary = aggregator._queue_summary()
+    assert summary["remaining_files"] == 0
+    assert summary["queue_eta"] is None
+
+def test_existing_output_is_reported_as_skipped(aggregator, tmp_path):
+    media = MediaFile(source_path=tmp_path / "movie.mkv")
+    settings = ConversionSettings(filename_template="{title}")
+    (tmp_path / media.generate_filename_from_template(settings.filename_template)).touch()
+    aggregator.report_status(str(media.source_path), "Queued")
+    convert.convert_batch([media], settings, item_status_emitter=aggregator.report_status)
+    assert media.status == "Skipped (Exists)"
+    assert aggregator._overall_percent() == 100
+
+@pytest.mark.parametrize("status", ["Dry Run (Basic)", "Transfer Error", "Transferred (Dry Run)"])
+def test_terminal_statuses_count_as_complete(aggregator, status):
+    assert status in FINISHED_STATUSES
+    aggregator.set_durations({"a.mkv": 600.0})
+    aggregator.report_progress("a.mkv", 40)
+    aggregator.report_status("a.mkv", status)
+    assert aggregator._overall_percent() == 100
+    assert aggregator._queue_summary()["remaining_files"] == 0
@@ -0,0 +1,47 @@
+# test_subtitlesmkv.py
+# The likely-forced heuristic on synthetic tracks, using only mkvmerge's statistics tags.
+
+from models import SubtitleTrack
+from subtitlesmkv import flag_likely_forced_tracks
+
+MOVIE_SECONDS = 2 * 3600
+
+def _track(index: int, language: str = "eng", frames: int = 0, size: int = 0, title: str = None, forced: bool = False) -> SubtitleTrack:
+    return SubtitleTrack(index=index, language=language, title=title, is_forced=forced,
+                         num_frames=frames, num_bytes=size, duration_seconds=MOVIE_SECONDS)
+
+def _flagged(tracks):
+    flag_likely_forced_tracks(tracks)
+    return [track.index for track in tracks if track.is_likely_forced]
+
+def test_sparse_sibling_by_event_count():
+    tracks = [_track(1, frames=1500, size=60000), _track(2, frames=40, size=1600), _track(3, "fre", frames=30)]
+    # Track 3 has no French sibling, and 30 events in two hours is sparse
+    assert _flagged(tracks) == [2, 3]
+
+def test_sibling_with_a_quarter_of_the_events_is_not_forced():
+    assert _flagged([_track(1, frames=1000), _track(2, frames=600)]) == []
+
+def test_bytes_decide_when_event_counts_are_missing():
+    tracks = [_track(1, size=900000), _track(2, size=50000), _track(3, size=700000)]
+    assert _flagged(tracks) == [2]
+
+def test_bytes_decide_when_event_counts_tie():
+    tracks = [_track(1, frames=800, size=80000), _track(2, frames=800, size=12000)]
+    assert _flagged(tracks) == [2]
+
+def test_density_without_siblings():
+    assert _flagged([_track(1, frames=100)]) == [1]  # Under one event a minute
+    assert _flagged([_track(1, frames=1200)]) == []
+    short = _track(1, frames=2)
+    short.duration_seconds = 300  # Too short for density to mean anything
+    assert _flagged([short]) == []
+
+def test_title_containing_forced():
+    tracks = [_track(1, frames=1500), _track(2, frames=1400, title="English (Forced Narrative)"), _track(3, "fre", title="FORCED")]
+    assert _flagged(tracks) == [2, 3]
+
+def test_flagged_forced_tracks_are_left_alone():
+    tracks = [_track(1, frames=1500), _track(2, frames=40, forced=True)]
+    assert _flagged(tracks) == []
+    assert tracks[1].is_forced
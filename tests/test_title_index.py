@@ -0,0 +1,55 @@
+# test_title_index.py
+# Dataset imports stream in batches with progress and can be stopped, and the index file is
+# compacted once superseded lines pile up.
+
+import json
+from pathlib import Path
+
+import pytest
+
+import title_index
+from title_index import TitleIndex
+
+@pytest.fixture
+def index(tmp_path: Path, monkeypatch) -> TitleIndex:
+    monkeypatch.setattr(title_index.tmdb_client, "cached_movies", lambda: iter(()))
+    monkeypatch.setattr(title_index, "IMPORT_BATCH", 10)
+    monkeypatch.setattr(title_index, "COMPACT_MIN_STALE", 20)
+    return TitleIndex(tmp_path / "title_index.jsonl").load()
+
+def _write_dataset(path: Path, count: int, suffix: str = "") -> Path:
+    with open(path, "w", encoding="utf-8") as f:
+        for movie_id in range(count):
+            f.write(json.dumps({"id": movie_id, "title": f"Movie {movie_id}{suffix}", "year": 2000 + movie_id % 20}) + "\n")
+    return path
+
+def _line_count(path: Path) -> int:
+    with open(path, "r", encoding="utf-8") as f:
+        return sum(1 for _line in f)
+
+def test_import_reports_progress_per_batch(index, tmp_path):
+    reports = []
+    count = index.import_dataset(_write_dataset(tmp_path / "data.jsonl", 35), progress_callback=lambda p, m: reports.append((p, m)))
+    assert count == 35 and len(index) == 35
+    assert len(reports) == 4
+    assert [p for p, _m in reports] == sorted(p for p, _m in reports)
+    assert reports[-1][1] == "Imported 35 title(s)"
+    assert index.search("Movie 7", "2007")[0][1]["release_date"] == "2007-01-01"
+
+def test_import_stops_after_the_current_batch(index, tmp_path):
+    count = index.import_dataset(_write_dataset(tmp_path / "data.jsonl", 35), stop_check=lambda: True)
+    assert count == 10 and len(index) == 10
+
+def test_reimport_compacts_superseded_lines(index, tmp_path):
+    index.import_dataset(_write_dataset(tmp_path / "first.jsonl", 30))
+    assert _line_count(index.path) == 30
+    index.import_dataset(_write_dataset(tmp_path / "second.jsonl", 30, suffix=" (Remastered)"))
+    assert _line_count(index.path) == 30  # 60 lines, half of them superseded
+    reloaded = TitleIndex(index.path).load()
+    assert len(reloaded) == 30
+    assert reloaded.search("Movie 3 Remastered")[0][1]["title"] == "Movie 3 (Remastered)"
+
+def test_few_superseded_lines_are_left_in_place(index, tmp_path):
+    index.import_dataset(_write_dataset(tmp_path / "data.jsonl", 30))
+    index.add_movies([{"id": 1, "title": "Renamed"}])
+    assert _line_count(index.path) == 31
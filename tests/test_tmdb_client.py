@@ -0,0 +1,107 @@
+# test_tmdb_client.py
+# Response caching against a local stand-in server: repeat queries are answered from memory
+# or disk, expired entries are fetched again, and the disk cache evicts least recently used.
+
+import os
+import time
+
+import pytest
+
+import tmdb_client
+from tmdb_client import ResponseCache
+
+MOVIE = {"id": 603, "title": "The Matrix", "release_date": "1999-03-31"}
+
+class FakeClock:
+    """Stands in for the time module inside tmdb_client."""
+    def __init__(self):
+        self.now = time.time()
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+def test_repeat_query_is_answered_from_the_cache(tmdb_server):
+    tmdb_server.movies["the matrix"] = [MOVIE]
+    assert tmdb_client.search_movie("The Matrix") == [MOVIE]
+    assert tmdb_client.search_movie("The Matrix") == [MOVIE]
+    assert len(tmdb_server.requests) == 1
+
+def test_query_keys_are_normalized(tmdb_server):
+    tmdb_server.movies["the matrix"] = [MOVIE]
+    tmdb_client.search_movie("The Matrix", "1999")
+    tmdb_client.search_movie("  the   MATRIX ", "1999")
+    assert len(tmdb_server.requests) == 1
+    tmdb_client.search_movie("The Matrix")  # No year is a different search
+    assert len(tmdb_server.requests) == 2
+
+def test_disk_cache_survives_a_new_session(tmdb_server, monkeypatch):
+    tmdb_server.movies["the matrix"] = [MOVIE]
+    tmdb_client.search_movie("The Matrix")
+    assert tmdb_client.get_movie_details(603)["id"] == 603
+    monkeypatch.setattr(tmdb_client, "_cache", ResponseCache(tmdb_client._cache.cache_dir))
+    assert tmdb_client.search_movie("The Matrix") == [MOVIE]
+    assert tmdb_client.get_movie_details(603)["id"] == 603
+    assert len(tmdb_server.requests) == 2
+
+def test_failures_are_not_cached(tmdb_server):
+    tmdb_server.errors.append((500, {}))
+    assert tmdb_client.search_movie("The Matrix") == []
+    tmdb_server.movies["the matrix"] = [MOVIE]
+    assert tmdb_client.search_movie("The Matrix") == [MOVIE]
+    assert len(tmdb_server.requests) == 2
+
+def test_expired_entries_are_fetched_again(tmdb_server, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(tmdb_client, "time", clock)
+    tmdb_server.movies["the matrix"] = [MOVIE]
+    tmdb_client.search_movie("The Matrix")
+    clock.now += tmdb_client.SEARCH_TTL_SECONDS - 60
+    tmdb_client.search_movie("The Matrix")
+    assert len(tmdb_server.requests) == 1
+    clock.now += 120
+    tmdb_client.search_movie("The Matrix")
+    assert len(tmdb_server.requests) == 2
+    # Expiry applies to the disk copy too, not only the session cache
+    clock.now += tmdb_client.SEARCH_TTL_SECONDS + 1
+    monkeypatch.setattr(tmdb_client, "_cache", ResponseCache(tmdb_client._cache.cache_dir))
+    tmdb_client.search_movie("The Matrix")
+    assert len(tmdb_server.requests) == 3
+
+def test_disk_cache_evicts_least_recently_used(tmdb_server, monkeypatch):
+    cache = ResponseCache(tmdb_client._cache.cache_dir, max_disk_entries=10, max_memory_entries=1)
+    monkeypatch.setattr(tmdb_client, "_cache", cache)
+    queries = [f"movie {i}" for i in range(11)]
+
+    def stamp(query: str, mtime: float):
+        os.utime(cache._path_for(f"search:{query}|"), (mtime, mtime))
+
+    for i, query in enumerate(queries[:10]):
+        tmdb_client.search_movie(query)
+        stamp(query, 1000 + i)  # Distinct, ordered modification times
+    tmdb_client.search_movie(queries[0])  # A disk hit marks it as recently used
+    assert len(tmdb_server.requests) == 10
+    tmdb_client.search_movie(queries[10])  # 11 entries: the cache shrinks to 9
+    assert len(list(cache.cache_dir.glob("*.json"))) == 9
+
+    requests_before = len(tmdb_server.requests)
+    for query in (queries[0], *queries[3:]):
+        tmdb_client.search_movie(query)
+    assert len(tmdb_server.requests) == requests_before
+    tmdb_client.search_movie(queries[1])
+    tmdb_client.search_movie(queries[2])
+    assert len(tmdb_server.requests) == requests_before + 2
+
+def test_rate_limited_request_is_retried(tmdb_server):
+    tmdb_server.errors.append((429, {"Retry-After": "0"}))
+    tmdb_server.movies["the matrix"] = [MOVIE]
+    assert tmdb_client.search_movie("The Matrix") == [MOVIE]
+    assert len(tmdb_server.requests) == 2
+
+@pytest.mark.parametrize("status", [401, 404])
+def test_other_errors_are_not_retried(tmdb_server, status):
+    tmdb_server.errors.append((status, {}))
+    assert tmdb_client.search_movie("The Matrix") == []
+    assert len(tmdb_server.requests) == 1
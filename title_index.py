@@ -0,0 +1,244 @@
+# title_index.py
+# This module keeps an offline fuzzy index of movie titles, so metadata suggestions can be
+# answered locally in milliseconds. It is built from cached TMDb responses, movies learned
+# from online searches, and optionally an imported dataset; TMDb itself is only the fallback.
+
+import os
+import csv
+import json
+import math
+import heapq
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, List, Dict, Optional, Any, Iterable, Set, Tuple
+
+from metadata_matcher import clean_search_query, release_year, normalize_title
+import tmdb_client
+
+INDEX_FILE = Path(os.getenv("APPDATA", Path.home())) / "MediaConverter" / "title_index.jsonl"
+MIN_SCORE = 0.3                 # Candidates below this trigram similarity are not suggested
+LOCAL_CONFIDENT_SCORE = 0.8     # A local best match at or above this skips the network search
+CANDIDATE_POOL = 200            # Candidates with the most shared trigrams that get an exact score
+INDEXED_FIELDS = ("id", "title", "original_title", "release_date", "overview", "popularity")
+IMPORT_BATCH = 10000            # Dataset rows indexed per lock hold, so searches keep answering during an import
+COMPACT_MIN_STALE = 1000        # The index file is rewritten once it holds this many superseded lines...
+COMPACT_STALE_RATIO = 0.5       # ...and they make up at least this share of it
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TitleIndex:
+    """
+    Trigram index over movie titles. Candidates are ranked by Dice similarity of their
+    trigram sets, adjusted for the release year when one is given.
+    """
+    def __init__(self, path: Path = INDEX_FILE):
+        self.path = path
+        self._movies: Dict[int, Dict[str, Any]] = {}
+        self._grams: Dict[int, Tuple[Set[str], ...]] = {}
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._lock = threading.RLock()
+        self._file_lines = 0  # Lines in the index file, including ones superseded by later lines
+
+    def __len__(self) -> int:
+        return len(self._movies)
+
+    def _add(self, movie: Dict[str, Any]) -> bool:
+        """Indexes one movie. Returns True if it was new or changed."""
+        try:
+            movie_id = int(movie["id"])
+        except (KeyError, TypeError, ValueError):
+            return False
+        if not movie.get("title"):
+            return False
+        record = {key: movie[key] for key in INDEXED_FIELDS if movie.get(key) not in (None, "")}
+        existing = self._movies.get(movie_id)
+        if existing is not None:
+            merged = {**existing, **record}  # Keep fields (like release_date) a sparser source lacks
+            if merged == existing:
+                return False
+            self._remove_postings(movie_id)
+            record = merged
+        self._movies[movie_id] = record
+        titles = {normalize_title(record["title"]), normalize_title(record.get("original_title", ""))}
+        grams = tuple(_trigrams(title) for title in titles if title)
+        self._grams[movie_id] = grams
+        for gram in set().union(*grams):
+            self._postings[gram].add(movie_id)
+        return True
+
+    def _remove_postings(self, movie_id: int):
+        for gram in set().union(*self._grams.pop(movie_id, ())):
+            self._postings[gram].discard(movie_id)
+
+    def load(self) -> "TitleIndex":
+        """Loads the saved index, then merges in everything from the TMDb response cache."""
+        with self._lock:
+            if self.path.exists():
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        self._file_lines += 1
+                        try:
+                            self._add(json.loads(line))
+                        except json.JSONDecodeError:
+                            continue
+            learned = [movie for movie in tmdb_client.cached_movies() if self._add(movie)]
+            if learned:
+                self._append(learned)
+            self._compact_if_stale()
+        return self
+
+    def _append(self, movies: Iterable[Dict[str, Any]]):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                for movie in movies:
+                    f.write(json.dumps(self._movies.get(int(movie["id"]), movie)) + "\n")
+                    self._file_lines += 1
+        except OSError as e:
+            print(f"[DEBUG] Could not save title index: {e}")
+
+    def _compact_if_stale(self):
+        """Rewrites the index file with one line per movie once re-imports and updates have left many superseded lines."""
+        stale = self._file_lines - len(self._movies)
+        if stale < COMPACT_MIN_STALE or stale < self._file_lines * COMPACT_STALE_RATIO:
+            return
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for movie in self._movies.values():
+                    f.write(json.dumps(movie) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+            self._file_lines = len(self._movies)
+        except OSError as e:
+            print(f"[DEBUG] Could not compact title index: {e}")
+
+    def add_movies(self, movies: Iterable[Dict[str, Any]]) -> int:
+        """Indexes and saves movies (e.g. fresh search results). Returns how many were new or changed."""
+        with self._lock:
+            changed = [movie for movie in movies if self._add(movie)]
+            if changed:
+                self._append(changed)
+                self._compact_if_stale()
+            return len(changed)
+
+    def import_dataset(self, dataset_path: Path, progress_callback: Optional[Callable] = None,
+                       stop_check: Optional[Callable[[], bool]] = None) -> int:
+        """
+        Imports an offline dataset: JSON Lines (such as TMDb's daily ID export) or CSV with
+        `id` and `title` columns and optionally `release_date` or `year`. Rows are streamed and
+        indexed in batches; a stop request ends the import after the current batch.
+        """
+        total_bytes = max(1, dataset_path.stat().st_size)
+        imported, batch = 0, []
+
+        def flush(f):
+            nonlocal imported
+            imported += self.add_movies(batch)
+            batch.clear()
+            if progress_callback:
+                percent = min(99, int(f.buffer.tell() * 100 / total_bytes))
+                progress_callback(percent, f"Imported {imported} title(s)")
+
+        with open(dataset_path, "r", encoding="utf-8", newline="") as f:
+            if dataset_path.suffix.lower() == ".csv":
+                rows: Iterable[Dict[str, Any]] = csv.DictReader(f)
+            else:
+                rows = (json.loads(line) for line in f if line.strip())
+            for row in rows:
+                movie = dict(row)
+                if not movie.get("title"):
+                    movie["title"] = movie.get("original_title")
+                if movie.get("year") and not movie.get("release_date"):
+                    movie["release_date"] = f"{movie['year']}-01-01"
+                if movie.get("adult") is True:
+                    continue
+                batch.append(movie)
+                if len(batch) >= IMPORT_BATCH:
+                    flush(f)
+                    if stop_check and stop_check():
+                        break
+            if batch:
+                flush(f)
+        return imported
+
+    def search(self, query: str, year: Optional[str] = None, limit: int = 20) -> List[Tuple[float, Dict[str, Any]]]:
+        """Returns up to `limit` (score, movie) pairs, best first."""
+        wanted = normalize_title(query)
+        if not wanted:
+            return []
+        query_grams = _trigrams(wanted)
+        # A title reaching MIN_SCORE shares at least `min_shared` trigrams with the query, so it must
+        # contain one of the rarest len - min_shared + 1 of them. Only those postings are scanned;
+        # the common trigrams are just checked against the candidates found.
+        min_shared = max(1, math.ceil(MIN_SCORE * len(query_grams) / (2 - MIN_SCORE)))
+        with self._lock:
+            by_rarity = sorted(query_grams, key=lambda gram: len(self._postings.get(gram, ())))
+            split = len(by_rarity) - min_shared + 1
+            shared: Dict[int, int] = defaultdict(int)
+            for gram in by_rarity[:split]:
+                for movie_id in self._postings.get(gram, ()):
+                    shared[movie_id] += 1
+            for gram in by_rarity[split:]:
+                postings = self._postings.get(gram)
+                if postings:
+                    for movie_id in shared:
+                        if movie_id in postings:
+                            shared[movie_id] += 1
+
+            ranked = []
+            for movie_id in heapq.nlargest(max(CANDIDATE_POOL, limit), shared, key=shared.__getitem__):
+                score = max(2 * len(query_grams & grams) / (len(query_grams) + len(grams)) for grams in self._grams[movie_id])
+                if score < MIN_SCORE:
+                    continue
+                movie = self._movies[movie_id]
+                movie_year = release_year(movie)
+                if year and movie_year:
+                    difference = abs(int(year) - int(movie_year))
+                    score += 0.1 if difference == 0 else (-0.3 if difference > 1 else 0.0)
+                ranked.append((max(0.0, min(1.0, score)), float(movie.get("popularity") or 0), movie))
+        ranked.sort(key=lambda entry: (entry[0], entry[1]), reverse=True)
+        return [(score, movie) for score, _popularity, movie in ranked[:limit]]
+
+_index: Optional[TitleIndex] = None
+_index_lock = threading.Lock()
+
+def get_index() -> TitleIndex:
+    """Returns the shared index, loading it on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = TitleIndex().load()
+        return _index
+
+def loaded_index() -> Optional[TitleIndex]:
+    """Returns the shared index if it has finished loading, without blocking."""
+    return _index
+
+def suggest(filename_or_query: str, year: Optional[str] = None, limit: int = 20) -> List[Tuple[float, Dict[str, Any]]]:
+    """Local suggestions for a filename or free-text query."""
+    return get_index().search(clean_search_query(filename_or_query) or filename_or_query, year, limit)
+
+def search_with_fallback(query: str, year: Optional[str] = None, refresh: bool = False) -> List[Dict[str, Any]]:
+    """
+    Answers a search from the local index when it has a confident match, otherwise (or when
+    `refresh` is set) asks TMDb and indexes the results.
+    """
+    index = get_index()
+    local = index.search(query, year)
+    if local and local[0][0] >= LOCAL_CONFIDENT_SCORE and not refresh:
+        return [movie for _score, movie in local]
+    results = tmdb_client.search_movie(query, year)
+    if results:
+        index.add_movies(results)
+        return results
+    return [movie for _score, movie in local]
+
+def import_dataset(dataset_path: Path, progress_callback: Optional[Callable] = None,
+                   stop_check: Optional[Callable[[], bool]] = None) -> int:
+    """Imports a dataset into the shared index, loading it first if start-up warm-up has not finished."""
+    return get_index().import_dataset(dataset_path, progress_callback, stop_check)
@@ -1,72 +1,281 @@
 # tmdb_client.py
 # This module handles all communication with The Movie Database (TMDb) API.
+# Responses are cached in memory for the session and on disk between sessions.
 
+import os
 import json
-from urllib import request, parse, error
+import time
+import hashlib
+import threading
+import http.client
+from collections import OrderedDict
+from urllib import parse
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple, Iterator
+
+import tracing
+
+# The base URL can be pointed at a local stand-in server for testing.
+API_BASE_URL = os.getenv("TMDB_API_BASE_URL", "https://api.themoviedb.org/3").rstrip("/")
+REQUEST_TIMEOUT = 10
+
+# --- Response cache ---
+CACHE_DIR = Path(os.getenv("APPDATA", Path.home())) / "MediaConverter" / "tmdb_cache"
+SEARCH_TTL_SECONDS = 7 * 24 * 3600      # Search results change as TMDb adds movies
+DETAILS_TTL_SECONDS = 30 * 24 * 3600    # Movie details rarely change
+MAX_DISK_ENTRIES = 5000
+MAX_MEMORY_ENTRIES = 500
+
+class ResponseCache:
+    """
+    Two-level cache for JSON responses: an LRU dictionary for the session in front of one
+    file per entry on disk. Expired entries are ignored, and the least recently used files
+    are evicted once the disk cache grows past `max_disk_entries`.
+    """
+    def __init__(self, cache_dir: Path = CACHE_DIR, max_disk_entries: int = MAX_DISK_ENTRIES,
+                 max_memory_entries: int = MAX_MEMORY_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._disk_count: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _path_for(self, key: str) -> Path:
+        return self.cache_dir / (hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _remember(self, key: str, expires: float, data: Any):
+        self._memory[key] = (expires, data)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached and cached[0] > now:
+                self._memory.move_to_end(key)
+                return cached[1]
+
+            path = self._path_for(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (IOError, json.JSONDecodeError):
+                return None
+            if entry.get("key") != key or entry.get("expires", 0) <= now:
+                return None
+            try:
+                os.utime(path)  # Mark as recently used for eviction
+            except OSError:
+                pass
+            self._remember(key, entry["expires"], entry["data"])
+            return entry["data"]
+
+    def put(self, key: str, data: Any, ttl: float):
+        expires = time.time() + ttl
+        with self._lock:
+            self._remember(key, expires, data)
+            path = self._path_for(key)
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                is_new = not path.exists()
+                temp_path = path.with_name(path.name + ".tmp")
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump({"key": key, "expires": expires, "data": data}, f)
+                os.replace(temp_path, path)
+            except OSError as e:
+                print(f"[DEBUG] Could not write TMDb cache entry: {e}")
+                return
+            if is_new:
+                self._count_new_entry()
+
+    def _count_new_entry(self):
+        if self._disk_count is None:
+            self._disk_count = sum(1 for _ in self.cache_dir.glob("*.json"))
+        else:
+            self._disk_count += 1
+        if self._disk_count > self.max_disk_entries:
+            self._evict()
+
+    def _evict(self):
+        """Deletes the least recently used files until the cache is 10% below its cap."""
+        files = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                files.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        files.sort()
+        target = int(self.max_disk_entries * 0.9)
+        for _mtime, path in files[:max(0, len(files) - target)]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        self._disk_count = min(len(files), target)
+
+    def iter_entries(self) -> Iterator[Tuple[str, Any]]:
+        """Yields (key, data) for every unexpired entry on disk."""
+        now = time.time()
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (IOError, json.JSONDecodeError):
+                continue
+            if entry.get("expires", 0) > now and "key" in entry:
+                yield entry["key"], entry.get("data")
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            for path in self.cache_dir.glob("*.json"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self._disk_count = 0
+
+_cache = ResponseCache()
+
+def clear_cache():
+    _cache.clear()
+
+def cached_movies() -> Iterator[Dict[str, Any]]:
+    """Yields every movie found in cached search results and details, for building offline indexes."""
+    for key, data in _cache.iter_entries():
+        if key.startswith("search:") and isinstance(data, list):
+            yield from (movie for movie in data if isinstance(movie, dict))
+        elif key.startswith("movie:") and isinstance(data, dict):
+            yield data
+
+# --- API key ---
+_api_key_state: Dict[str, Any] = {"mtime": None, "key": None}
 
 def get_api_key() -> Optional[str]:
-    """Reads the TMDb API key from the api_config.json file."""
+    """Reads the TMDb API key from the api_config.json file, re-reading only when the file changes."""
+    config_path = Path(__file__).parent / "api_config.json"
+    try:
+        mtime = config_path.stat().st_mtime
+    except OSError:
+        return None
+    if mtime == _api_key_state["mtime"]:
+        return _api_key_state["key"]
+    key = None
     try:
-        config_path = Path(__file__).parent / "api_config.json"
         with open(config_path, "r", encoding="utf-8") as f:
             config = json.load(f)
             key = config.get("tmdb_api_key")
-            if key and key != "YOUR_API_KEY_GOES_HERE":
-                return key
+            if not key or key == "YOUR_API_KEY_GOES_HERE":
+                key = None
     except (IOError, json.JSONDecodeError):
         pass
+    _api_key_state.update(mtime=mtime, key=key)
+    return key
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split())
+
+_connections = threading.local()
+
+def _connection() -> http.client.HTTPConnection:
+    """Returns this thread's keep-alive connection to the API host, creating it if needed."""
+    base = parse.urlsplit(API_BASE_URL)
+    conn = getattr(_connections, "conn", None)
+    if conn is None or getattr(_connections, "netloc", None) != base.netloc:
+        conn_class = http.client.HTTPSConnection if base.scheme == "https" else http.client.HTTPConnection
+        conn = conn_class(base.netloc, timeout=REQUEST_TIMEOUT)
+        _connections.conn, _connections.netloc = conn, base.netloc
+    return conn
+
+def _drop_connection():
+    conn = getattr(_connections, "conn", None)
+    if conn is not None:
+        conn.close()
+        _connections.conn = None
+
+def _fetch_json(path: str, params: Dict[str, Any], api_key: str, rate_limiter=None) -> Optional[Dict[str, Any]]:
+    """
+    GETs `path` from the API over a reused connection. `rate_limiter`, if given, is an object
+    whose acquire() blocks until a request may be sent. Returns the decoded response, or None on any error.
+    """
+    base_path = parse.urlsplit(API_BASE_URL).path
+    url = f"{base_path}{path}?{parse.urlencode({'api_key': api_key, **params})}"
+    print(f"[DEBUG] Sending request to TMDb: {path}?{parse.urlencode(params)}")
+    for attempt in range(2):
+        if rate_limiter:
+            with tracing.span("tmdb rate limit wait", "network"):
+                rate_limiter.acquire()
+        try:
+            conn = _connection()
+            with tracing.span(f"GET {path}", "network", attempt=attempt) as span:
+                conn.request("GET", url, headers={"Accept": "application/json"})
+                response = conn.getresponse()
+                body = response.read()  # Always drain the body so the connection can be reused
+                span.set(status=response.status, bytes=len(body))
+            if response.status == 200:
+                return json.loads(body)
+            if response.status == 429 and attempt == 0:
+                retry_after = response.getheader("Retry-After", "1")
+                time.sleep(min(10.0, float(retry_after) if retry_after.replace(".", "", 1).isdigit() else 1.0))
+                continue
+            print(f"[DEBUG] TMDb returned HTTP {response.status} for {path}.")
+            return None
+        except (http.client.HTTPException, OSError) as e:
+            # The server may have closed an idle keep-alive connection; retry once on a new one.
+            _drop_connection()
+            if attempt == 0:
+                continue
+            print(f"[DEBUG] A network error occurred while contacting TMDb: {e}")
+        except Exception as e:
+            print(f"[DEBUG] An unexpected error occurred: {e}")
+            _drop_connection()
+            return None
     return None
 
-def search_movie(query: str, year: Optional[str] = None) -> List[Dict[str, Any]]:
+def search_movie(query: str, year: Optional[str] = None, rate_limiter=None) -> List[Dict[str, Any]]:
     """
     Searches for a movie on TMDb by query and optional year.
     Returns a list of search results.
     """
+    cache_key = f"search:{_normalize_query(query)}|{year or ''}"
+    cached = _cache.get(cache_key)
+    if cached is not None:
+        tracing.instant("tmdb cache hit", "network", key=cache_key)
+        return cached
+
     api_key = get_api_key()
     if not api_key:
         print("[DEBUG] TMDb API key not found or configured in api_config.json.")
         return []
 
-    params = {"api_key": api_key, "query": query}
+    params = {"query": query}
     if year:
         params["year"] = year
+    data = _fetch_json("/search/movie", params, api_key, rate_limiter)
+    if data is None:
+        return []  # Failures are not cached
+    results = data.get("results", [])
+    _cache.put(cache_key, results, SEARCH_TTL_SECONDS)
+    return results
 
-    encoded_params = parse.urlencode(params)
-    url = f"https://api.themoviedb.org/3/search/movie?{encoded_params}"
-    
-    print(f"[DEBUG] Sending request to TMDb: {url.replace(api_key, 'REDACTED')}")
-
-    try:
-        # Added a 10-second timeout to the network request.
-        with request.urlopen(url, timeout=10) as response:
-            if response.status == 200:
-                data = json.loads(response.read())
-                print("[DEBUG] TMDb API request successful.")
-                return data.get("results", [])
-    except error.URLError as e:
-        # MODIFIED: Added more detailed error printing for diagnostics.
-        print(f"[DEBUG] A network error occurred while contacting TMDb: {e}")
-        return []
-    except Exception as e:
-        print(f"[DEBUG] An unexpected error occurred: {e}")
-        return []
-
-def get_movie_details(movie_id: int) -> Optional[Dict[str, Any]]:
+def get_movie_details(movie_id: int, rate_limiter=None) -> Optional[Dict[str, Any]]:
     """
     Fetches detailed information for a specific movie by its TMDb ID.
     """
+    cache_key = f"movie:{int(movie_id)}"
+    cached = _cache.get(cache_key)
+    if cached is not None:
+        tracing.instant("tmdb cache hit", "network", key=cache_key)
+        return cached
+
     api_key = get_api_key()
     if not api_key:
         return None
-        
-    url = f"https://api.themoviedb.org/3/movie/{movie_id}?api_key={api_key}"
-    
-    try:
-        with request.urlopen(url, timeout=10) as response:
-            if response.status == 200:
-                return json.loads(response.read())
-    except error.URLError as e:
-        print(f"Error getting movie details from TMDb: {e}")
-        return None
\ No newline at end of file
+
+    details = _fetch_json(f"/movie/{int(movie_id)}", {}, api_key, rate_limiter)
+    if details is not None:
+        _cache.put(cache_key, details, DETAILS_TTL_SECONDS)
+    return details
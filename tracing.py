@@ -0,0 +1,129 @@
+# tracing.py
+# This module records lightweight timing spans around pipeline phases and subprocesses and
+# writes them as Chrome trace-event JSON on exit, for viewing in Perfetto or chrome://tracing.
+# Tracing is off unless MEDIACONVERTER_TRACE is set or enable() is called; while off, span()
+# returns a shared no-op context manager.
+
+import os
+import json
+import time
+import atexit
+import threading
+import functools
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+TRACE_ENV_VAR = "MEDIACONVERTER_TRACE"  # "1" for the default location, or a .json file path
+TRACE_DIR = Path(os.getenv("APPDATA", Path.home())) / "MediaConverter" / "traces"
+
+_events: List[Dict[str, Any]] = []
+_named_threads: set = set()
+_lock = threading.Lock()
+_enabled = False
+_output_path: Optional[Path] = None
+_pid = os.getpid()
+
+def _now_us() -> float:
+    return time.perf_counter_ns() / 1000
+
+class _NoopSpan:
+    __slots__ = ()
+    args: Dict[str, Any] = {}
+    def __enter__(self): return self
+    def __exit__(self, exc_type, exc, tb): return False
+    def set(self, **args): pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class Span:
+    """A complete ("X") trace event. Extra arguments can be attached with set() while it runs."""
+    __slots__ = ("name", "category", "args", "_start")
+
+    def __init__(self, name: str, category: str, args: Dict[str, Any]):
+        self.name, self.category, self.args = name, category, args
+
+    def __enter__(self) -> "Span":
+        self._start = _now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = _now_us()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        _record({"name": self.name, "cat": self.category, "ph": "X", "ts": self._start, "dur": end - self._start, "args": self.args})
+        return False
+
+    def set(self, **args):
+        self.args.update(args)
+
+def _record(event: Dict[str, Any]):
+    thread = threading.current_thread()
+    event["pid"], event["tid"] = _pid, thread.ident
+    with _lock:
+        if thread.ident not in _named_threads:
+            _named_threads.add(thread.ident)
+            _events.append({"name": "thread_name", "ph": "M", "pid": _pid, "tid": thread.ident, "args": {"name": thread.name}})
+        _events.append(event)
+
+def enabled() -> bool:
+    return _enabled
+
+def enable(output_path: Optional[Path] = None):
+    """Starts recording; the trace is written to `output_path` (or a timestamped file) on exit."""
+    global _enabled, _output_path
+    if output_path is not None:
+        _output_path = Path(output_path)
+    if not _enabled:
+        _enabled = True
+        atexit.register(export)
+
+def span(name: str, category: str = "pipeline", **args):
+    """Times the enclosed block. Use as `with tracing.span("mkvmerge -J", "subprocess", file=...):`."""
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(name, category, args)
+
+def instant(name: str, category: str = "pipeline", **args):
+    """Records a point in time, e.g. a subprocess being launched."""
+    if _enabled:
+        _record({"name": name, "cat": category, "ph": "i", "s": "t", "ts": _now_us(), "args": args})
+
+def traced(name: Optional[str] = None, category: str = "pipeline") -> Callable:
+    """Decorator form of span(); the span is named after the function unless `name` is given."""
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with Span(span_name, category, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def events(name: Optional[str] = None) -> List[Dict[str, Any]]:
+    """A copy of the events recorded so far, optionally only those called `name`."""
+    with _lock:
+        return [dict(event) for event in _events if name is None or event.get("name") == name]
+
+def export(path: Optional[Path] = None) -> Optional[Path]:
+    """Writes the recorded events as Chrome trace-event JSON. Returns the file written, if any."""
+    with _lock:
+        events = list(_events)
+    if not events:
+        return None
+    path = Path(path or _output_path or TRACE_DIR / f"trace-{datetime.now():%Y%m%d-%H%M%S}.json")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+    except OSError as e:
+        print(f"[DEBUG] Could not write trace: {e}")
+        return None
+    print(f"[DEBUG] Trace with {len(events)} events written to {path}")
+    return path
+
+_env_value = os.getenv(TRACE_ENV_VAR, "").strip()
+if _env_value and _env_value.lower() not in ("0", "false", "no"):
+    enable(Path(_env_value) if _env_value.lower().endswith(".json") else None)